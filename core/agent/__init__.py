@@ -0,0 +1,41 @@
+"""
+Agent runtime helpers for SenpAI Agent application.
+"""
+
+from .chatbot import create_chatbot_node
+from .context_window import ContextWindow, estimate_message_tokens
+from .host import AgentHost, AgentSpec, load_agent_manifest
+from .llm import create_chat_model, set_chat_model_factory
+from .model_router import ModelRouter, ModelTier, latency_budget_config
+from .prompt_cache import bind_tools, build_system_message, get_prompt_caching_enabled, supports_prompt_caching
+from .semantic_cache import BedrockEmbedder, CacheHit, CacheLookup, HashingEmbedder, SemanticCache
+from .streaming import GraphEventStream, message_text, stream_requested, text_events
+from .tool_node import create_tool_node
+
+__all__ = [
+    'create_chatbot_node',
+    'ContextWindow',
+    'estimate_message_tokens',
+    'AgentHost',
+    'AgentSpec',
+    'load_agent_manifest',
+    'create_chat_model',
+    'set_chat_model_factory',
+    'ModelRouter',
+    'ModelTier',
+    'latency_budget_config',
+    'bind_tools',
+    'build_system_message',
+    'get_prompt_caching_enabled',
+    'supports_prompt_caching',
+    'SemanticCache',
+    'CacheHit',
+    'CacheLookup',
+    'HashingEmbedder',
+    'BedrockEmbedder',
+    'GraphEventStream',
+    'message_text',
+    'stream_requested',
+    'text_events',
+    'create_tool_node',
+]
@@ -0,0 +1,112 @@
+"""
+Shared chatbot node for SenpAI LangGraph agents.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+
+from core.metrics import LLM_LATENCY, record_token_usage, track_stage
+from core.tracing import set_token_usage, start_span
+from .context_window import ContextWindow, WindowStats
+from .model_router import ModelRouter, RouteDecision, get_latency_budget
+from .prompt_cache import build_system_message, cacheable_fields
+
+
+def create_chatbot_node(
+    llm: Any,
+    system_message: str,
+    model_id: Optional[str] = None,
+    prompt_caching: bool = False,
+    context_window: Optional[ContextWindow] = None,
+    model_router: Optional[ModelRouter] = None,
+) -> RunnableLambda:
+    """
+    Create the "chatbot" graph node: prepend the system prompt, call the LLM and
+    record the call in senpai_llm_latency_seconds, senpai_llm_tokens_total and an
+    "llm.invoke" span with token counts.
+
+    With prompt caching enabled (and supported by the model), the system prompt is
+    followed by a cache checkpoint so that repeated calls read it from the cache.
+    With a context window, older messages are trimmed to its token budget before
+    each call (the graph state itself is not changed). With a model router, each call
+    goes to the model tier it chooses (llm is then unused, the request's latency budget
+    is read from config["configurable"]["latency_budget_ms"]) and the call's latency
+    is fed back to the router.
+
+    The node supports both graph.invoke() and graph.ainvoke(); the async path uses
+    llm.ainvoke() so the event loop is never blocked.
+
+    Args:
+        llm: Chat model, optionally with tools bound
+        system_message: System prompt
+        model_id: Model label for metrics (default: llm.model_id)
+        prompt_caching: Mark the system prompt as a cacheable prefix
+        context_window: Token budget for the messages sent to the model (None: unbounded)
+        model_router: Chooses the model per call from request complexity and latency budget
+
+    Returns:
+        Runnable usable with StateGraph.add_node("chatbot", ...)
+    """
+    model_label = model_id or getattr(llm, "model_id", None) or getattr(getattr(llm, "bound", None), "model_id", "unknown")
+    systems: Dict[str, SystemMessage] = {}
+
+    def system_for(label: str) -> SystemMessage:
+        # Cache checkpoints depend on the model, so each routed model gets its own system message
+        if label not in systems:
+            systems[label] = build_system_message(system_message, cache="system" in cacheable_fields(label, prompt_caching))
+        return systems[label]
+
+    def prepare(state: Dict[str, Any], config: Optional[RunnableConfig]) -> Tuple[Any, str, Optional[RouteDecision], List[Any], Optional[WindowStats]]:
+        route = None
+        if model_router is not None:
+            route = model_router.route(state["messages"], budget=get_latency_budget(config))
+        label = route.tier.model_id if route is not None else model_label
+        messages = state["messages"]
+        if not messages or not isinstance(messages[0], SystemMessage):
+            messages = [system_for(label)] + messages
+        if context_window is not None:
+            messages, stats = context_window.fit(messages)
+        else:
+            stats = None
+        return (route.llm if route is not None else llm), label, route, messages, stats
+
+    def span_attributes(label: str, route: Optional[RouteDecision], stats: Optional[WindowStats]) -> Dict[str, Any]:
+        attributes = {"gen_ai.request.model": label}
+        if route is not None:
+            attributes["senpai.route.tier"] = route.tier.name
+            attributes["senpai.route.reason"] = route.reason
+        if stats is not None:
+            attributes["senpai.context.tokens"] = stats.tokens
+            attributes["senpai.context.dropped_messages"] = stats.dropped_messages
+        return attributes
+
+    def observe(route: Optional[RouteDecision], start: float) -> None:
+        if route is not None:
+            model_router.observe(route.tier, time.perf_counter() - start)
+
+    def chatbot(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        model, label, route, messages, stats = prepare(state, config)
+        start = time.perf_counter()
+        with start_span("llm.invoke", **span_attributes(label, route, stats)) as span, \
+                track_stage(LLM_LATENCY, model=label):
+            response = model.invoke(messages)
+            set_token_usage(span, response)
+        observe(route, start)
+        record_token_usage(response.usage_metadata, model=label)
+        return {"messages": [response]}
+
+    async def achatbot(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        model, label, route, messages, stats = prepare(state, config)
+        start = time.perf_counter()
+        with start_span("llm.invoke", **span_attributes(label, route, stats)) as span, \
+                track_stage(LLM_LATENCY, model=label):
+            response = await model.ainvoke(messages)
+            set_token_usage(span, response)
+        observe(route, start)
+        record_token_usage(response.usage_metadata, model=label)
+        return {"messages": [response]}
+
+    return RunnableLambda(chatbot, afunc=achatbot, name="chatbot")
@@ -0,0 +1,242 @@
+"""
+Token-budgeted conversation window for LLM calls.
+
+MessagesState grows with every user turn, tool call and tool result, and the whole
+list is resent on every iteration of the tool loop. ContextWindow trims the
+messages sent to the model to a token budget by dropping (or summarizing) the
+oldest messages. Messages are removed in blocks so that an AI message with tool
+calls always stays together with its tool results, and the most recent user
+message is always kept.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from .streaming import message_text
+
+STRATEGY_DROP = "drop"
+STRATEGY_SUMMARIZE = "summarize"
+
+# Fixed per-message overhead (role markers, block structure)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_text_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text without a tokenizer.
+
+    ASCII text averages about 4 characters per token; Japanese and other non-ASCII
+    characters are counted as one token each.
+
+    Args:
+        text: Text
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def estimate_message_tokens(message: BaseMessage) -> int:
+    """
+    Estimate the token count of a message, including tool call arguments.
+
+    Args:
+        message: LangChain message
+
+    Returns:
+        Estimated token count
+    """
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_text_tokens(message_text(message.content))
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_text_tokens(tool_call.get("name", ""))
+        tokens += estimate_text_tokens(json.dumps(tool_call.get("args", {}), ensure_ascii=False))
+    return tokens
+
+
+def summarize_messages(messages: Sequence[BaseMessage], max_chars: int = 200) -> str:
+    """
+    Default summarizer: an extractive digest of the dropped messages (no LLM call).
+
+    Args:
+        messages: Messages removed from the window
+        max_chars: Maximum characters kept per message
+
+    Returns:
+        Summary text
+    """
+    lines = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            role = "User"
+        elif isinstance(message, ToolMessage):
+            role = f"Tool {message.name}" if message.name else "Tool"
+        elif isinstance(message, AIMessage) and message.tool_calls and not message_text(message.content):
+            lines.append("Assistant called: " + ", ".join(call["name"] for call in message.tool_calls))
+            continue
+        else:
+            role = "Assistant"
+        text = " ".join(message_text(message.content).split())
+        if len(text) > max_chars:
+            text = text[:max_chars] + "..."
+        if text:
+            lines.append(f"{role}: {text}")
+    return "Summary of the earlier conversation:\n" + "\n".join(lines)
+
+
+@dataclass
+class WindowStats:
+    """Result of fitting messages into the window."""
+
+    tokens: int
+    dropped_messages: int
+    summarized: bool
+
+
+class ContextWindow:
+    """
+    Trims conversation messages to a token budget.
+
+    Messages are grouped into blocks: a user message, or an AI message together with
+    the tool results that answer its tool calls. Whole turns (starting at a user
+    message) are dropped oldest first; if the current turn alone still exceeds the
+    budget, its oldest tool blocks are dropped while the user message that started
+    it and its latest block are kept. With the "summarize" strategy the dropped
+    messages are replaced by a single system message holding a summary.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        strategy: str = STRATEGY_DROP,
+        summarizer: Optional[Callable[[Sequence[BaseMessage]], str]] = None,
+        summary_max_tokens: int = 500,
+        token_counter: Callable[[BaseMessage], int] = estimate_message_tokens,
+    ):
+        """
+        Args:
+            max_tokens: Token budget for the messages sent to the model (incl. system prompt)
+            strategy: "drop" or "summarize"
+            summarizer: Function that turns dropped messages into summary text
+                (default: summarize_messages)
+            summary_max_tokens: Budget reserved for the summary message
+            token_counter: Token estimator per message
+        """
+        if strategy not in (STRATEGY_DROP, STRATEGY_SUMMARIZE):
+            raise ValueError(f"Unknown context window strategy: {strategy}")
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.summarizer = summarizer or summarize_messages
+        self.summary_max_tokens = summary_max_tokens
+        self.token_counter = token_counter
+
+    @classmethod
+    def from_env(cls, default_max_tokens: int = 8000) -> Optional["ContextWindow"]:
+        """
+        Create a window configured from environment variables.
+
+        Environment variables:
+            CONTEXT_MAX_TOKENS: Token budget per LLM call (0 disables trimming)
+            CONTEXT_STRATEGY: "drop" or "summarize" (default: drop)
+
+        Args:
+            default_max_tokens: Budget used when CONTEXT_MAX_TOKENS is not set
+
+        Returns:
+            ContextWindow, or None if trimming is disabled
+        """
+        max_tokens = int(os.getenv("CONTEXT_MAX_TOKENS", str(default_max_tokens)))
+        if max_tokens <= 0:
+            return None
+        return cls(max_tokens=max_tokens, strategy=os.getenv("CONTEXT_STRATEGY", STRATEGY_DROP).lower())
+
+    def fit(self, messages: Sequence[BaseMessage], reserved_tokens: int = 0) -> Tuple[List[BaseMessage], WindowStats]:
+        """
+        Return the messages that fit into the budget.
+
+        Leading system messages are always kept.
+
+        Args:
+            messages: Conversation messages (oldest first)
+            reserved_tokens: Tokens already used by parts not in messages (e.g. the system prompt)
+
+        Returns:
+            Tuple of (messages to send, WindowStats)
+        """
+        messages = list(messages)
+        head = 0
+        while head < len(messages) and isinstance(messages[head], SystemMessage):
+            head += 1
+        prefix, body = messages[:head], messages[head:]
+
+        counts = [self.token_counter(m) for m in messages]
+        budget = self.max_tokens - reserved_tokens - sum(counts[:head])
+        body_counts = counts[head:]
+        total = sum(body_counts)
+        if total <= budget:
+            return messages, WindowStats(tokens=reserved_tokens + sum(counts), dropped_messages=0, summarized=False)
+
+        if self.strategy == STRATEGY_SUMMARIZE:
+            budget -= self.summary_max_tokens
+
+        blocks = _split_blocks(body)
+        turn_starts = [i for i, block in enumerate(blocks) if isinstance(body[block[0]], HumanMessage)]
+        block_tokens = [sum(body_counts[j] for j in block) for block in blocks]
+
+        # 1. Drop whole turns (oldest first), but never the current one
+        current_turn = turn_starts[-1] if turn_starts else 0
+        cut = current_turn
+        for start in sorted({0, *turn_starts}):
+            if start >= current_turn or sum(block_tokens[start:]) <= budget:
+                cut = start
+                break
+        kept = list(range(cut, len(blocks)))
+
+        # 2. Drop the oldest tool blocks of the current turn, keeping its user message
+        #    and latest block
+        while sum(block_tokens[i] for i in kept) > budget and len(kept) > 2:
+            del kept[1]
+
+        kept_indices = [j for i in kept for j in blocks[i]]
+        kept_set = set(kept_indices)
+        dropped = [body[j] for j in range(len(body)) if j not in kept_set]
+        result = prefix + [body[j] for j in kept_indices]
+
+        summarized = False
+        if dropped and self.strategy == STRATEGY_SUMMARIZE:
+            # Placed after the system prompt so a cached system prefix stays valid
+            summary = SystemMessage(content=self._summary_text(dropped))
+            result = prefix + [summary] + [body[j] for j in kept_indices]
+            summarized = True
+
+        tokens = reserved_tokens + sum(self.token_counter(m) for m in result)
+        return result, WindowStats(tokens=tokens, dropped_messages=len(dropped), summarized=summarized)
+
+
+    def _summary_text(self, dropped: Sequence[BaseMessage]) -> str:
+        """Summarize dropped messages, keeping the most recent lines within summary_max_tokens."""
+        lines = self.summarizer(dropped).split("\n")
+        while len(lines) > 2 and estimate_text_tokens("\n".join(lines)) > self.summary_max_tokens:
+            del lines[1]
+        return "\n".join(lines)
+
+
+def _split_blocks(messages: Sequence[BaseMessage]) -> List[List[int]]:
+    """
+    Group message indices into blocks that must be kept or dropped together: tool
+    results belong to the block of the AI message that requested them.
+    """
+    blocks: List[List[int]] = []
+    for i, message in enumerate(messages):
+        if isinstance(message, ToolMessage) and blocks:
+            blocks[-1].append(i)
+        else:
+            blocks.append([i])
+    return blocks
@@ -0,0 +1,481 @@
+"""
+Serve several SenpAI agents from one process.
+
+Agents are declared in an agent manifest instead of one near-identical script per
+agent. The host compiles each agent's graph once at startup and shares everything
+that is process-wide anyway: the pooled AWS clients, the memory event writer, the
+semantic cache (one namespace per agent), tool guards and the tool result cache.
+Requests are routed by the payload's "agent" field.
+
+Manifest format (JSON, paths relative to the manifest):
+
+    {
+        "default_agent": "main",
+        "agents": [
+            {
+                "name": "advice",
+                "prompt": "../senpai_advice_agent/prompt.py",
+                "model_id": "us.amazon.nova-micro-v1:0",
+                "temperature": 0.7,
+                "max_tokens": 2048,
+                "model_kwargs": {"top_p": 0.9},
+                "prompt_caching": true,
+                "context_max_tokens": 8000,
+                "context_strategy": "drop",
+                "tools": null,
+                "memory_id": "advice_memory-default",
+                "semantic_cache": true,
+                "response_format": "text"
+            }
+        ]
+    }
+
+Prompt caching and the context window are configured per agent, as they were when
+every agent ran in its own process; omitted keys fall back to the host-wide
+PROMPT_CACHING, CONTEXT_MAX_TOKENS and CONTEXT_STRATEGY settings. Per-agent
+environment variables override the manifest: <NAME>_MEMORY_ID (e.g. ADVICE_MEMORY_ID),
+<NAME>_PROMPT_CACHING and <NAME>_CONTEXT_MAX_TOKENS (0 disables trimming).
+
+The memory store of an agent is <NAME>_MEMORY_ID, else AWS_MEMORY_ID (the variable
+the standalone agents read, so a deployment moved to the host keeps its store), else
+the manifest's memory_id. Agents with "save_run_messages" save every message of the
+run, as the standalone main agent does; others save the final answer.
+"""
+
+import importlib.util
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import MessagesState, StateGraph
+from langgraph.prebuilt import tools_condition
+
+from core.aws import get_memory_client
+from core.logger import get_logger
+from core.memory import create_memory_event_writer
+from core.metrics import REQUEST_LATENCY, record_graph_iterations, register_stats, track_stage, use_agent_name
+from core.tools.tool_context import ToolContext, use_tool_context
+from core.tracing import start_span
+from .chatbot import create_chatbot_node
+from .context_window import STRATEGY_DROP, ContextWindow
+from .llm import create_chat_model
+from .model_router import ModelRouter, latency_budget_config
+from .prompt_cache import bind_tools, get_prompt_caching_enabled
+from .semantic_cache import SemanticCache
+from .streaming import GraphEventStream, stream_requested, text_events
+from .tool_node import create_tool_node
+
+logger = get_logger("senpai.host")
+
+RESPONSE_TEXT = "text"
+RESPONSE_JSON = "json"
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """Manifest entry describing one agent."""
+
+    name: str
+    prompt: Union[str, Callable[[str], str]]
+    model_id: str = "us.amazon.nova-micro-v1:0"
+    temperature: float = 0.1
+    max_tokens: Optional[int] = None
+    # Further model parameters (e.g. top_p), merged over temperature and max_tokens
+    model_kwargs: Dict[str, Any] = field(default_factory=dict)
+    # None: use the host-wide setting
+    prompt_caching: Optional[bool] = None
+    context_max_tokens: Optional[int] = None
+    context_strategy: Optional[str] = None
+    tools: Optional[str] = None
+    memory_id: Optional[str] = None
+    # Save every message of the run (tool calls and results) like the standalone main agent,
+    # instead of only the final answer
+    save_run_messages: bool = False
+    semantic_cache: bool = False
+    response_format: str = RESPONSE_TEXT
+    session_per_user: bool = False
+    error_message: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: dict, base_dir: str = ".") -> "AgentSpec":
+        """
+        Create an AgentSpec from a manifest entry.
+
+        Args:
+            data: Manifest entry
+            base_dir: Directory that relative prompt and tool manifest paths refer to
+
+        Raises:
+            ValueError: If a required key is missing or response_format is unknown
+        """
+        missing = [key for key in ("name", "prompt") if not data.get(key)]
+        if missing:
+            raise ValueError(f"Agent manifest entry is missing {', '.join(missing)}: {data}")
+        response_format = data.get("response_format", RESPONSE_TEXT)
+        if response_format not in (RESPONSE_TEXT, RESPONSE_JSON):
+            raise ValueError(f"Unknown response_format '{response_format}' for agent '{data['name']}'")
+
+        def resolve(path: Optional[str]) -> Optional[str]:
+            return os.path.normpath(os.path.join(base_dir, path)) if path else None
+
+        return cls(
+            name=data["name"],
+            prompt=resolve(data["prompt"]),
+            model_id=data.get("model_id", cls.model_id),
+            temperature=float(data.get("temperature", cls.temperature)),
+            max_tokens=data.get("max_tokens"),
+            model_kwargs=dict(data.get("model_kwargs") or {}),
+            prompt_caching=data.get("prompt_caching"),
+            context_max_tokens=data.get("context_max_tokens"),
+            context_strategy=data.get("context_strategy"),
+            tools=resolve(data.get("tools")),
+            memory_id=data.get("memory_id"),
+            save_run_messages=bool(data.get("save_run_messages", False)),
+            semantic_cache=bool(data.get("semantic_cache", False)),
+            response_format=response_format,
+            session_per_user=bool(data.get("session_per_user", False)),
+            error_message=data.get("error_message"),
+        )
+
+
+def load_agent_manifest(path: str) -> Dict[str, Any]:
+    """
+    Load agent specs from a JSON manifest file.
+
+    Args:
+        path: Path to the manifest file
+
+    Returns:
+        Dict with "agents" (list of AgentSpec in manifest order) and "default_agent"
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    specs = [AgentSpec.from_dict(entry, base_dir) for entry in data.get("agents", [])]
+    return {"agents": specs, "default_agent": data.get("default_agent")}
+
+
+def load_prompt(path: str, locale: str) -> str:
+    """
+    Load the system prompt from an agent's prompt.py (which defines get_prompt(locale)).
+
+    Args:
+        path: Path to the prompt module
+        locale: Locale passed to get_prompt (e.g. "ja_JP", "en_EN")
+
+    Returns:
+        System prompt text
+    """
+    # Every agent directory has a module called "prompt", so load each one under its own name
+    module_name = "senpai_prompt_" + os.path.basename(os.path.dirname(path)).replace("-", "_")
+    module_spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(module)
+    return module.get_prompt(locale=locale)
+
+
+def extract_json_response(text: str) -> str:
+    """
+    Return the JSON object embedded in a model response, or an error JSON wrapping the text.
+
+    Args:
+        text: Model response
+
+    Returns:
+        JSON string
+    """
+    try:
+        start = text.find('{')
+        end = text.rfind('}') + 1
+        json_str = text[start:end]
+        json.loads(json_str)
+        return json_str
+    except ValueError:
+        return json.dumps({"error": "無効なJSON形式です", "message": text}, ensure_ascii=False)
+
+
+@dataclass
+class HostedAgent:
+    """An agent compiled by the host."""
+
+    spec: AgentSpec
+    graph: Any
+    memory_id: Optional[str]
+    prompt_caching: bool = False
+    context_window: Optional[ContextWindow] = None
+    tool_instances: List[Any] = field(default_factory=list)
+
+
+class AgentHost:
+    """Builds agents from specs once and routes payloads to them."""
+
+    def __init__(
+        self,
+        specs: List[AgentSpec],
+        default_agent: Optional[str] = None,
+        locale: Optional[str] = None,
+        region_name: Optional[str] = None,
+        memory_writer: Any = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        prompt_caching: Optional[bool] = None,
+        context_window: Optional[ContextWindow] = None,
+    ):
+        """
+        Args:
+            specs: Agents to host (names must be unique)
+            default_agent: Agent for payloads without "agent" (default: the first spec)
+            locale: Prompt locale (default: LOCALE or en_EN)
+            region_name: AWS region (default: AWS_REGION or us-west-2)
+            memory_writer: Shared MemoryEventWriter (default: created from the shared MemoryClient)
+            semantic_cache: Shared semantic cache (default: SemanticCache.from_env() if an agent uses it)
+            prompt_caching: Bedrock prompt caching of agents that do not set it (default: PROMPT_CACHING)
+            context_window: Conversation window of agents that do not set context_max_tokens
+                (default: ContextWindow.from_env())
+        """
+        if not specs:
+            raise ValueError("AgentHost needs at least one agent spec")
+        names = [spec.name for spec in specs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate agent names: {names}")
+
+        self.locale = locale or os.getenv("LOCALE", "en_EN")
+        self.region_name = region_name or os.getenv("AWS_REGION", "us-west-2")
+        self.default_agent = default_agent or specs[0].name
+        if self.default_agent not in names:
+            raise ValueError(f"Unknown default agent '{self.default_agent}'")
+        self.prompt_caching = get_prompt_caching_enabled() if prompt_caching is None else prompt_caching
+        self.context_window = context_window if context_window is not None else ContextWindow.from_env()
+        self.memory_writer = memory_writer or create_memory_event_writer(get_memory_client(self.region_name))
+
+        self.semantic_cache = semantic_cache
+        if self.semantic_cache is None and any(spec.semantic_cache for spec in specs):
+            self.semantic_cache = SemanticCache.from_env()
+            if self.semantic_cache is not None:
+                register_stats("semantic_cache", self.semantic_cache.stats)
+
+        self._models: Dict[tuple, Any] = {}
+        self.agents: Dict[str, HostedAgent] = {spec.name: self._build(spec) for spec in specs}
+
+    @classmethod
+    def from_manifest(cls, path: str, **kwargs: Any) -> "AgentHost":
+        """
+        Create a host from an agent manifest file.
+
+        Args:
+            path: Path to the manifest
+            **kwargs: Other AgentHost arguments
+
+        Returns:
+            AgentHost with every agent compiled
+        """
+        manifest = load_agent_manifest(path)
+        kwargs.setdefault("default_agent", os.getenv("AGENT_HOST_DEFAULT_AGENT") or manifest["default_agent"])
+        return cls(manifest["agents"], **kwargs)
+
+    def route(self, payload: Dict[str, Any]) -> HostedAgent:
+        """
+        Return the agent a payload is addressed to.
+
+        Args:
+            payload: Invocation payload ("agent" selects the agent)
+
+        Raises:
+            KeyError: If the agent is not hosted
+        """
+        name = payload.get("agent") or self.default_agent
+        agent = self.agents.get(name)
+        if agent is None:
+            raise KeyError(name)
+        return agent
+
+    async def invoke(self, payload: Dict[str, Any]) -> Any:
+        """
+        Entrypoint for BedrockAgentCoreApp: run the payload on the agent it is addressed to.
+        Returns the answer, or an async generator of events when "stream" is true (text agents).
+
+        Args:
+            payload: {"agent", "prompt", "user_id", "session_id", "stream", "latency_budget_ms"}
+
+        Returns:
+            Answer string (JSON string for json agents) or event stream
+        """
+        try:
+            agent = self.route(payload)
+        except KeyError as e:
+            return {"error": f"Unknown agent: {e.args[0]}", "agents": list(self.agents)}
+
+        spec = agent.spec
+        user_input = payload.get("prompt")
+        user_id = payload.get("user_id", "default_user")
+        session_id = "session_id_" + user_id if spec.session_per_user else payload.get("session_id", "default_session")
+        stream = stream_requested(payload) and spec.response_format == RESPONSE_TEXT
+        tool_context = ToolContext(memory_id=agent.memory_id, actor_id=user_id, user_id=user_id, session_id=session_id)
+        config = latency_budget_config(payload.get("latency_budget_ms"))
+
+        with use_agent_name(spec.name):
+            cached = cache_vector = None
+            if spec.semantic_cache and self.semantic_cache is not None:
+                # On a miss the query vector is reused by the store, so a request embeds once
+                cache_lookup = await self.semantic_cache.asearch(spec.name, user_input)
+                cached, cache_vector = cache_lookup.hit, cache_lookup.vector
+            if cached is not None:
+                if stream:
+                    return self._stream_cached(agent, user_id, session_id, user_input, cached.answer)
+                self._save(agent, user_id, session_id, user_input, [AIMessage(content=cached.answer)])
+                return cached.answer
+
+            messages = [HumanMessage(content=user_input)]
+            if stream:
+                return self._stream(agent, user_id, session_id, user_input, messages, tool_context, config, cache_vector)
+
+            try:
+                with use_tool_context(tool_context), \
+                        start_span("agent.invoke", **{"senpai.stream": False, "senpai.agent": spec.name}), \
+                        track_stage(REQUEST_LATENCY, mode="invoke"):
+                    response = await agent.graph.ainvoke({"messages": messages}, config)
+            except Exception as e:
+                if spec.error_message is None:
+                    raise
+                logger.error("Agent invocation failed", exc_info=True, extra={
+                    "agent": spec.name, "user_id": user_id, "session_id": session_id, "error": str(e),
+                })
+                return spec.error_message
+            record_graph_iterations(response["messages"])
+
+        answer = response["messages"][-1].content
+        if spec.response_format == RESPONSE_JSON:
+            answer = extract_json_response(answer)
+        saved = response["messages"][1:] if spec.save_run_messages else [AIMessage(content=answer)]
+        self._save(agent, user_id, session_id, user_input, saved)
+        if spec.semantic_cache and self.semantic_cache is not None:
+            self.semantic_cache.store_in_background(spec.name, user_input, answer, response["messages"][1:], cache_vector)
+        return answer
+
+    async def _stream(self, agent, user_id, session_id, user_input, messages, tool_context, config,
+                      cache_vector=None) -> AsyncIterator[Dict[str, Any]]:
+        spec = agent.spec
+        event_stream = GraphEventStream(agent.graph, {"messages": messages}, config)
+        try:
+            with use_agent_name(spec.name), use_tool_context(tool_context), \
+                    start_span("agent.invoke", **{"senpai.stream": True, "senpai.agent": spec.name}), \
+                    track_stage(REQUEST_LATENCY, mode="stream"):
+                async for event in event_stream:
+                    yield event
+                record_graph_iterations(event_stream.messages)
+        except Exception as e:
+            if spec.error_message is None:
+                raise
+            logger.error("Agent streaming failed", exc_info=True, extra={
+                "agent": spec.name, "user_id": user_id, "session_id": session_id, "error": str(e),
+            })
+            yield {"type": "error", "content": spec.error_message}
+            return
+        saved = event_stream.messages if spec.save_run_messages else [AIMessage(content=event_stream.final_text)]
+        self._save(agent, user_id, session_id, user_input, saved)
+        if spec.semantic_cache and self.semantic_cache is not None:
+            self.semantic_cache.store_in_background(
+                spec.name, user_input, event_stream.final_text, event_stream.messages, cache_vector,
+            )
+
+    async def _stream_cached(self, agent, user_id, session_id, user_input, answer) -> AsyncIterator[Dict[str, Any]]:
+        for event in text_events(answer):
+            yield event
+        self._save(agent, user_id, session_id, user_input, [AIMessage(content=answer)])
+
+    def _save(self, agent: HostedAgent, user_id: str, session_id: str, user_input: str, response_messages: List[Any]) -> None:
+        # Every response message is saved as ASSISTANT, like the standalone agents do
+        if not agent.memory_id:
+            return
+        try:
+            messages = [(user_input, "USER")]
+            for message in response_messages:
+                content = message.content if isinstance(message.content, str) else str(message.content)
+                messages.append((content, "ASSISTANT"))
+            self.memory_writer.submit(
+                memory_id=agent.memory_id,
+                actor_id=user_id,
+                session_id=session_id,
+                messages=messages,
+            )
+        except Exception as e:
+            logger.error("Memory save error", exc_info=True, extra={
+                "agent": agent.spec.name, "user_id": user_id, "session_id": session_id, "error": str(e),
+            })
+
+    def _prompt_caching(self, spec: AgentSpec) -> bool:
+        value = os.getenv(f"{spec.name.upper()}_PROMPT_CACHING")
+        if value is not None:
+            return value.lower() == "true"
+        return self.prompt_caching if spec.prompt_caching is None else bool(spec.prompt_caching)
+
+    def _context_window(self, spec: AgentSpec) -> Optional[ContextWindow]:
+        max_tokens = os.getenv(f"{spec.name.upper()}_CONTEXT_MAX_TOKENS", spec.context_max_tokens)
+        if max_tokens is None and spec.context_strategy is None:
+            return self.context_window
+        if max_tokens is None:
+            max_tokens = self.context_window.max_tokens if self.context_window is not None else 0
+        if int(max_tokens) <= 0:
+            return None
+        default_strategy = self.context_window.strategy if self.context_window is not None else STRATEGY_DROP
+        return ContextWindow(max_tokens=int(max_tokens), strategy=(spec.context_strategy or default_strategy).lower())
+
+    def _model(self, spec: AgentSpec, prompt_caching: bool, model_id: Optional[str] = None) -> Any:
+        # Agents with the same model settings share one chat model instance
+        model_id = model_id or spec.model_id
+        model_kwargs: Dict[str, Any] = {"temperature": spec.temperature}
+        if spec.max_tokens:
+            model_kwargs["max_tokens"] = spec.max_tokens
+        model_kwargs.update(spec.model_kwargs)
+        key = (model_id, prompt_caching, json.dumps(model_kwargs, sort_keys=True))
+        if key not in self._models:
+            self._models[key] = create_chat_model(
+                model_id=model_id,
+                model_kwargs=model_kwargs,
+                region_name=self.region_name,
+                prompt_caching=prompt_caching,
+            )
+        return self._models[key]
+
+    def _build(self, spec: AgentSpec) -> HostedAgent:
+        from core.tools.tool_factory import ToolFactory
+
+        prompt_caching = self._prompt_caching(spec)
+        context_window = self._context_window(spec)
+        llm = self._model(spec, prompt_caching)
+        system_message = spec.prompt(self.locale) if callable(spec.prompt) else load_prompt(spec.prompt, self.locale)
+        tool_instances = ToolFactory.create_tools_from_manifest(spec.tools) if spec.tools else []
+
+        tools = [t.as_langchain_tool() for t in tool_instances]
+
+        def build_model(model_id: str) -> Any:
+            model = self._model(spec, prompt_caching, model_id)
+            return bind_tools(model, tools, prompt_caching=prompt_caching) if tools else model
+
+        if tools:
+            llm = bind_tools(llm, tools, prompt_caching=prompt_caching)
+        model_router = ModelRouter.from_env(build_model, has_tools=bool(tools))
+        if model_router is not None:
+            register_stats(f"model_router.{spec.name}", model_router.stats)
+        chatbot = create_chatbot_node(
+            llm, system_message, model_id=spec.model_id, prompt_caching=prompt_caching,
+            context_window=context_window, model_router=model_router,
+        )
+
+        graph_builder = StateGraph(MessagesState)
+        graph_builder.add_node("chatbot", chatbot)
+        if tools:
+            graph_builder.add_node("tools", create_tool_node(tools, tool_limits={t.name: t.max_concurrency for t in tool_instances}))
+            graph_builder.add_conditional_edges("chatbot", tools_condition)
+            graph_builder.add_edge("tools", "chatbot")
+        graph_builder.set_entry_point("chatbot")
+
+        # Same store as the standalone agent of the deployment (AWS_MEMORY_ID) unless overridden per agent
+        memory_id = os.getenv(f"{spec.name.upper()}_MEMORY_ID") or os.getenv("AWS_MEMORY_ID") or spec.memory_id
+        if not memory_id:
+            logger.warning("Agent has no memory ID; conversations are not saved", extra={"agent": spec.name})
+        return HostedAgent(
+            spec=spec, graph=graph_builder.compile(), memory_id=memory_id,
+            prompt_caching=prompt_caching, context_window=context_window, tool_instances=tool_instances,
+        )
@@ -0,0 +1,64 @@
+"""
+Chat model construction for SenpAI agents.
+"""
+
+import os
+from typing import Any, Callable, Dict, Optional
+
+from core.aws import get_client
+from .prompt_cache import supports_prompt_caching
+
+# Replaces ChatBedrock (e.g. local stand-ins for tests), see set_chat_model_factory()
+_chat_model_factory: Optional[Callable[..., Any]] = None
+
+
+def set_chat_model_factory(factory: Optional[Callable[..., Any]]) -> None:
+    """
+    Replace how create_chat_model() builds models, e.g. with a local stand-in for
+    tests and load tests (see test/senpai_stubs).
+
+    Args:
+        factory: Called with create_chat_model()'s arguments (None: ChatBedrock)
+    """
+    global _chat_model_factory
+    _chat_model_factory = factory
+
+
+def create_chat_model(
+    model_id: str,
+    model_kwargs: Optional[Dict[str, Any]] = None,
+    region_name: Optional[str] = None,
+    prompt_caching: bool = False,
+) -> Any:
+    """
+    Create a ChatBedrock model that uses the shared, pooled bedrock-runtime client.
+    A factory installed with set_chat_model_factory() is used instead when set.
+
+    Args:
+        model_id: Bedrock model ID
+        model_kwargs: Model parameters such as temperature and max_tokens
+        region_name: AWS region (default: AWS_REGION or us-west-2)
+        prompt_caching: Use the Converse API when the model supports prompt caching,
+            so that cache checkpoints in the system prompt and tools are sent to Bedrock
+
+    Returns:
+        ChatBedrock (or the installed factory's model) instance
+    """
+    if _chat_model_factory is not None:
+        return _chat_model_factory(
+            model_id=model_id, model_kwargs=model_kwargs, region_name=region_name, prompt_caching=prompt_caching,
+        )
+
+    from langchain_aws import ChatBedrock
+
+    region = region_name or os.getenv("AWS_REGION", "us-west-2")
+    options: Dict[str, Any] = {}
+    if prompt_caching and supports_prompt_caching(model_id):
+        options["beta_use_converse_api"] = True
+    return ChatBedrock(
+        model_id=model_id,
+        model_kwargs=model_kwargs or {},
+        region_name=region,
+        client=get_client("bedrock-runtime", region),
+        **options,
+    )
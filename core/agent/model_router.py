@@ -0,0 +1,357 @@
+"""
+Per-request model tiering for the chatbot node.
+
+Instead of one hardcoded model, an agent can configure tiers from cheapest/fastest
+to strongest. Before every LLM call the router scores the latest user message with
+cheap local features (length, intent keywords, several questions, whether a tool
+call is likely) and picks the tier that matches its complexity. A per-request
+latency budget (payload["latency_budget_ms"], passed to the graph as
+config["configurable"]["latency_budget_ms"], see latency_budget_config()) caps the
+choice: tiers whose observed latency would not fit into what is left of the budget
+are skipped. The budget runs from latency_budget_config() to the call, so time spent
+on earlier LLM calls and tool round trips of the same request counts against it.
+
+Observed latencies are fed back after every call as an exponentially weighted
+average. A tier that turned slow stops being chosen under a budget and so gets no
+new observations; its average therefore decays back towards the tier's
+expected_latency while it is idle (halving the difference every recovery_seconds),
+so the tier is tried again once it may have recovered.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+
+from core.logger import get_logger
+from core.metrics import MODEL_ROUTES, get_agent_name
+from .context_window import estimate_text_tokens
+from .streaming import message_text
+
+# name=model_id pairs, cheapest first (MODEL_TIERS overrides)
+DEFAULT_TIERS = (
+    ("fast", "us.amazon.nova-micro-v1:0"),
+    ("standard", "us.amazon.nova-lite-v1:0"),
+    ("strong", "us.amazon.nova-pro-v1:0"),
+)
+
+# Greetings, thanks and small talk are answered well by the cheapest tier
+CHITCHAT_PATTERNS = (
+    r"^\s*(hi|hello|hey|thanks?( you)?|good (morning|afternoon|evening)|ok(ay)?|lol|bye)\b",
+    r"(こんにちは|こんばんは|おはよう|ありがとう|よろしく|お疲れ|おつかれ|またね|了解)",
+)
+# Questions that ask for reasoning, explanation or planning
+COMPLEX_PATTERNS = (
+    r"\b(why|how (do|can|should|would)|explain|compare|difference|pros and cons|trade-?offs?|plan|strategy|step by step|career)\b",
+    r"(なぜ|どうすれば|どのように|理由|比較|違い|説明|計画|戦略|キャリア|悩|相談|アドバイス|改善)",
+)
+# Requests that will most likely need a tool call (history, quiz, calculation)
+TOOL_PATTERNS = (
+    r"\b(last time|previous(ly)?|history|earlier|quiz|calculate|compute|joke)\b",
+    r"(前回|履歴|さっき|先ほど|クイズ|問題集|計算|冗談|ジョーク)",
+)
+
+LATENCY_BUDGET_KEY = "latency_budget_ms"
+LATENCY_DEADLINE_KEY = "latency_deadline"
+
+logger = get_logger("senpai.model_router")
+
+
+def latency_budget_config(budget_ms: Optional[float]) -> Optional[Dict[str, Any]]:
+    """
+    Build the graph config that carries a request's latency budget to the chatbot node.
+    A config (unlike a contextvar) also reaches sync generators resumed on other threads.
+    The budget starts now: create the config when the request arrives.
+
+    Invalid budgets (not a positive number, e.g. a malformed payload value) are
+    ignored with a warning, so the request runs without a budget instead of failing.
+
+    Args:
+        budget_ms: Budget in milliseconds for the whole request (None: no budget)
+
+    Returns:
+        RunnableConfig for graph.invoke()/stream(), or None without a budget
+    """
+    if not budget_ms:
+        return None
+    try:
+        value = float(budget_ms)
+    except (TypeError, ValueError):
+        value = math.nan
+    if not math.isfinite(value) or value <= 0:
+        logger.warning("Ignoring invalid latency budget", extra={"latency_budget_ms": repr(budget_ms)})
+        return None
+    return {"configurable": {
+        LATENCY_BUDGET_KEY: value,
+        LATENCY_DEADLINE_KEY: time.monotonic() + value / 1000.0,
+    }}
+
+
+def get_latency_budget(config: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Return the remaining latency budget in seconds from a graph config (never negative), or None."""
+    configurable = (config or {}).get("configurable") or {}
+    deadline = configurable.get(LATENCY_DEADLINE_KEY)
+    if deadline is not None:
+        return max(0.0, deadline - time.monotonic())
+    budget_ms = configurable.get(LATENCY_BUDGET_KEY)
+    return float(budget_ms) / 1000.0 if budget_ms else None
+
+
+@dataclass
+class ModelTier:
+    """One model the router can choose."""
+
+    name: str
+    model_id: str
+    # Initial per-call latency estimate in seconds, replaced by observations
+    expected_latency: float = 1.0
+
+
+@dataclass
+class RouteFeatures:
+    """Local features of the latest user message."""
+
+    tokens: int
+    questions: int
+    chitchat: bool
+    complex_terms: int
+    tool_likely: bool
+
+
+@dataclass
+class RouteDecision:
+    """The tier chosen for one LLM call."""
+
+    tier: ModelTier
+    llm: Any
+    level: int
+    reason: str
+
+
+def _last_human_text(messages: Sequence[BaseMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message_text(message.content)
+    return ""
+
+
+def parse_tiers(value: str) -> List[ModelTier]:
+    """
+    Parse MODEL_TIERS. Items that are not name=model_id pairs are skipped with a warning.
+
+    Args:
+        value: Comma-separated name=model_id pairs, cheapest first
+
+    Returns:
+        Tiers with expected latencies 1s, 2s, ... in order
+    """
+    pairs = []
+    for item in value.split(","):
+        name, _, model_id = item.strip().partition("=")
+        name, model_id = name.strip(), model_id.strip()
+        if not name or not model_id:
+            if item.strip():
+                logger.warning("Ignoring malformed MODEL_TIERS item (expected name=model_id)", extra={"item": item.strip()})
+            continue
+        pairs.append((name, model_id))
+    return [ModelTier(name=name, model_id=model_id, expected_latency=float(i + 1)) for i, (name, model_id) in enumerate(pairs)]
+
+
+class ModelRouter:
+    """Chooses a model tier per LLM call from request complexity and latency budget."""
+
+    def __init__(
+        self,
+        tiers: Sequence[ModelTier],
+        build_model: Callable[[str], Any],
+        has_tools: bool = False,
+        smoothing: float = 0.2,
+        recovery_seconds: float = 60.0,
+        chitchat_patterns: Sequence[str] = CHITCHAT_PATTERNS,
+        complex_patterns: Sequence[str] = COMPLEX_PATTERNS,
+        tool_patterns: Sequence[str] = TOOL_PATTERNS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            tiers: Model tiers, cheapest and fastest first
+            build_model: Creates the chat model (with tools bound) for a model ID
+            has_tools: The agent has tools; requests that likely need one skip the fastest tier
+            smoothing: Weight of a new observation in the latency average
+            recovery_seconds: Idle time that halves the distance between a tier's
+                average and its expected_latency (0 disables the decay)
+            chitchat_patterns: Regexes of small talk
+            complex_patterns: Regexes of questions that need reasoning
+            tool_patterns: Regexes of requests that likely need a tool
+            clock: Monotonic time source (for tests)
+        """
+        if not tiers:
+            raise ValueError("ModelRouter needs at least one tier")
+        self.tiers = list(tiers)
+        self.build_model = build_model
+        self.has_tools = has_tools
+        self.smoothing = smoothing
+        self.recovery_seconds = recovery_seconds
+        self.clock = clock
+        self.chitchat_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in chitchat_patterns]
+        self.complex_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in complex_patterns]
+        self.tool_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in tool_patterns]
+
+        self._models: Dict[str, Any] = {}
+        self._latency: Dict[str, float] = {tier.name: tier.expected_latency for tier in self.tiers}
+        self._observed_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, build_model: Callable[[str], Any], has_tools: bool = False) -> Optional["ModelRouter"]:
+        """
+        Create a router configured from environment variables.
+
+        Environment variables:
+            MODEL_ROUTING: "true" to enable (default: false)
+            MODEL_TIERS: Comma-separated name=model_id pairs, cheapest first
+                (default: fast=Nova Micro, standard=Nova Lite, strong=Nova Pro;
+                malformed items are skipped with a warning)
+            MODEL_LATENCY_RECOVERY_SECONDS: Decay of idle latency averages (default: 60)
+
+        Args:
+            build_model: Creates the chat model (with tools bound) for a model ID
+            has_tools: The agent has tools
+
+        Returns:
+            ModelRouter, or None if disabled
+        """
+        if os.getenv("MODEL_ROUTING", "false").lower() != "true":
+            return None
+        tiers = parse_tiers(os.getenv("MODEL_TIERS", ""))
+        if not tiers:
+            tiers = parse_tiers(",".join(f"{name}={model_id}" for name, model_id in DEFAULT_TIERS))
+        return cls(
+            tiers, build_model, has_tools=has_tools,
+            recovery_seconds=float(os.getenv("MODEL_LATENCY_RECOVERY_SECONDS", "60")),
+        )
+
+    def features(self, messages: Sequence[BaseMessage]) -> RouteFeatures:
+        """
+        Extract routing features from the latest user message.
+
+        Args:
+            messages: Conversation sent to the model
+
+        Returns:
+            RouteFeatures
+        """
+        text = _last_human_text(messages)
+        return RouteFeatures(
+            tokens=estimate_text_tokens(text),
+            questions=text.count("?") + text.count("？"),
+            chitchat=any(pattern.search(text) for pattern in self.chitchat_patterns),
+            complex_terms=sum(len(pattern.findall(text)) for pattern in self.complex_patterns),
+            tool_likely=self.has_tools and any(pattern.search(text) for pattern in self.tool_patterns),
+        )
+
+    def level(self, features: RouteFeatures) -> int:
+        """
+        Map features to the tier index the request needs (0 = fastest tier).
+
+        Args:
+            features: Features of the request
+
+        Returns:
+            Tier index
+        """
+        if features.chitchat and features.tokens <= 20 and not features.complex_terms and not features.tool_likely:
+            return 0
+        score = min(features.complex_terms, 2)
+        if features.tokens > 300:
+            score += 2
+        elif features.tokens > 80:
+            score += 1
+        if features.questions >= 2:
+            score += 1
+        level = 0 if score == 0 else 1 if score <= 2 else 2
+        if features.tool_likely:
+            # Tool calls need reliable argument generation
+            level = max(level, 1)
+        # Spread the three levels over however many tiers are configured (rounding up)
+        return -(-level * (len(self.tiers) - 1) // 2)
+
+    def estimated_latency(self, tier: ModelTier) -> float:
+        """Observed (smoothed) latency of one call to a tier in seconds, decayed while the tier is idle."""
+        with self._lock:
+            return self._estimate(tier.name, tier.expected_latency, self.clock())
+
+    def _estimate(self, name: str, expected_latency: float, now: float) -> float:
+        latency = self._latency[name]
+        observed_at = self._observed_at.get(name)
+        if observed_at is None or self.recovery_seconds <= 0:
+            return latency
+        decay = 0.5 ** (max(0.0, now - observed_at) / self.recovery_seconds)
+        return expected_latency + (latency - expected_latency) * decay
+
+    def route(self, messages: Sequence[BaseMessage], budget: Optional[float] = None) -> RouteDecision:
+        """
+        Choose the tier for the next LLM call.
+
+        Args:
+            messages: Conversation sent to the model
+            budget: What is left of the request's latency budget in seconds (None: no budget)
+
+        Returns:
+            RouteDecision with the tier's chat model
+        """
+        features = self.features(messages)
+        level = self.level(features)
+        index, reason = level, "complexity"
+        if budget is not None:
+            # A tool round trip means at least two LLM calls for the request;
+            # once the tool result is in, only the final answer is left
+            answering = bool(messages) and isinstance(messages[-1], ToolMessage)
+            calls = 2 if features.tool_likely and not answering else 1
+            fitting = [i for i in range(level + 1) if self.estimated_latency(self.tiers[i]) * calls <= budget]
+            if not fitting:
+                index = min(range(len(self.tiers)), key=lambda i: self.estimated_latency(self.tiers[i]))
+                reason = "latency_budget"
+            elif fitting[-1] != level:
+                index, reason = fitting[-1], "latency_budget"
+        tier = self.tiers[index]
+        MODEL_ROUTES.inc(agent=get_agent_name(), tier=tier.name, reason=reason)
+        return RouteDecision(tier=tier, llm=self.model(tier), level=level, reason=reason)
+
+    def observe(self, tier: ModelTier, seconds: float) -> None:
+        """
+        Feed back the latency of a completed call.
+
+        Args:
+            tier: Tier that served the call
+            seconds: Observed latency
+        """
+        with self._lock:
+            now = self.clock()
+            previous = self._estimate(tier.name, tier.expected_latency, now)
+            self._latency[tier.name] = previous + self.smoothing * (seconds - previous)
+            self._observed_at[tier.name] = now
+
+    def model(self, tier: ModelTier) -> Any:
+        """Return the chat model of a tier, creating it on first use."""
+        model = self._models.get(tier.name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(tier.name)
+                if model is None:
+                    model = self._models[tier.name] = self.build_model(tier.model_id)
+        return model
+
+    def stats(self) -> Dict[str, float]:
+        """Return the estimated latency of every tier in seconds."""
+        with self._lock:
+            now = self.clock()
+            return {
+                f"{tier.name}_latency_seconds": self._estimate(tier.name, tier.expected_latency, now)
+                for tier in self.tiers
+            }
@@ -0,0 +1,100 @@
+"""
+Bedrock prompt caching for static agent prefixes (system prompt and tool definitions).
+
+A cache checkpoint ({"cachePoint": {"type": "default"}}) marks the end of a prefix
+that Bedrock may cache between calls. Later calls that share the prefix, such as
+every iteration of the tool loop, read it from the cache instead of processing it
+again. Checkpoints are only added for models that support them, and only in the
+request fields each model supports.
+"""
+
+import os
+from typing import Any, Dict, Sequence, Tuple
+
+from langchain_core.messages import SystemMessage
+
+CACHE_POINT: Dict[str, Any] = {"cachePoint": {"type": "default"}}
+
+# Model ID prefix (without the cross-region prefix) -> fields that accept checkpoints
+_CACHEABLE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "amazon.nova-micro": ("system",),
+    "amazon.nova-lite": ("system",),
+    "amazon.nova-pro": ("system",),
+    "amazon.nova-premier": ("system",),
+    "anthropic.claude-3-5-haiku": ("system", "tools"),
+    "anthropic.claude-3-7-sonnet": ("system", "tools"),
+    "anthropic.claude-sonnet-4": ("system", "tools"),
+    "anthropic.claude-opus-4": ("system", "tools"),
+    "anthropic.claude-haiku-4": ("system", "tools"),
+}
+
+_REGION_PREFIXES = ("us.", "eu.", "apac.", "jp.", "au.", "global.")
+
+
+def get_prompt_caching_enabled(default: bool = True) -> bool:
+    """Return the PROMPT_CACHING setting ("true"/"false") of this agent."""
+    return os.getenv("PROMPT_CACHING", "true" if default else "false").lower() == "true"
+
+
+def cacheable_fields(model_id: str, enabled: bool = True) -> Tuple[str, ...]:
+    """
+    Return the request fields ("system", "tools") that can carry a cache checkpoint.
+
+    Args:
+        model_id: Bedrock model or inference profile ID
+        enabled: Whether prompt caching is enabled for the agent
+
+    Returns:
+        Tuple of field names (empty if caching is disabled or unsupported)
+    """
+    if not enabled or not model_id:
+        return ()
+    base_id = model_id.rsplit("/", 1)[-1]
+    for prefix in _REGION_PREFIXES:
+        if base_id.startswith(prefix):
+            base_id = base_id[len(prefix):]
+            break
+    for model_prefix, fields in _CACHEABLE_FIELDS.items():
+        if base_id.startswith(model_prefix):
+            return fields
+    return ()
+
+
+def supports_prompt_caching(model_id: str) -> bool:
+    """Return True if the model accepts cache checkpoints."""
+    return bool(cacheable_fields(model_id))
+
+
+def build_system_message(system_message: str, cache: bool = False) -> SystemMessage:
+    """
+    Create the system message, optionally followed by a cache checkpoint.
+
+    Args:
+        system_message: System prompt text
+        cache: Add a cache checkpoint after the prompt
+
+    Returns:
+        SystemMessage
+    """
+    if not cache:
+        return SystemMessage(content=system_message)
+    return SystemMessage(content=[{"type": "text", "text": system_message}, dict(CACHE_POINT)])
+
+
+def bind_tools(llm: Any, tools: Sequence[Any], prompt_caching: bool = False) -> Any:
+    """
+    Bind tools to a chat model, adding a cache checkpoint after the tool definitions
+    when the model supports caching them.
+
+    Args:
+        llm: Chat model
+        tools: LangChain tools
+        prompt_caching: Whether prompt caching is enabled for the agent
+
+    Returns:
+        Chat model with the tools bound
+    """
+    tools = list(tools)
+    if tools and "tools" in cacheable_fields(getattr(llm, "model_id", ""), prompt_caching):
+        tools.append(dict(CACHE_POINT))
+    return llm.bind_tools(tools)
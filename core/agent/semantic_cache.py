@@ -0,0 +1,452 @@
+"""
+Semantic response cache for repeated, non-personalized questions.
+
+New hires ask the same onboarding questions in slightly different words. The cache
+embeds each incoming prompt and looks up the nearest stored prompt of the same
+agent (namespace). If the cosine similarity reaches the threshold, the stored
+answer is returned without running the agent graph.
+
+Prompts that look personalized (they refer to the user's own history) bypass the
+cache. Answers whose run called a tool are never stored, because their result
+depends on the tool output rather than on the question alone. Entries expire after
+a TTL, and each namespace holds a bounded number of entries (least recently used
+entries are evicted first).
+
+Embedding functions are pluggable. BedrockEmbedder (the default) uses a Bedrock
+embedding model, whose similarity reflects meaning. HashingEmbedder is deterministic
+and offline (character n-gram hashing) but only measures spelling overlap: questions
+with different answers that differ in one word ("When does the office open?" vs
+"...close?") score close to the threshold while real paraphrases score far below it,
+so it is meant for tests and is not used by from_env() unless explicitly allowed.
+If the embedder fails, lookups miss and nothing is stored.
+numpy is used for the vector index when available.
+
+The cache is opt-in (SEMANTIC_CACHE_ENABLED=true): a hit serves another user's
+answer, and every cacheable request pays one embedding call before the graph runs.
+A miss costs no second embedding: search() returns the query vector, which callers
+pass to store_in_background() once the answer has been returned.
+
+    result = cache.search("advice", prompt)
+    if result.hit is not None:
+        return result.hit.answer
+    answer = run_agent(prompt)
+    cache.store_in_background("advice", prompt, answer, messages, vector=result.vector)
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional vectorized index
+    np = None
+
+from core.aws import get_client
+from core.logger import get_logger
+from core.tracing import start_span
+
+logger = get_logger("senpai.semantic_cache")
+
+# Embedding function: list of texts -> list of vectors
+Embedder = Callable[[Sequence[str]], Sequence[Sequence[float]]]
+
+# Prompts referring to the user's own history or state are not shared between users
+DEFAULT_BYPASS_PATTERNS = (
+    r"\b(my|mine|remember|last time|previous(ly)?|earlier|history)\b",
+    r"(私の|僕の|俺の|自分の|前回|さっき|先ほど|覚えて|履歴|昨日)",
+)
+
+
+class HashingEmbedder:
+    """
+    Deterministic offline embedder: character n-grams hashed into a fixed number of
+    dimensions and L2-normalized. Works for Japanese as well as English text and
+    captures lexical (not conceptual) similarity, so it is suitable for tests only.
+    """
+
+    def __init__(self, dim: int = 512, ngram_range: Sequence[int] = (2, 3)):
+        """
+        Args:
+            dim: Vector dimensions
+            ngram_range: Smallest and largest character n-gram length
+        """
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def __call__(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def _embed(self, text: str) -> List[float]:
+        normalized = " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+        vector = [0.0] * self.dim
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(max(1, len(normalized) - n + 1)):
+                gram = normalized[i:i + n]
+                digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "big")
+                vector[value % self.dim] += 1.0 if (value >> 32) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+
+class BedrockEmbedder:
+    """Embedder backed by a Bedrock embedding model (Titan Text Embeddings V2 by default)."""
+
+    def __init__(self, model_id: str = "amazon.titan-embed-text-v2:0", region_name: Optional[str] = None, dimensions: int = 512):
+        """
+        Args:
+            model_id: Bedrock embedding model ID
+            region_name: AWS region (default: AWS_REGION)
+            dimensions: Output vector dimensions
+        """
+        self.model_id = model_id
+        self.region_name = region_name
+        self.dimensions = dimensions
+
+    def __call__(self, texts: Sequence[str]) -> List[List[float]]:
+        client = get_client("bedrock-runtime", self.region_name)
+        vectors = []
+        for text in texts:
+            response = client.invoke_model(
+                modelId=self.model_id,
+                body=json.dumps({"inputText": text, "dimensions": self.dimensions, "normalize": True}),
+            )
+            vectors.append(json.loads(response["body"].read())["embedding"])
+        return vectors
+
+
+@dataclass
+class CacheHit:
+    """A cached answer and the similarity of its prompt to the query."""
+
+    answer: str
+    prompt: str
+    similarity: float
+
+
+@dataclass
+class CacheLookup:
+    """Outcome of search(): the hit (if any) and the query vector to store a miss with."""
+
+    hit: Optional[CacheHit] = None
+    vector: Optional[List[float]] = None
+
+
+class _Namespace:
+    """Vector index of one agent's cached prompts (rows are L2-normalized)."""
+
+    def __init__(self):
+        self.prompts: List[str] = []
+        self.answers: List[str] = []
+        self.created: List[float] = []
+        self.last_used: List[float] = []
+        self.vectors: Any = None  # numpy matrix (capacity x dim) or list of lists
+
+    def __len__(self) -> int:
+        return len(self.prompts)
+
+    def similarities(self, query: List[float]) -> List[float]:
+        count = len(self.prompts)
+        if count == 0:
+            return []
+        if np is not None:
+            return (self.vectors[:count] @ np.asarray(query, dtype=np.float32)).tolist()
+        return [sum(a * b for a, b in zip(row, query)) for row in self.vectors]
+
+    def add(self, prompt: str, answer: str, vector: List[float], now: float) -> None:
+        count = len(self.prompts)
+        if np is not None:
+            if self.vectors is None:
+                self.vectors = np.zeros((16, len(vector)), dtype=np.float32)
+            elif count == self.vectors.shape[0]:
+                grown = np.zeros((count * 2, self.vectors.shape[1]), dtype=np.float32)
+                grown[:count] = self.vectors
+                self.vectors = grown
+            self.vectors[count] = vector
+        else:
+            if self.vectors is None:
+                self.vectors = []
+            self.vectors.append(list(vector))
+        self.prompts.append(prompt)
+        self.answers.append(answer)
+        self.created.append(now)
+        self.last_used.append(now)
+
+    def remove(self, index: int) -> None:
+        # Swap with the last entry so the vector rows stay contiguous
+        last = len(self.prompts) - 1
+        for column in (self.prompts, self.answers, self.created, self.last_used):
+            column[index] = column[last]
+            column.pop()
+        self.vectors[index] = self.vectors[last]
+        if np is None:
+            self.vectors.pop()
+
+
+class SemanticCache:
+    """
+    Nearest-neighbor cache of agent answers keyed by prompt embeddings.
+
+    Thread-safe; the embedding call runs outside the lock.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        threshold: float = 0.9,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1000,
+        bypass_patterns: Sequence[str] = DEFAULT_BYPASS_PATTERNS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            embedder: Embedding function (default: BedrockEmbedder)
+            threshold: Minimum cosine similarity for a hit. A hit returns another user's
+                answer, so a threshold that is too low serves wrong answers to questions
+                that differ in one detail; tune it with the embedder actually used
+            ttl_seconds: Lifetime of an entry
+            max_entries: Maximum entries per namespace
+            bypass_patterns: Regexes for personalized prompts that must not be cached
+            clock: Time source (for tests)
+        """
+        self.embedder = embedder or BedrockEmbedder()
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.bypass_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in bypass_patterns]
+        self.clock = clock
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "skipped_tool_runs": 0, "evictions": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls, default_enabled: bool = False) -> Optional["SemanticCache"]:
+        """
+        Create a cache configured from environment variables.
+
+        Environment variables:
+            SEMANTIC_CACHE_ENABLED: "true" or "false" (default: default_enabled)
+            SEMANTIC_CACHE_EMBEDDER: "bedrock" (default) or "hashing" (lexical, offline)
+            SEMANTIC_CACHE_ALLOW_HASHING: "true" to run the cache with the hashing embedder
+                (tests and offline load tests only; otherwise the cache is disabled)
+            SEMANTIC_CACHE_THRESHOLD: Minimum cosine similarity (default: 0.9; lower values
+                raise the risk of serving a cached answer to a different question)
+            SEMANTIC_CACHE_TTL_SECONDS: Entry lifetime (default: 3600)
+            SEMANTIC_CACHE_MAX_ENTRIES: Entries per agent (default: 1000)
+
+        Args:
+            default_enabled: Used when SEMANTIC_CACHE_ENABLED is not set
+
+        Returns:
+            SemanticCache, or None if disabled
+        """
+        enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "true" if default_enabled else "false").lower() == "true"
+        if not enabled:
+            return None
+        if os.getenv("SEMANTIC_CACHE_EMBEDDER", "bedrock").lower() == "hashing":
+            if os.getenv("SEMANTIC_CACHE_ALLOW_HASHING", "false").lower() != "true":
+                logger.warning("Semantic cache disabled: the hashing embedder matches spelling, not meaning "
+                               "(set SEMANTIC_CACHE_EMBEDDER=bedrock, or SEMANTIC_CACHE_ALLOW_HASHING=true for tests)")
+                return None
+            embedder = HashingEmbedder()
+        else:
+            embedder = BedrockEmbedder()
+        return cls(
+            embedder=embedder,
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+            ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000")),
+        )
+
+    def is_cacheable(self, prompt: Optional[str]) -> bool:
+        """Return False for empty or personalized prompts."""
+        if not prompt or not prompt.strip():
+            return False
+        return not any(pattern.search(prompt) for pattern in self.bypass_patterns)
+
+    def search(self, namespace: str, prompt: Optional[str]) -> CacheLookup:
+        """
+        Find a cached answer for a prompt.
+
+        Args:
+            namespace: Cache namespace (agent name)
+            prompt: User prompt
+
+        Returns:
+            CacheLookup with the hit (None on a miss or bypass) and the query vector
+            (None on a bypass or embedding error)
+        """
+        if not self.is_cacheable(prompt):
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return CacheLookup()
+        with start_span("semantic_cache.lookup", **{"senpai.cache.namespace": namespace}) as span:
+            query = self._embed(prompt)
+            if query is None:
+                span.set_attribute("senpai.cache.hit", False)
+                return CacheLookup()
+            now = self.clock()
+            with self._lock:
+                index = self._namespaces.get(namespace)
+                self._expire(index, now)
+                best, best_similarity = -1, self.threshold
+                if index is not None:
+                    for i, similarity in enumerate(index.similarities(query)):
+                        if similarity >= best_similarity:
+                            best, best_similarity = i, similarity
+                if best < 0:
+                    self._stats["misses"] += 1
+                    hit = None
+                else:
+                    self._stats["hits"] += 1
+                    index.last_used[best] = now
+                    hit = CacheHit(answer=index.answers[best], prompt=index.prompts[best], similarity=best_similarity)
+            span.set_attribute("senpai.cache.hit", hit is not None)
+            if hit is not None:
+                span.set_attribute("senpai.cache.similarity", hit.similarity)
+        return CacheLookup(hit=hit, vector=query)
+
+    async def asearch(self, namespace: str, prompt: Optional[str]) -> CacheLookup:
+        """Async search(); the embedding call runs in a worker thread."""
+        return await asyncio.to_thread(self.search, namespace, prompt)
+
+    def lookup(self, namespace: str, prompt: Optional[str]) -> Optional[CacheHit]:
+        """Find a cached answer for a prompt (search() without the query vector)."""
+        return self.search(namespace, prompt).hit
+
+    async def alookup(self, namespace: str, prompt: Optional[str]) -> Optional[CacheHit]:
+        """Async lookup(); the embedding call runs in a worker thread."""
+        return (await self.asearch(namespace, prompt)).hit
+
+    def store(
+        self,
+        namespace: str,
+        prompt: Optional[str],
+        answer: str,
+        messages: Sequence[Any] = (),
+        vector: Optional[Sequence[float]] = None,
+    ) -> bool:
+        """
+        Store an answer unless the prompt is personalized or the run called a tool.
+
+        Args:
+            namespace: Cache namespace (agent name)
+            prompt: User prompt
+            answer: Final assistant answer
+            messages: Messages produced by the graph run (checked for tool calls)
+            vector: Query vector from search() (None: embed the prompt again)
+
+        Returns:
+            True if the answer was stored
+        """
+        if not answer or not self.is_cacheable(prompt):
+            return False
+        if any(getattr(message, "tool_calls", None) for message in messages):
+            with self._lock:
+                self._stats["skipped_tool_runs"] += 1
+            return False
+        vector = list(vector) if vector is not None else self._embed(prompt)
+        if vector is None:
+            return False
+        now = self.clock()
+        with self._lock:
+            index = self._namespaces.setdefault(namespace, _Namespace())
+            self._expire(index, now)
+            while len(index) >= self.max_entries:
+                oldest = min(range(len(index)), key=index.last_used.__getitem__)
+                index.remove(oldest)
+                self._stats["evictions"] += 1
+            index.add(prompt, answer, vector, now)
+            self._stats["stores"] += 1
+        return True
+
+    async def astore(
+        self,
+        namespace: str,
+        prompt: Optional[str],
+        answer: str,
+        messages: Sequence[Any] = (),
+        vector: Optional[Sequence[float]] = None,
+    ) -> bool:
+        """Async store(); the embedding call runs in a worker thread."""
+        return await asyncio.to_thread(self.store, namespace, prompt, answer, messages, vector)
+
+    def store_in_background(
+        self,
+        namespace: str,
+        prompt: Optional[str],
+        answer: str,
+        messages: Sequence[Any] = (),
+        vector: Optional[Sequence[float]] = None,
+    ) -> Optional[Future]:
+        """
+        Run store() on the cache's worker thread so it stays off the response path.
+
+        Args:
+            namespace: Cache namespace (agent name)
+            prompt: User prompt
+            answer: Final assistant answer
+            messages: Messages produced by the graph run (checked for tool calls)
+            vector: Query vector from search() (None: embed the prompt on the worker)
+
+        Returns:
+            Future of store()'s result, or None if the answer is not cacheable
+        """
+        if not answer or not self.is_cacheable(prompt):
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="senpai-semantic-cache")
+            executor = self._executor
+        future = executor.submit(self.store, namespace, prompt, answer, list(messages), vector)
+        future.add_done_callback(self._log_store_error)
+        return future
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Remove all entries (of one namespace, or of all namespaces)."""
+        with self._lock:
+            if namespace is None:
+                self._namespaces.clear()
+            else:
+                self._namespaces.pop(namespace, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the cache counters and the number of entries."""
+        with self._lock:
+            return {**self._stats, "entries": sum(len(index) for index in self._namespaces.values())}
+
+    @staticmethod
+    def _log_store_error(future: Future) -> None:
+        error = future.exception()
+        if error is not None:
+            logger.warning("Semantic cache store failed", extra={"error": str(error)})
+
+    def _embed(self, prompt: str) -> Optional[List[float]]:
+        """Embed a prompt; embedding errors are counted and treated as a miss."""
+        try:
+            return list(self.embedder([prompt])[0])
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            logger.warning("Semantic cache embedding failed", extra={"error": str(e)})
+            return None
+
+    def _expire(self, index: Optional[_Namespace], now: float) -> None:
+        if index is None:
+            return
+        for i in range(len(index) - 1, -1, -1):
+            if now - index.created[i] > self.ttl_seconds:
+                index.remove(i)
+                self._stats["evictions"] += 1
@@ -0,0 +1,153 @@
+"""
+Streaming helpers that turn LangGraph stream output into SSE-friendly events.
+
+BedrockAgentCoreApp sends every item yielded by a (async) generator entrypoint as a
+``data: <json>`` server-sent event, so the events produced here are plain dicts:
+
+    {"type": "token", "content": "..."}                       LLM output token(s)
+    {"type": "tool_call", "name": "...", "id": "..."}         the model requested a tool
+    {"type": "tool_result", "name": "...", "id": "...", "status": "..."}
+    {"type": "done", "content": "..."}                        final assistant message
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.messages import AIMessageChunk, ToolMessage
+
+STREAM_MODES = ["messages", "updates"]
+STREAM_TRUE_STRINGS = ("true", "1")
+
+
+def stream_requested(payload: Dict[str, Any]) -> bool:
+    """
+    Return whether a payload asks for a streamed response.
+
+    Only true, 1, "true" and "1" (any case) enable streaming; anything else,
+    including "false", "0" and other non-empty strings, means a plain answer.
+
+    Args:
+        payload: Invocation payload ("stream" is optional)
+
+    Returns:
+        True to stream
+    """
+    value = payload.get("stream", False)
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return value == 1
+    if isinstance(value, str):
+        return value.strip().lower() in STREAM_TRUE_STRINGS
+    return False
+
+
+def message_text(content: Any) -> str:
+    """
+    Extract plain text from message content.
+
+    Args:
+        content: Message content (a string or a list of content blocks)
+
+    Returns:
+        Concatenated text of the content
+    """
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for block in content:
+            if isinstance(block, str):
+                parts.append(block)
+            elif isinstance(block, dict) and block.get("type") == "text":
+                parts.append(block.get("text", ""))
+        return "".join(parts)
+    return str(content) if content is not None else ""
+
+
+def text_events(text: str) -> List[Dict[str, Any]]:
+    """
+    Events for an answer that did not come from a graph run (e.g. a cached answer).
+
+    Args:
+        text: Complete answer
+
+    Returns:
+        A token event followed by the done event
+    """
+    return [{"type": "token", "content": text}, {"type": "done", "content": text}]
+
+
+class GraphEventStream:
+    """
+    Iterate over a compiled LangGraph run as token and tool-progress events.
+
+    Supports both sync (``for event in stream``) and async (``async for event in stream``)
+    iteration. After iteration, ``messages`` holds every message produced by the graph
+    nodes (the same messages ``invoke()`` would append after the input) and
+    ``final_text`` holds the text of the last message.
+    """
+
+    def __init__(
+        self,
+        graph: Any,
+        inputs: Dict[str, Any],
+        config: Optional[Dict[str, Any]] = None,
+        llm_node: str = "chatbot",
+    ):
+        """
+        Args:
+            graph: Compiled LangGraph graph
+            inputs: Graph input (e.g. {"messages": [...]})
+            config: Optional RunnableConfig
+            llm_node: Name of the node whose LLM tokens should be streamed
+        """
+        self.graph = graph
+        self.inputs = inputs
+        self.config = config
+        self.llm_node = llm_node
+        self.messages: List[Any] = []
+
+    @property
+    def final_text(self) -> str:
+        """Text of the last message produced by the graph."""
+        return message_text(self.messages[-1].content) if self.messages else ""
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for mode, chunk in self.graph.stream(self.inputs, self.config, stream_mode=STREAM_MODES):
+            yield from self._handle(mode, chunk)
+        yield {"type": "done", "content": self.final_text}
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        async for mode, chunk in self.graph.astream(self.inputs, self.config, stream_mode=STREAM_MODES):
+            for event in self._handle(mode, chunk):
+                yield event
+        yield {"type": "done", "content": self.final_text}
+
+    def _handle(self, mode: str, chunk: Any) -> Iterator[Dict[str, Any]]:
+        if mode == "messages":
+            message, metadata = chunk
+            # Only chunks are streamed; complete messages arrive via "updates"
+            if not isinstance(message, AIMessageChunk):
+                return
+            if metadata.get("langgraph_node") != self.llm_node:
+                return
+            text = message_text(message.content)
+            if text:
+                yield {"type": "token", "content": text}
+            return
+
+        if mode == "updates":
+            for node, update in (chunk or {}).items():
+                if not isinstance(update, dict):
+                    continue
+                for message in update.get("messages", []):
+                    self.messages.append(message)
+                    for tool_call in getattr(message, "tool_calls", None) or []:
+                        yield {"type": "tool_call", "name": tool_call.get("name"), "id": tool_call.get("id")}
+                    if isinstance(message, ToolMessage):
+                        yield {
+                            "type": "tool_result",
+                            "name": message.name,
+                            "id": message.tool_call_id,
+                            "status": message.status,
+                        }
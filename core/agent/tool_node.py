@@ -0,0 +1,154 @@
+"""
+Graph node that executes the tool calls of one LLM turn concurrently.
+
+When the model requests several tools at once (e.g. history plus calculator, or
+several quizzes), the calls run in parallel, so the step takes about as long as the
+slowest call. Concurrency is bounded per node and per tool, and the resulting
+ToolMessages are always returned in the order of the tool calls.
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import get_config_list
+
+from core.tools.tool_context import submit_with_context
+from core.tracing import start_span
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class _ConcurrencyLimits:
+    """Node-wide and per-tool semaphores for threads and (per event loop) for asyncio tasks."""
+
+    def __init__(self, total: int, limits: Mapping[str, int]):
+        self.total = total
+        self.limits = {name: limit for name, limit in limits.items() if limit}
+        self._thread_semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in self.limits.items()}
+        self._thread_semaphores[""] = threading.BoundedSemaphore(total)
+        self._loop_semaphores: "weakref.WeakKeyDictionary[Any, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def thread_slot(self, name: str) -> Iterator[None]:
+        with self._thread_semaphores[""]:
+            semaphore = self._thread_semaphores.get(name) if name else None
+            if semaphore is None:
+                yield
+                return
+            with semaphore:
+                yield
+
+    @asynccontextmanager
+    async def task_slot(self, name: str):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._loop_semaphores.get(loop)
+            if semaphores is None:
+                semaphores = {tool: asyncio.Semaphore(limit) for tool, limit in self.limits.items()}
+                semaphores[""] = asyncio.Semaphore(self.total)
+                self._loop_semaphores[loop] = semaphores
+        async with semaphores[""]:
+            semaphore = semaphores.get(name) if name else None
+            if semaphore is None:
+                yield
+                return
+            async with semaphore:
+                yield
+
+
+def _error_message(call: Dict[str, Any], content: str) -> ToolMessage:
+    return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
+
+
+def _tool_calls(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    messages = state["messages"] if isinstance(state, dict) else state
+    last = messages[-1] if messages else None
+    if not isinstance(last, AIMessage):
+        raise ValueError("The tool node expects the last message to be an AIMessage with tool calls")
+    return [{**call, "type": "tool_call"} for call in last.tool_calls]
+
+
+def create_tool_node(
+    tools: Sequence[Any],
+    max_concurrency: Optional[int] = None,
+    tool_limits: Optional[Mapping[str, Optional[int]]] = None,
+    name: str = "tools",
+) -> RunnableLambda:
+    """
+    Create a drop-in replacement for langgraph's ToolNode that runs the tool calls of
+    one AIMessage concurrently.
+
+    graph.invoke() runs the calls on a bounded thread pool (the request's contextvars,
+    e.g. the ToolContext, are copied into the workers); graph.ainvoke() runs them as
+    asyncio tasks. A failing tool produces an error ToolMessage like ToolNode does.
+
+    Args:
+        tools: LangChain tools (e.g. Tool.as_langchain_tool())
+        max_concurrency: Maximum concurrent tool calls of this node across requests
+            (default: TOOL_MAX_CONCURRENCY or 8)
+        tool_limits: Maximum concurrent calls per tool name (None: unlimited)
+        name: Node name
+
+    Returns:
+        Runnable usable with StateGraph.add_node("tools", ...)
+    """
+    tools_by_name = {tool.name: tool for tool in tools}
+    max_concurrency = max_concurrency or int(os.getenv("TOOL_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY)))
+    limits = _ConcurrencyLimits(max_concurrency, tool_limits or {})
+    executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="senpai-tool")
+
+    def invoke_call(call: Dict[str, Any], config: Optional[RunnableConfig]) -> ToolMessage:
+        tool = tools_by_name.get(call["name"])
+        if tool is None:
+            return _error_message(call, f"Error: {call['name']} is not a valid tool, try one of [{', '.join(tools_by_name)}].")
+        try:
+            with limits.thread_slot(call["name"]):
+                return _as_tool_message(tool.invoke(call, config), call)
+        except Exception as e:
+            return _error_message(call, f"Error: {e!r}\n Please fix your mistakes.")
+
+    async def ainvoke_call(call: Dict[str, Any], config: Optional[RunnableConfig]) -> ToolMessage:
+        tool = tools_by_name.get(call["name"])
+        if tool is None:
+            return _error_message(call, f"Error: {call['name']} is not a valid tool, try one of [{', '.join(tools_by_name)}].")
+        try:
+            async with limits.task_slot(call["name"]):
+                return _as_tool_message(await tool.ainvoke(call, config), call)
+        except Exception as e:
+            return _error_message(call, f"Error: {e!r}\n Please fix your mistakes.")
+
+    def run_tools(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        calls = _tool_calls(state)
+        with start_span("tools.execute", **{"senpai.tool_calls": len(calls)}):
+            configs = get_config_list(config, len(calls))
+            if len(calls) == 1:
+                results = [invoke_call(calls[0], configs[0])]
+            else:
+                futures = [submit_with_context(executor, invoke_call, call, call_config)
+                           for call, call_config in zip(calls, configs)]
+                results = [future.result() for future in futures]
+        return {"messages": results}
+
+    async def arun_tools(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        calls = _tool_calls(state)
+        with start_span("tools.execute", **{"senpai.tool_calls": len(calls)}):
+            configs = get_config_list(config, len(calls))
+            results = await asyncio.gather(*(ainvoke_call(call, call_config) for call, call_config in zip(calls, configs)))
+        return {"messages": list(results)}
+
+    return RunnableLambda(run_tools, afunc=arun_tools, name=name)
+
+
+def _as_tool_message(result: Any, call: Dict[str, Any]) -> ToolMessage:
+    # Tools invoked with a ToolCall return a ToolMessage; wrap anything else
+    if isinstance(result, ToolMessage):
+        return result
+    return ToolMessage(content=str(result), name=call["name"], tool_call_id=call["id"])
@@ -0,0 +1,13 @@
+"""
+Shared AWS client registry for SenpAI Agent application.
+"""
+
+from .client_registry import ClientRegistry, get_client, get_client_registry, get_memory_client, set_client_factories
+
+__all__ = [
+    'ClientRegistry',
+    'get_client',
+    'get_client_registry',
+    'get_memory_client',
+    'set_client_factories',
+]
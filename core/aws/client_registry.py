@@ -0,0 +1,227 @@
+"""
+Process-wide registry of pooled AWS clients.
+
+Creating a boto3 client costs tens of milliseconds and every new client opens its
+own connection pool. The registry lazily creates one thread-safe client per
+(service, region) with shared connection-pool, keep-alive and retry settings and
+hands the same instance to every agent and tool.
+
+Tests and load tests can replace how clients are created with set_client_factories()
+(see test/senpai_stubs), so agents run without AWS.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_REGION = "us-west-2"
+
+
+def _default_region() -> str:
+    return os.getenv("AWS_REGION", DEFAULT_REGION)
+
+
+class ClientRegistry:
+    """
+    Lazily creates and caches boto3 clients and AgentCore MemoryClients.
+    boto3 clients are thread-safe once created; creation itself is serialized.
+    """
+
+    def __init__(
+        self,
+        max_pool_connections: int = 50,
+        tcp_keepalive: bool = True,
+        max_attempts: int = 3,
+        retry_mode: str = "standard",
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        client_factory: Optional[Callable[[str, str], Any]] = None,
+        memory_client_factory: Optional[Callable[[str], Any]] = None,
+    ):
+        """
+        Args:
+            max_pool_connections: Maximum HTTP connections kept per client
+            tcp_keepalive: Enable TCP keep-alive on pooled connections
+            max_attempts: Total attempts per request including retries
+            retry_mode: botocore retry mode ("standard", "adaptive" or "legacy")
+            connect_timeout: Connection timeout in seconds
+            read_timeout: Read timeout in seconds
+            client_factory: Creates a client from (service, region) instead of boto3
+            memory_client_factory: Creates a memory client from a region instead of MemoryClient
+        """
+        self.max_pool_connections = max_pool_connections
+        self.tcp_keepalive = tcp_keepalive
+        self.max_attempts = max_attempts
+        self.retry_mode = retry_mode
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.client_factory = client_factory
+        self.memory_client_factory = memory_client_factory
+
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._memory_clients: Dict[str, Any] = {}
+        self._session = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ClientRegistry":
+        """
+        Create a registry configured from environment variables.
+
+        Environment variables:
+            AWS_MAX_POOL_CONNECTIONS: Connections per client (default: 50)
+            AWS_TCP_KEEPALIVE: "true" to enable TCP keep-alive (default: "true")
+            AWS_MAX_ATTEMPTS: Total attempts per request (default: 3)
+            AWS_RETRY_MODE: botocore retry mode (default: "standard")
+            AWS_CONNECT_TIMEOUT: Connect timeout in seconds (default: 5)
+            AWS_READ_TIMEOUT: Read timeout in seconds (default: 60)
+        """
+        return cls(
+            max_pool_connections=int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50")),
+            tcp_keepalive=os.getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true",
+            max_attempts=int(os.getenv("AWS_MAX_ATTEMPTS", "3")),
+            retry_mode=os.getenv("AWS_RETRY_MODE", "standard"),
+            connect_timeout=float(os.getenv("AWS_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("AWS_READ_TIMEOUT", "60")),
+        )
+
+    def client_config(self) -> Any:
+        """Return the botocore Config shared by all clients."""
+        from botocore.config import Config
+
+        return Config(
+            max_pool_connections=self.max_pool_connections,
+            tcp_keepalive=self.tcp_keepalive,
+            retries={"max_attempts": self.max_attempts, "mode": self.retry_mode},
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+        )
+
+    def get_client(self, service_name: str, region_name: Optional[str] = None) -> Any:
+        """
+        Return the shared boto3 client for a service and region.
+
+        Args:
+            service_name: boto3 service name (e.g. "bedrock-runtime")
+            region_name: AWS region (default: AWS_REGION or us-west-2)
+
+        Returns:
+            boto3 client
+        """
+        key = (service_name, region_name or _default_region())
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None and self.client_factory is not None:
+                client = self._clients[key] = self.client_factory(*key)
+            if client is None:
+                if self._session is None:
+                    import boto3
+
+                    self._session = boto3.session.Session()
+                client = self._session.client(key[0], region_name=key[1], config=self.client_config())
+                self._clients[key] = client
+        return client
+
+    def get_memory_client(self, region_name: Optional[str] = None) -> Any:
+        """
+        Return the shared AgentCore MemoryClient for a region.
+
+        Args:
+            region_name: AWS region (default: AWS_REGION or us-west-2)
+
+        Returns:
+            bedrock_agentcore.memory.MemoryClient
+        """
+        region = region_name or _default_region()
+        client = self._memory_clients.get(region)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._memory_clients.get(region)
+            if client is None and self.memory_client_factory is not None:
+                client = self._memory_clients[region] = self.memory_client_factory(region)
+            if client is None:
+                from bedrock_agentcore.memory import MemoryClient
+
+                client = MemoryClient(region_name=region)
+                self._memory_clients[region] = client
+        return client
+
+    def clear(self) -> None:
+        """Drop every cached client (mainly for tests)."""
+        with self._lock:
+            self._clients.clear()
+            self._memory_clients.clear()
+            self._session = None
+
+    def set_factories(
+        self,
+        client_factory: Optional[Callable[[str, str], Any]] = None,
+        memory_client_factory: Optional[Callable[[str], Any]] = None,
+    ) -> None:
+        """
+        Replace how clients are created and drop every cached client.
+
+        Args:
+            client_factory: Creates a client from (service, region) (None: boto3)
+            memory_client_factory: Creates a memory client from a region (None: MemoryClient)
+        """
+        with self._lock:
+            self.client_factory = client_factory
+            self.memory_client_factory = memory_client_factory
+        self.clear()
+
+
+_shared_registry: Optional[ClientRegistry] = None
+_shared_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> ClientRegistry:
+    """Return the process-wide client registry configured from environment variables."""
+    global _shared_registry
+    if _shared_registry is None:
+        with _shared_registry_lock:
+            if _shared_registry is None:
+                _shared_registry = ClientRegistry.from_env()
+    return _shared_registry
+
+
+def set_client_factories(
+    client_factory: Optional[Callable[[str, str], Any]] = None,
+    memory_client_factory: Optional[Callable[[str], Any]] = None,
+) -> None:
+    """
+    Replace how the process-wide registry creates clients, e.g. with local stand-ins
+    for tests and load tests. Call without arguments to restore the real clients.
+
+    Args:
+        client_factory: Creates a client from (service, region) (None: boto3)
+        memory_client_factory: Creates a memory client from a region (None: MemoryClient)
+    """
+    get_client_registry().set_factories(client_factory, memory_client_factory)
+
+
+def get_client(service_name: str, region_name: Optional[str] = None) -> Any:
+    """
+    Return the shared boto3 client for a service and region.
+
+    Args:
+        service_name: boto3 service name (e.g. "bedrock-runtime")
+        region_name: AWS region (default: AWS_REGION or us-west-2)
+    """
+    return get_client_registry().get_client(service_name, region_name)
+
+
+def get_memory_client(region_name: Optional[str] = None) -> Any:
+    """
+    Return the shared AgentCore MemoryClient for a region.
+
+    Args:
+        region_name: AWS region (default: AWS_REGION or us-west-2)
+    """
+    return get_client_registry().get_memory_client(region_name)
@@ -2,9 +2,18 @@
 Logger module for SenpAI Agent application.
 """
 
-from .logger_config import setup_logger, get_logger, get_contextual_logger
+from .logger_config import (
+    setup_logger,
+    get_logger,
+    get_contextual_logger,
+    enable_async_logging,
+    shutdown_async_logging,
+    get_async_logging_stats
+)
 from .starlette_logger import (
     LoggingMiddleware,
+    ASGILoggingMiddleware,
+    get_current_request_id,
     get_request_logger,
     get_request_context,
     setup_starlette_logging
@@ -14,7 +23,12 @@ __all__ = [
     'setup_logger',
     'get_logger', 
     'get_contextual_logger',
+    'enable_async_logging',
+    'shutdown_async_logging',
+    'get_async_logging_stats',
     'LoggingMiddleware',
+    'ASGILoggingMiddleware',
+    'get_current_request_id',
     'get_request_logger',
     'get_request_context',
     'setup_starlette_logging'
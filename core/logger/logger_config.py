@@ -5,11 +5,28 @@ Provides structured logging for Starlette/FastAPI applications.
 
 import logging
 import logging.config
+import logging.handlers
+import atexit
+import copy
+import queue
 import sys
 import os
+import threading
+import time
 from typing import Dict, Any, Optional
 from datetime import datetime
 import json
+import math
+
+try:
+    import orjson
+except ImportError:  # optional faster JSON backend
+    orjson = None
+
+try:
+    from _json import encode_basestring as _encode_str
+except ImportError:  # pure-Python interpreters
+    from json.encoder import py_encode_basestring as _encode_str
 
 
 class JSONFormatter(logging.Formatter):
@@ -44,6 +61,131 @@ class JSONFormatter(logging.Formatter):
         return json.dumps(log_entry, ensure_ascii=False)
 
 
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RESERVED_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None)).keys()
+) | {"message", "asctime", "taskName"}
+# Extra fields that would collide with the fields StructuredJSONFormatter always writes
+_ENTRY_FIELDS = frozenset({"timestamp", "level", "logger", "module", "function", "line"})
+_SKIPPED_EXTRA_ATTRS = _RESERVED_RECORD_ATTRS | _ENTRY_FIELDS
+
+
+class StructuredJSONFormatter(logging.Formatter):
+    """
+    High-throughput JSON formatter for structured logging.
+    
+    Emits every non-reserved record attribute (i.e. all `extra` fields such as
+    duration_ms or status_code), caches the per-second part of the timestamp and
+    uses orjson when it is installed. Without orjson the JSON is assembled directly:
+    the fields that are fixed per call site (level, logger, module, function, line)
+    are encoded once and strings and numbers are encoded without building a dict.
+    """
+
+    # Upper bound of cached per-call-site prefixes (cleared when exceeded)
+    MAX_CACHED_SITES = 4096
+    
+    def __init__(self, use_orjson: Optional[bool] = None):
+        """
+        Args:
+            use_orjson: Use orjson for serialization (default: when installed)
+        """
+        super().__init__()
+        self.use_orjson = orjson is not None if use_orjson is None else (use_orjson and orjson is not None)
+        self._second_cache = (None, "")
+        # json.dumps() builds a new encoder per call when options are given; reuse one
+        self._json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+        self._sites: Dict[tuple, tuple] = {}
+    
+    def _timestamp(self, created: float) -> str:
+        """Format a record timestamp as ISO 8601 UTC with millisecond precision."""
+        second = int(created)
+        cached_second, prefix = self._second_cache
+        if cached_second != second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second_cache = (second, prefix)
+        return f"{prefix}.{int((created - second) * 1000):03d}Z"
+    
+    def _dumps(self, log_entry: Dict[str, Any]) -> str:
+        if self.use_orjson:
+            try:
+                return orjson.dumps(log_entry, default=str).decode("utf-8")
+            except TypeError:
+                pass  # e.g. integers beyond 64 bits; fall back to the stdlib encoder
+        return self._json_encoder.encode(log_entry)
+    
+    def _encode_value(self, value: Any) -> str:
+        value_type = type(value)
+        if value_type is str:
+            return _encode_str(value)
+        if value_type is int:
+            return int.__repr__(value)
+        if value_type is float and math.isfinite(value):
+            return float.__repr__(value)
+        return self._json_encoder.encode(value)
+    
+    def _site(self, record: logging.LogRecord) -> tuple:
+        """Pre-encoded fields that are the same for every record of one call site."""
+        key = (record.name, record.levelno, record.pathname, record.lineno, record.funcName)
+        site = self._sites.get(key)
+        if site is None:
+            if len(self._sites) >= self.MAX_CACHED_SITES:
+                self._sites.clear()
+            encode = self._json_encoder.encode
+            site = self._sites[key] = (
+                encode({"level": record.levelname, "logger": record.name})[1:-1],
+                encode({"module": record.module, "function": record.funcName, "line": record.lineno})[1:-1],
+            )
+        return site
+    
+    def _format_stdlib(self, record: logging.LogRecord) -> str:
+        head, tail = self._site(record)
+        parts = [
+            '{"timestamp":"', self._timestamp(record.created), '",', head,
+            ',"message":', _encode_str(record.getMessage()), ',', tail,
+        ]
+        for key, value in record.__dict__.items():
+            if key not in _SKIPPED_EXTRA_ATTRS:
+                parts.append(f",{_encode_str(key)}:{self._encode_value(value)}")
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            parts.append(f',"exception":{_encode_str(record.exc_text)}')
+        if record.stack_info:
+            parts.append(f',"stack":{_encode_str(self.formatStack(record.stack_info))}')
+        parts.append("}")
+        return "".join(parts)
+    
+    def format(self, record: logging.LogRecord) -> str:
+        """Format log record as JSON including all extra fields."""
+        if not self.use_orjson:
+            return self._format_stdlib(record)
+        log_entry = {
+            "timestamp": self._timestamp(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        
+        # Add extra fields
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_RECORD_ATTRS and key not in log_entry:
+                log_entry[key] = value
+        
+        # Add exception info if present
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_entry["exception"] = record.exc_text
+        if record.stack_info:
+            log_entry["stack"] = self.formatStack(record.stack_info)
+        
+        return self._dumps(log_entry)
+
+
 class ColoredConsoleFormatter(logging.Formatter):
     """Colored console formatter for development."""
     
@@ -93,6 +235,59 @@ class ColoredConsoleFormatter(logging.Formatter):
         return formatted_message
 
 
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler with a bounded queue and a configurable overflow policy.
+    
+    With the "drop" policy records are discarded immediately when the queue is full;
+    with the "block" policy the caller waits up to ``block_timeout`` seconds before
+    the record is discarded. Discarded records are counted in ``dropped``.
+    """
+    
+    def __init__(self, log_queue: queue.Queue, policy: str = "drop", block_timeout: float = 1.0):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merge the message arguments so the record is safe to hand to another thread.
+        Formatting is left to the target handlers running in the listener thread.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put a record on the queue according to the overflow policy."""
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    """Queue listener whose stop() waits for room in a full queue instead of failing."""
+    
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+# Active queue listener for async logging (None when logging is synchronous)
+_queue_listener: Optional[_DrainingQueueListener] = None
+_queue_handler: Optional[BoundedQueueHandler] = None
+_atexit_registered = False
+# Set once setup_logger() has applied the logging configuration
+_logging_configured = False
+
+
 def get_log_level() -> str:
     """Get log level from environment variable."""
     return os.getenv("LOG_LEVEL", "INFO").upper()
@@ -103,6 +298,100 @@ def get_log_format() -> str:
     return os.getenv("LOG_FORMAT", "console").lower()
 
 
+def get_log_async() -> bool:
+    """Get async (queue-based) logging mode from environment variable."""
+    return os.getenv("LOG_ASYNC", "false").lower() == "true"
+
+
+def enable_async_logging(
+    logger_names: list,
+    queue_size: Optional[int] = None,
+    policy: Optional[str] = None,
+    block_timeout: Optional[float] = None,
+) -> BoundedQueueHandler:
+    """
+    Move formatting and I/O of the given loggers to a background listener thread.
+    
+    The handlers currently attached to the loggers become targets of a single
+    QueueListener; the loggers themselves get a BoundedQueueHandler instead.
+    
+    Args:
+        logger_names: Names of loggers to switch ("" for the root logger)
+        queue_size: Maximum queued records (default: LOG_QUEUE_SIZE env var or 10000)
+        policy: "drop" or "block" when the queue is full (default: LOG_QUEUE_POLICY env var or "drop")
+        block_timeout: Seconds to wait with the "block" policy (default: LOG_QUEUE_BLOCK_TIMEOUT env var or 1.0)
+    
+    Returns:
+        The queue handler attached to the loggers
+    """
+    global _queue_listener, _queue_handler, _atexit_registered
+    
+    if queue_size is None:
+        queue_size = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    if policy is None:
+        policy = os.getenv("LOG_QUEUE_POLICY", "drop").lower()
+    if block_timeout is None:
+        block_timeout = float(os.getenv("LOG_QUEUE_BLOCK_TIMEOUT", "1.0"))
+    
+    shutdown_async_logging()
+    
+    loggers = [logging.getLogger(name) if name else logging.getLogger() for name in logger_names]
+    target_handlers = []
+    for logger in loggers:
+        for handler in logger.handlers:
+            if handler not in target_handlers:
+                target_handlers.append(handler)
+    
+    log_queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    handler = BoundedQueueHandler(log_queue, policy=policy, block_timeout=block_timeout)
+    for logger in loggers:
+        for existing in [h for h in logger.handlers if h in target_handlers]:
+            logger.removeHandler(existing)
+        logger.addHandler(handler)
+    
+    listener = _DrainingQueueListener(log_queue, *target_handlers, respect_handler_level=True)
+    listener.start()
+    
+    _queue_listener = listener
+    _queue_handler = handler
+    if not _atexit_registered:
+        atexit.register(shutdown_async_logging)
+        _atexit_registered = True
+    
+    return handler
+
+
+def shutdown_async_logging() -> None:
+    """Flush queued records and stop the background listener, if any."""
+    global _queue_listener, _queue_handler
+    
+    listener, handler = _queue_listener, _queue_handler
+    _queue_listener = None
+    _queue_handler = None
+    if listener is None:
+        return
+    
+    # stop() processes every record that is already queued before returning
+    listener.stop()
+    for target in listener.handlers:
+        target.flush()
+    if handler is not None and handler.dropped:
+        sys.stderr.write(f"senpai logging: {handler.dropped} log records dropped (queue full)\n")
+
+
+def get_async_logging_stats() -> Dict[str, Any]:
+    """
+    Get statistics of the async logging queue.
+    
+    Returns:
+        Dictionary with "enabled", "dropped" and "queued" values
+    """
+    handler = _queue_handler
+    if handler is None:
+        return {"enabled": False, "dropped": 0, "queued": 0}
+    return {"enabled": True, "dropped": handler.dropped, "queued": handler.queue.qsize()}
+
+
 def create_logging_config(
     level: str = "INFO",
     format_type: str = "console",
@@ -115,7 +404,7 @@ def create_logging_config(
         "disable_existing_loggers": False,
         "formatters": {
             "json": {
-                "()": JSONFormatter,
+                "()": StructuredJSONFormatter,
             },
             "console": {
                 "()": ColoredConsoleFormatter,
@@ -195,30 +484,55 @@ def setup_logger(
     name: str = "senpai",
     level: Optional[str] = None,
     format_type: Optional[str] = None,
-    log_file: Optional[str] = None
+    log_file: Optional[str] = None,
+    async_logging: Optional[bool] = None,
+    force: bool = False
 ) -> logging.Logger:
     """
     Set up and configure logger for the application.
     
+    Logging is configured once per process: later calls return the named logger and
+    keep the existing handlers (and the async logging listener with its counters)
+    unless ``force`` is set.
+    
     Args:
         name: Logger name (default: "senpai")
         level: Log level (default: from LOG_LEVEL env var or "INFO")
         format_type: Format type "console" or "json" (default: from LOG_FORMAT env var or "console")
         log_file: Optional log file path
+        async_logging: Format and write records on a background thread through a bounded
+            queue (default: from LOG_ASYNC env var or False). The queue is configured with
+            LOG_QUEUE_SIZE, LOG_QUEUE_POLICY ("drop" or "block") and LOG_QUEUE_BLOCK_TIMEOUT.
+        force: Replace the configuration even if logging is already configured
     
     Returns:
         Configured logger instance
     """
+    global _logging_configured
+    
+    if _logging_configured and not force:
+        return logging.getLogger(name)
+    
     if level is None:
         level = get_log_level()
     
     if format_type is None:
         format_type = get_log_format()
     
+    if async_logging is None:
+        async_logging = get_log_async()
+    
+    # Flush records queued for the handlers that are about to be replaced
+    shutdown_async_logging()
+    
     # Create and apply logging configuration
     config = create_logging_config(level, format_type, log_file)
     logging.config.dictConfig(config)
     
+    if async_logging:
+        enable_async_logging(list(config["loggers"].keys()) + [""])
+    _logging_configured = True
+    
     # Get the logger
     logger = logging.getLogger(name)
     
@@ -226,6 +540,7 @@ def setup_logger(
         "level": level,
         "format": format_type,
         "log_file": log_file,
+        "async_logging": async_logging,
     })
     
     return logger
@@ -2,15 +2,19 @@
 Starlette-specific logging utilities and middleware.
 """
 
+import json
 import logging
+import re
 import time
 import uuid
-from typing import Callable, Optional
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs
 from starlette.applications import Starlette
 from starlette.requests import Request
 from starlette.responses import Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from .logger_config import get_contextual_logger, get_logger
 
@@ -95,6 +99,8 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             }
         )
         
+        # Make the request ID visible to handlers and tracing spans
+        token = _current_request_id.set(request_id)
         try:
             # Process request
             response = await call_next(request)
@@ -131,6 +137,177 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                 exc_info=True
             )
             raise
+        finally:
+            _current_request_id.reset(token)
+
+
+_current_request_id: ContextVar[Optional[str]] = ContextVar("senpai_request_id", default=None)
+
+# Matches "user_id": "..." / "session_id": "..." (string values only) in a JSON prefix
+_BODY_FIELD_PATTERNS = {
+    field: re.compile(rb'"' + field.encode() + rb'"\s*:\s*"((?:[^"\\]|\\.)*)"')
+    for field in ("user_id", "session_id")
+}
+
+
+def get_current_request_id() -> Optional[str]:
+    """
+    Get the request ID (X-Request-ID) of the request being handled by the logging middleware.
+
+    Returns:
+        Request ID, or None outside of a request
+    """
+    return _current_request_id.get()
+
+
+def _peek_body_fields(prefix: bytes) -> Dict[str, str]:
+    """Extract user_id/session_id string values from a (possibly truncated) JSON prefix."""
+    fields = {}
+    for field, pattern in _BODY_FIELD_PATTERNS.items():
+        match = pattern.search(prefix)
+        if match:
+            try:
+                fields[field] = json.loads(b'"' + match.group(1) + b'"')
+            except ValueError:
+                pass
+    return fields
+
+
+class ASGILoggingMiddleware:
+    """
+    Pure ASGI alternative to LoggingMiddleware.
+
+    Request context is read from the X-Request-ID / X-User-ID / X-Session-ID headers
+    and the query string. If user_id or session_id is still missing, only the first
+    body chunk of a JSON request is inspected (at most ``body_peek_bytes`` bytes) and
+    then replayed unchanged to the application. Request and response chunks are
+    passed through as they arrive, so streaming (SSE) responses keep streaming.
+    """
+
+    def __init__(self, app: ASGIApp, logger_name: str = "senpai.http", body_peek_bytes: int = 4096):
+        """
+        Args:
+            app: ASGI application to wrap
+            logger_name: Logger name for request logs
+            body_peek_bytes: Maximum body prefix scanned for user_id/session_id (0 disables it)
+        """
+        self.app = app
+        self.logger_name = logger_name
+        self.logger = get_logger(logger_name)
+        self.body_peek_bytes = body_peek_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {}
+        for key, value in scope.get("headers", ()):
+            if key in (b"x-request-id", b"x-user-id", b"x-session-id", b"content-type", b"user-agent"):
+                headers[key] = value.decode("latin-1")
+
+        request_id = headers.get(b"x-request-id") or str(uuid.uuid4())
+        user_id = headers.get(b"x-user-id")
+        session_id = headers.get(b"x-session-id")
+
+        query_string = scope.get("query_string", b"").decode("latin-1")
+        if query_string and (not user_id or not session_id):
+            query = parse_qs(query_string)
+            user_id = user_id or query.get("user_id", [None])[0]
+            session_id = session_id or query.get("session_id", [None])[0]
+
+        if (
+            (not user_id or not session_id)
+            and self.body_peek_bytes > 0
+            and headers.get(b"content-type", "").startswith("application/json")
+        ):
+            first_message = await receive()
+            fields = _peek_body_fields(first_message.get("body", b"")[: self.body_peek_bytes])
+            user_id = user_id or fields.get("user_id")
+            session_id = session_id or fields.get("session_id")
+            receive = _replay_first(first_message, receive)
+
+        contextual_logger = get_contextual_logger(
+            self.logger_name,
+            request_id=request_id,
+            user_id=user_id,
+            session_id=session_id
+        )
+
+        # Exposed to handlers through request.state.logging_context
+        state = scope.setdefault("state", {})
+        state.setdefault("logging_context", {}).update({
+            "request_id": request_id,
+            "user_id": user_id,
+            "session_id": session_id,
+            "logger": contextual_logger
+        })
+
+        method = scope.get("method")
+        path = scope.get("path")
+        client = scope.get("client")
+        contextual_logger.info(
+            f"Request started: {method} {path}",
+            extra={
+                "method": method,
+                "path": path,
+                "query": query_string,
+                "client_ip": client[0] if client else None,
+                "user_agent": headers.get(b"user-agent"),
+            }
+        )
+
+        start_time = time.perf_counter()
+        status_code = None
+        request_id_header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", ()), request_id_header]}
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                contextual_logger.info(
+                    f"Request completed: {method} {path} - {status_code}",
+                    extra={
+                        "method": method,
+                        "path": path,
+                        "status_code": status_code,
+                        "duration_ms": round((time.perf_counter() - start_time) * 1000, 2),
+                    }
+                )
+            await send(message)
+
+        token = _current_request_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            contextual_logger.error(
+                f"Request failed: {method} {path}",
+                extra={
+                    "method": method,
+                    "path": path,
+                    "duration_ms": round((time.perf_counter() - start_time) * 1000, 2),
+                    "error": str(exc),
+                    "error_type": type(exc).__name__,
+                },
+                exc_info=True
+            )
+            raise
+        finally:
+            _current_request_id.reset(token)
+
+
+def _replay_first(first_message: Message, receive: Receive) -> Receive:
+    """Return a receive callable that yields an already received message once, then delegates."""
+    pending = [first_message]
+
+    async def replay() -> Message:
+        if pending:
+            return pending.pop()
+        return await receive()
+
+    return replay
 
 
 def get_request_logger(request: Request) -> Optional[logging.LoggerAdapter]:
@@ -165,16 +342,19 @@ def get_request_context(request: Request) -> dict:
     return {}
 
 
-def setup_starlette_logging(app: Starlette, logger_name: str = "senpai") -> None:
+def setup_starlette_logging(app: Starlette, logger_name: str = "senpai", pure_asgi: bool = False) -> None:
     """
     Set up logging for a Starlette application.
     
     Args:
         app: Starlette application instance
         logger_name: Base logger name
+        pure_asgi: Use ASGILoggingMiddleware instead of LoggingMiddleware
+            (no body buffering, streaming responses pass through)
     """
     # Add logging middleware
-    app.add_middleware(LoggingMiddleware, logger_name=f"{logger_name}.http")
+    middleware_class = ASGILoggingMiddleware if pure_asgi else LoggingMiddleware
+    app.add_middleware(middleware_class, logger_name=f"{logger_name}.http")
     
     # Set up exception handler
     @app.exception_handler(Exception)
@@ -0,0 +1,14 @@
+"""
+Memory persistence module for SenpAI Agent application.
+"""
+
+from .event_writer import MemoryEvent, MemoryEventWriter, create_memory_event_writer
+from .history_cache import SessionHistoryCache, get_session_history_cache
+
+__all__ = [
+    'MemoryEvent',
+    'MemoryEventWriter',
+    'create_memory_event_writer',
+    'SessionHistoryCache',
+    'get_session_history_cache',
+]
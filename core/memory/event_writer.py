@@ -0,0 +1,329 @@
+"""
+Write-behind persistence for AgentCore Memory conversation events.
+Agents hand events to the writer and return immediately; a small pool of
+background threads writes them to AgentCore Memory with scheduled retries.
+"""
+
+import asyncio
+import atexit
+import heapq
+import itertools
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.logger import get_current_request_id, get_logger
+from core.metrics import MEMORY_LATENCY, get_agent_name, register_stats, track_stage
+from core.tracing import start_span
+from .history_cache import SessionHistoryCache, get_session_history_cache
+
+
+@dataclass
+class MemoryEvent:
+    """A conversation event waiting to be persisted."""
+
+    memory_id: str
+    actor_id: str
+    session_id: str
+    messages: List[Tuple[str, str]]
+    created_at: float = field(default_factory=time.time)
+    # Metrics label of the agent that submitted the event
+    agent: str = field(default_factory=get_agent_name)
+    # X-Request-ID of the request that produced the event (for tracing)
+    request_id: Optional[str] = field(default_factory=get_current_request_id)
+
+
+class MemoryEventWriter:
+    """
+    Background writer that persists conversation events to AgentCore Memory.
+
+    Events are queued by submit() and written concurrently by a small pool of daemon
+    threads, so one slow or throttled write does not hold up the rest of the queue
+    (the original ordering is kept through each event's timestamp). A failed write is
+    scheduled for a retry with exponential backoff instead of sleeping in the worker;
+    the worker moves on to other events meanwhile.
+
+    When the queue is full, submit() blocks for at most ``enqueue_timeout`` seconds
+    and then drops the event (backpressure). Called from a running event loop it never
+    blocks: a full queue drops the event immediately. close() drains the queue and
+    pending retries on shutdown.
+
+    If a history cache is given, queued events are also applied to it write-through
+    so that history lookups see the conversation before it reaches Memory. Dropped
+    events never reach the cache, and a session whose write finally fails is
+    invalidated so the cache does not keep serving history that was never saved.
+    """
+
+    def __init__(
+        self,
+        memory_client: Any,
+        max_queue_size: int = 1000,
+        workers: int = 4,
+        flush_interval: float = 0.5,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        enqueue_timeout: float = 0.05,
+        history_cache: Optional[SessionHistoryCache] = None,
+        logger_name: str = "senpai.memory",
+    ):
+        """
+        Initialize the writer and start the background writer threads.
+
+        Args:
+            memory_client: MemoryClient (or compatible object) providing create_event()
+            max_queue_size: Maximum number of pending events
+            workers: Number of threads writing events concurrently
+            flush_interval: Seconds an idle worker waits for new events before re-checking retries
+            max_retries: Number of retries for a failed write before the event is dropped
+            retry_backoff: Base delay in seconds for exponential retry backoff
+            enqueue_timeout: Seconds submit() may block when the queue is full (outside an event loop)
+            history_cache: Optional SessionHistoryCache updated write-through on submit()
+            logger_name: Logger name used by the writer
+        """
+        self.memory_client = memory_client
+        self.flush_interval = flush_interval
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self.enqueue_timeout = enqueue_timeout
+        self.history_cache = history_cache
+        self.logger = get_logger(logger_name)
+
+        self._queue: "queue.Queue[MemoryEvent]" = queue.Queue(maxsize=max(1, max_queue_size))
+        # Heap of (due time, sequence, event, attempt) waiting for a retry
+        self._retries: List[Tuple[float, int, MemoryEvent, int]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stop = threading.Event()
+        self._stats: Dict[str, int] = {
+            "submitted": 0,
+            "written": 0,
+            "retried": 0,
+            "failed": 0,
+            "dropped": 0,
+        }
+
+        self._workers = [
+            threading.Thread(target=self._run, name=f"memory-event-writer-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(
+        self,
+        memory_id: str,
+        actor_id: str,
+        session_id: str,
+        messages: List[Tuple[str, str]],
+    ) -> bool:
+        """
+        Queue a conversation event for background persistence.
+
+        Args:
+            memory_id: AgentCore Memory ID
+            actor_id: Actor (user) ID
+            session_id: Session ID
+            messages: List of (text, role) tuples as accepted by MemoryClient.create_event
+
+        Returns:
+            True if the event was queued, False if it was dropped
+        """
+        if self._closed:
+            self.logger.warning("Memory event writer is closed; event dropped", extra={
+                "actor_id": actor_id,
+                "session_id": session_id,
+            })
+            self._increment("dropped")
+            return False
+
+        event = MemoryEvent(memory_id, actor_id, session_id, list(messages))
+        try:
+            if _in_event_loop():
+                # Never block the event loop; a full queue drops the event
+                self._queue.put_nowait(event)
+            else:
+                self._queue.put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._increment("dropped")
+            self.logger.warning("Memory event queue is full; event dropped", extra={
+                "actor_id": actor_id,
+                "session_id": session_id,
+                "queue_size": self._queue.qsize(),
+            })
+            return False
+
+        self._increment("submitted")
+        if self.history_cache is not None:
+            self.history_cache.append(memory_id, actor_id, session_id, event.messages)
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued event has been written or has failed (including retries).
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if the queue was drained, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Stop accepting events, drain the queue and pending retries and stop the workers.
+
+        Args:
+            timeout: Maximum seconds to wait for pending events to be written
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        deadline = time.monotonic() + timeout
+        if not self.flush(timeout):
+            self.logger.error("Memory event writer could not be stopped cleanly", extra={
+                "pending": self._queue.qsize(),
+                "retrying": len(self._retries),
+            })
+        self._stop.set()
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        self.logger.info("Memory event writer closed", extra=self.stats())
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of writer counters, the queue depth and pending retries."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["retrying"] = len(self._retries)
+        snapshot["pending"] = self._queue.qsize()
+        return snapshot
+
+    def _increment(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def _run(self) -> None:
+        """Worker loop: write due retries first, then new events."""
+        while not self._stop.is_set():
+            retry = self._pop_due_retry()
+            if retry is not None:
+                self._write_event(*retry)
+                continue
+            try:
+                event = self._queue.get(timeout=self._idle_wait())
+            except queue.Empty:
+                continue
+            self._write_event(event, 0)
+
+    def _pop_due_retry(self) -> Optional[Tuple[MemoryEvent, int]]:
+        with self._lock:
+            if self._retries and self._retries[0][0] <= time.monotonic():
+                _, _, event, attempt = heapq.heappop(self._retries)
+                return event, attempt
+        return None
+
+    def _idle_wait(self) -> float:
+        """Seconds to wait for a new event before the next retry is due."""
+        with self._lock:
+            if not self._retries:
+                return self.flush_interval
+            return min(self.flush_interval, max(0.01, self._retries[0][0] - time.monotonic()))
+
+    def _write_event(self, event: MemoryEvent, attempt: int) -> None:
+        """Make one write attempt; schedule a retry or finish the event."""
+        try:
+            with start_span("memory.create_event", **{"senpai.request_id": event.request_id, "senpai.attempt": attempt + 1}), \
+                    track_stage(MEMORY_LATENCY, agent=event.agent, operation="write"):
+                self.memory_client.create_event(
+                    memory_id=event.memory_id,
+                    actor_id=event.actor_id,
+                    session_id=event.session_id,
+                    messages=event.messages,
+                    # Keep the original ordering even though the write is deferred
+                    event_timestamp=datetime.fromtimestamp(event.created_at, tz=timezone.utc),
+                )
+        except Exception as e:
+            if attempt >= self.max_retries:
+                self._increment("failed")
+                self.logger.error("Memory save error", extra={
+                    "error": str(e),
+                    "actor_id": event.actor_id,
+                    "session_id": event.session_id,
+                    "attempts": attempt + 1,
+                })
+                if self.history_cache is not None:
+                    # The write-through copy was never persisted; reload the session from Memory
+                    self.history_cache.invalidate(event.memory_id, event.actor_id, event.session_id)
+                self._queue.task_done()
+                return
+            due = time.monotonic() + self.retry_backoff * (2 ** attempt)
+            with self._lock:
+                self._stats["retried"] += 1
+                heapq.heappush(self._retries, (due, next(self._sequence), event, attempt + 1))
+            return
+
+        self._increment("written")
+        self.logger.debug("Conversation event persisted", extra={
+            "actor_id": event.actor_id,
+            "session_id": event.session_id,
+            "saved_messages": len(event.messages),
+            "attempt": attempt + 1,
+        })
+        self._queue.task_done()
+
+
+def _in_event_loop() -> bool:
+    """Return True when called from a thread that is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def create_memory_event_writer(memory_client: Any) -> MemoryEventWriter:
+    """
+    Create a MemoryEventWriter configured from environment variables and register
+    it to drain on interpreter shutdown. Saved events are applied write-through to
+    the process-wide session history cache, and the writer's counters are exported
+    as senpai_component_stat{component="memory_writer"} gauges.
+
+    Environment variables:
+        MEMORY_WRITER_MAX_QUEUE_SIZE: Maximum pending events (default: 1000)
+        MEMORY_WRITER_WORKERS: Threads writing events concurrently (default: 4)
+        MEMORY_WRITER_FLUSH_INTERVAL: Worker idle wait in seconds (default: 0.5)
+        MEMORY_WRITER_MAX_RETRIES: Retries per event (default: 3)
+        MEMORY_WRITER_ENQUEUE_TIMEOUT: Seconds submit() may block when full (default: 0.05)
+        MEMORY_WRITER_SHUTDOWN_TIMEOUT: Seconds to drain on shutdown (default: 10)
+
+    Args:
+        memory_client: MemoryClient used for persistence
+
+    Returns:
+        Started MemoryEventWriter instance
+    """
+    writer = MemoryEventWriter(
+        memory_client,
+        max_queue_size=int(os.getenv("MEMORY_WRITER_MAX_QUEUE_SIZE", "1000")),
+        workers=int(os.getenv("MEMORY_WRITER_WORKERS", "4")),
+        flush_interval=float(os.getenv("MEMORY_WRITER_FLUSH_INTERVAL", "0.5")),
+        max_retries=int(os.getenv("MEMORY_WRITER_MAX_RETRIES", "3")),
+        enqueue_timeout=float(os.getenv("MEMORY_WRITER_ENQUEUE_TIMEOUT", "0.05")),
+        history_cache=get_session_history_cache(),
+    )
+    atexit.register(writer.close, float(os.getenv("MEMORY_WRITER_SHUTDOWN_TIMEOUT", "10")))
+    register_stats("memory_writer", writer.stats)
+    return writer
@@ -0,0 +1,224 @@
+"""
+In-process cache of short-term conversation history per (memory, actor, session).
+
+The cache is filled from AgentCore Memory on a miss and updated write-through from
+the agents' save path, so history lookups usually avoid a remote round trip.
+Entries expire after a TTL and the cache is bounded by an LRU over total bytes.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+Turn = List[Dict[str, Any]]
+CacheKey = Tuple[str, str, str]
+
+# Approximate per-message overhead (dict, role, nesting) added to the text size
+_MESSAGE_OVERHEAD_BYTES = 96
+
+
+@dataclass
+class _HistoryEntry:
+    turns: List[Turn]          # Oldest turn first
+    complete: bool             # True if the entry holds the full session history
+    expires_at: float
+    size: int = 0
+
+
+def _message_size(message: Dict[str, Any]) -> int:
+    content = message.get("content", {})
+    text = content.get("text", "") if isinstance(content, dict) else str(content)
+    return len(text.encode("utf-8")) + _MESSAGE_OVERHEAD_BYTES
+
+
+def _turns_size(turns: List[Turn]) -> int:
+    return sum(_message_size(message) for turn in turns for message in turn)
+
+
+class SessionHistoryCache:
+    """
+    Thread-safe LRU cache of conversation turns bounded by total bytes and TTL.
+
+    Turns are returned in the same shape and order as MemoryClient.get_last_k_turns():
+    a list of turns (most recent first), each a list of {"role", "content": {"text"}}
+    message dicts.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl_seconds: float = 900.0,
+        max_turns_per_session: int = 50,
+    ):
+        """
+        Args:
+            max_bytes: Maximum approximate size of all cached history
+            ttl_seconds: Seconds an entry stays valid after it was loaded from Memory
+            max_turns_per_session: Maximum number of turns kept per session
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_turns_per_session = max(1, max_turns_per_session)
+
+        self._entries: "OrderedDict[CacheKey, _HistoryEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "appends": 0}
+
+    def get_turns(self, memory_id: str, actor_id: str, session_id: str, k: int) -> Optional[List[Turn]]:
+        """
+        Return the last k turns of a session, or None on a cache miss.
+
+        Args:
+            memory_id: AgentCore Memory ID
+            actor_id: Actor (user) ID
+            session_id: Session ID
+            k: Number of turns requested
+
+        Returns:
+            List of turns (most recent first) or None if the cache cannot answer
+        """
+        key = (memory_id, actor_id, session_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            # An incomplete entry can only answer if it holds at least k turns
+            if not entry.complete and len(entry.turns) < k:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return [list(turn) for turn in reversed(entry.turns[-k:])] if k > 0 else []
+
+    def put_turns(self, memory_id: str, actor_id: str, session_id: str, turns: List[Turn], k: int) -> None:
+        """
+        Store turns loaded from Memory.
+
+        Args:
+            memory_id: AgentCore Memory ID
+            actor_id: Actor (user) ID
+            session_id: Session ID
+            turns: Turns as returned by get_last_k_turns() (most recent first)
+            k: Number of turns that were requested; fewer turns means the history is complete
+        """
+        chronological = [list(turn) for turn in reversed(turns or [])]
+        entry = _HistoryEntry(
+            turns=chronological,
+            complete=len(chronological) < k,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._store((memory_id, actor_id, session_id), entry)
+
+    def append(self, memory_id: str, actor_id: str, session_id: str, messages: List[Tuple[str, str]]) -> bool:
+        """
+        Write-through update with messages that were just saved to Memory.
+        Only sessions already in the cache are updated; others are loaded on the next miss.
+
+        Args:
+            memory_id: AgentCore Memory ID
+            actor_id: Actor (user) ID
+            session_id: Session ID
+            messages: List of (text, role) tuples as passed to MemoryClient.create_event
+
+        Returns:
+            True if a cached session was updated
+        """
+        key = (memory_id, actor_id, session_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                return False
+
+            turns = entry.turns
+            for text, role in messages:
+                message = {"role": role.upper(), "content": {"text": text}}
+                if message["role"] == "USER" or not turns:
+                    turns.append([message])
+                else:
+                    turns[-1].append(message)
+
+            if len(turns) > self.max_turns_per_session:
+                del turns[:len(turns) - self.max_turns_per_session]
+                entry.complete = False
+
+            self._stats["appends"] += 1
+            self._store(key, entry)
+            return True
+
+    def invalidate(self, memory_id: str, actor_id: str, session_id: str) -> None:
+        """Remove a session from the cache."""
+        with self._lock:
+            self._remove((memory_id, actor_id, session_id))
+
+    def clear(self) -> None:
+        """Remove all sessions from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of cache counters and size."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["entries"] = len(self._entries)
+            snapshot["bytes"] = self._total_bytes
+        return snapshot
+
+    def _store(self, key: CacheKey, entry: _HistoryEntry) -> None:
+        if len(entry.turns) > self.max_turns_per_session:
+            del entry.turns[:len(entry.turns) - self.max_turns_per_session]
+            entry.complete = False
+
+        self._remove(key)
+        entry.size = _turns_size(entry.turns)
+        if entry.size > self.max_bytes:
+            return
+
+        self._entries[key] = entry
+        self._total_bytes += entry.size
+        while self._total_bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+
+
+_shared_cache: Optional[SessionHistoryCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_session_history_cache() -> SessionHistoryCache:
+    """
+    Return the process-wide history cache, creating it from environment variables.
+
+    Environment variables:
+        HISTORY_CACHE_MAX_BYTES: Maximum cached bytes (default: 33554432)
+        HISTORY_CACHE_TTL_SECONDS: Entry TTL in seconds (default: 900)
+        HISTORY_CACHE_MAX_TURNS: Maximum turns kept per session (default: 50)
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = SessionHistoryCache(
+                    max_bytes=int(os.getenv("HISTORY_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+                    ttl_seconds=float(os.getenv("HISTORY_CACHE_TTL_SECONDS", "900")),
+                    max_turns_per_session=int(os.getenv("HISTORY_CACHE_MAX_TURNS", "50")),
+                )
+    return _shared_cache
@@ -0,0 +1,55 @@
+"""
+Metrics module for SenpAI Agent application.
+"""
+
+from .registry import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    get_metrics_registry,
+)
+from .stages import (
+    LLM_LATENCY,
+    TOOL_LATENCY,
+    MEMORY_LATENCY,
+    GRAPH_ITERATIONS,
+    REQUEST_LATENCY,
+    LLM_TOKENS,
+    MODEL_ROUTES,
+    TOOL_CIRCUIT_STATE,
+    SINGLEFLIGHT_CALLS,
+    set_agent_name,
+    get_agent_name,
+    use_agent_name,
+    track_stage,
+    record_graph_iterations,
+    record_token_usage,
+    register_stats,
+    add_metrics_route,
+)
+
+__all__ = [
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsRegistry',
+    'get_metrics_registry',
+    'LLM_LATENCY',
+    'TOOL_LATENCY',
+    'MEMORY_LATENCY',
+    'GRAPH_ITERATIONS',
+    'REQUEST_LATENCY',
+    'LLM_TOKENS',
+    'MODEL_ROUTES',
+    'TOOL_CIRCUIT_STATE',
+    'SINGLEFLIGHT_CALLS',
+    'set_agent_name',
+    'get_agent_name',
+    'use_agent_name',
+    'track_stage',
+    'record_graph_iterations',
+    'record_token_usage',
+    'register_stats',
+    'add_metrics_route',
+]
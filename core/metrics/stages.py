@@ -0,0 +1,212 @@
+"""
+Per-stage latency metrics for SenpAI agents.
+
+Stages:
+    senpai_llm_latency_seconds: one Bedrock call made by the chatbot node
+    senpai_tool_latency_seconds: one tool execution
+    senpai_memory_latency_seconds: AgentCore Memory reads and writes
+    senpai_graph_iterations: LLM calls needed to answer one request
+    senpai_request_latency_seconds: end-to-end entrypoint time
+    senpai_llm_tokens_total: LLM tokens by type (input, output, cache_read, cache_write)
+    senpai_model_routes_total: LLM calls per model tier chosen by the model router
+    senpai_tool_circuit_state: circuit breaker state per tool (0 closed, 1 half-open, 2 open)
+
+Every stage is labeled with the agent that handled the request. The agent name is
+set once per process with set_agent_name() (or per request with use_agent_name())
+and is picked up automatically by tools and the memory writer.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from .registry import CONTENT_TYPE, get_metrics_registry
+
+_registry = get_metrics_registry()
+
+LLM_LATENCY = _registry.histogram(
+    "senpai_llm_latency_seconds",
+    "Latency of LLM calls made by the chatbot node.",
+    ("agent", "model", "status"),
+)
+TOOL_LATENCY = _registry.histogram(
+    "senpai_tool_latency_seconds",
+    "Latency of tool executions.",
+    ("agent", "tool", "status"),
+)
+MEMORY_LATENCY = _registry.histogram(
+    "senpai_memory_latency_seconds",
+    "Latency of AgentCore Memory operations (read, read_cached, write).",
+    ("agent", "operation", "status"),
+)
+GRAPH_ITERATIONS = _registry.histogram(
+    "senpai_graph_iterations",
+    "Number of LLM calls (chatbot node iterations) per request.",
+    ("agent",),
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20),
+)
+REQUEST_LATENCY = _registry.histogram(
+    "senpai_request_latency_seconds",
+    "End-to-end latency of agent entrypoint calls.",
+    ("agent", "mode", "status"),
+)
+LLM_TOKENS = _registry.counter(
+    "senpai_llm_tokens_total",
+    "LLM tokens by type (input, output, cache_read, cache_write).",
+    ("agent", "model", "type"),
+)
+MODEL_ROUTES = _registry.counter(
+    "senpai_model_routes_total",
+    "LLM calls per model tier chosen by the model router (reason: complexity, latency_budget).",
+    ("agent", "tier", "reason"),
+)
+TOOL_CIRCUIT_STATE = _registry.gauge(
+    "senpai_tool_circuit_state",
+    "Circuit breaker state of guarded tools (0 closed, 1 half-open, 2 open).",
+    ("tool",),
+)
+SINGLEFLIGHT_CALLS = _registry.counter(
+    "senpai_singleflight_calls_total",
+    "Calls through single-flight groups (outcome: leader ran the call, coalesced shared it, timeout gave up waiting).",
+    ("group", "outcome"),
+)
+COMPONENT_STATS = _registry.gauge(
+    "senpai_component_stat",
+    "Counters and sizes reported by in-process components (queues, caches).",
+    ("component", "stat"),
+)
+
+_default_agent_name = "senpai"
+_current_agent_name: ContextVar[Optional[str]] = ContextVar("senpai_agent_name", default=None)
+
+
+def set_agent_name(name: str) -> None:
+    """
+    Set the process-wide agent label used by all stage metrics.
+
+    Args:
+        name: Agent name (e.g. "main", "advice")
+    """
+    global _default_agent_name
+    _default_agent_name = name
+
+
+def get_agent_name() -> str:
+    """Return the agent label for the current request (or the process default)."""
+    return _current_agent_name.get() or _default_agent_name
+
+
+@contextmanager
+def use_agent_name(name: str) -> Iterator[None]:
+    """
+    Override the agent label for the current request.
+
+    Args:
+        name: Agent name
+    """
+    token = _current_agent_name.set(name)
+    try:
+        yield
+    finally:
+        _current_agent_name.reset(token)
+
+
+@contextmanager
+def track_stage(histogram, **labels: str) -> Iterator[Dict[str, str]]:
+    """
+    Time the enclosed block and record it in a stage histogram.
+
+    The "agent" label defaults to get_agent_name(). If the histogram has a "status"
+    label it is set to "ok", or "error" when the block raises. The yielded label
+    dict may be modified inside the block, e.g. to report a handled failure.
+
+    Args:
+        histogram: Histogram to record into
+        **labels: Label values (agent and status may be omitted)
+
+    Yields:
+        Mutable label dict used for the observation
+    """
+    if "agent" in histogram.label_names:
+        labels.setdefault("agent", get_agent_name())
+    if "status" in histogram.label_names:
+        labels.setdefault("status", "ok")
+    start = time.perf_counter()
+    try:
+        yield labels
+    except BaseException:
+        if "status" in labels:
+            labels["status"] = "error"
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+def record_graph_iterations(messages: Iterable[Any], agent: Optional[str] = None) -> int:
+    """
+    Record how many LLM calls a request needed, counted from the AI messages in the
+    final graph state.
+
+    Args:
+        messages: Messages returned by the graph
+        agent: Agent label (default: get_agent_name())
+
+    Returns:
+        Number of iterations recorded
+    """
+    iterations = sum(1 for message in messages if getattr(message, "type", None) == "ai")
+    GRAPH_ITERATIONS.observe(iterations, agent=agent or get_agent_name())
+    return iterations
+
+
+def record_token_usage(usage: Optional[Dict[str, Any]], model: str, agent: Optional[str] = None) -> None:
+    """
+    Add an LLM response's token counts to senpai_llm_tokens_total.
+
+    Args:
+        usage: LangChain usage_metadata of the response (None is ignored)
+        model: Model label
+        agent: Agent label (default: get_agent_name())
+    """
+    if not usage:
+        return
+    agent = agent or get_agent_name()
+    details = usage.get("input_token_details") or {}
+    counts = {
+        "input": usage.get("input_tokens"),
+        "output": usage.get("output_tokens"),
+        "cache_read": details.get("cache_read"),
+        "cache_write": details.get("cache_creation"),
+    }
+    for token_type, count in counts.items():
+        if count:
+            LLM_TOKENS.inc(count, agent=agent, model=model, type=token_type)
+
+
+def register_stats(component: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    """
+    Export a component's stats() snapshot as senpai_component_stat gauges.
+
+    Args:
+        component: Component label (e.g. "memory_writer")
+        stats: Callable returning a dict of numeric values
+    """
+    for stat in stats():
+        COMPONENT_STATS.set_function(lambda stat=stat: stats()[stat], component=component, stat=stat)
+
+
+def add_metrics_route(app: Any, path: str = "/metrics") -> None:
+    """
+    Expose the process-wide metrics in Prometheus text format on a Starlette app.
+
+    Args:
+        app: Starlette (or BedrockAgentCoreApp) application
+        path: Route path (default: /metrics)
+    """
+    from starlette.responses import Response
+
+    async def metrics_endpoint(request):
+        return Response(get_metrics_registry().render(), media_type=CONTENT_TYPE)
+
+    app.add_route(path, metrics_endpoint, methods=["GET"])
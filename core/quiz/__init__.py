@@ -0,0 +1,16 @@
+"""
+Quiz support module for SenpAI Agent application.
+"""
+
+from .question_bank import Question, QuestionBank, get_question_bank, normalize_key, validate_quiz
+from .prefetch import QuizPrefetcher, get_quiz_prefetcher
+
+__all__ = [
+    'Question',
+    'QuestionBank',
+    'get_question_bank',
+    'normalize_key',
+    'validate_quiz',
+    'QuizPrefetcher',
+    'get_quiz_prefetcher',
+]
@@ -0,0 +1,174 @@
+"""
+Speculative prefetch of the next quiz for an active training session.
+
+After a quiz is served, the next quiz for the same (user, topic, difficulty) is
+prepared in the background and parked in a bounded per-session slot with an
+expiry. The follow-up request takes it from the slot instead of waiting for a
+full knowledge-base generation.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from core.tools.tool_context import submit_with_context
+
+
+@dataclass
+class _Slot:
+    future: Future
+    expires_at: float
+
+
+class QuizPrefetcher:
+    """
+    Bounded set of prefetch slots filled by a small background thread pool.
+
+    Counters:
+        scheduled: prefetches started
+        hits: requests answered from a slot
+        misses: requests with no usable slot
+        waste: prefetched results that expired, were evicted or were replaced unused
+        errors: prefetches whose loader raised
+    """
+
+    def __init__(self, max_slots: int = 256, ttl_seconds: float = 600.0, max_workers: int = 2, wait_timeout: float = 0.2):
+        """
+        Args:
+            max_slots: Maximum number of parked prefetches (oldest is evicted first)
+            ttl_seconds: Seconds a prefetched result stays usable
+            max_workers: Background threads used for prefetching
+            wait_timeout: Seconds take() waits for a prefetch that is still running. Keep it
+                well under a second: on a miss the caller prepares the quiz itself, and a
+                knowledge-base top-up still in flight is shared through single-flight
+        """
+        self.max_slots = max(1, max_slots)
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout = wait_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="quiz-prefetch")
+        self._slots: "OrderedDict[Hashable, _Slot]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"scheduled": 0, "hits": 0, "misses": 0, "waste": 0, "errors": 0}
+
+    def schedule(self, key: Hashable, loader: Callable[[], Any]) -> bool:
+        """
+        Start preparing the next result for a key in the background.
+
+        Args:
+            key: Slot key, e.g. (user_id, topic, difficulty, num_questions)
+            loader: Callable producing the result
+
+        Returns:
+            True if a prefetch was started, False if a valid one is already pending
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._slots:
+                return False
+            while len(self._slots) >= self.max_slots:
+                _, evicted = self._slots.popitem(last=False)
+                self._discard(evicted)
+            future = submit_with_context(self._executor, loader)
+            self._slots[key] = _Slot(future=future, expires_at=now + self.ttl_seconds)
+            self._stats["scheduled"] += 1
+        future.add_done_callback(self._on_done)
+        return True
+
+    def take(self, key: Hashable) -> Optional[Any]:
+        """
+        Remove and return the prefetched result for a key.
+
+        Waits up to ``wait_timeout`` seconds if the prefetch is still running; a prefetch
+        that needs longer is discarded so the request is not held up by it.
+
+        Args:
+            key: Slot key
+
+        Returns:
+            Prefetched result, or None on a miss
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                self._stats["misses"] += 1
+                return None
+
+        try:
+            result = slot.future.result(timeout=self.wait_timeout)
+        except FutureTimeoutError:
+            # Too slow to help this request; the result is thrown away
+            slot.future.cancel()
+            self._increment("misses")
+            self._increment("waste")
+            return None
+        except Exception:
+            self._increment("misses")
+            return None
+
+        self._increment("hits")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of prefetch counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["slots"] = len(self._slots)
+        return snapshot
+
+    def shutdown(self) -> None:
+        """Stop the background pool without waiting for pending prefetches."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _increment(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _on_done(self, future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            self._increment("errors")
+
+    def _expire(self, now: float) -> None:
+        """Drop expired slots. Must be called with the lock held."""
+        for key in [k for k, slot in self._slots.items() if slot.expires_at <= now]:
+            self._discard(self._slots.pop(key))
+
+    def _discard(self, slot: _Slot) -> None:
+        """Count an unused slot as waste. Must be called with the lock held."""
+        slot.future.cancel()
+        self._stats["waste"] += 1
+
+
+_shared_prefetcher: Optional[QuizPrefetcher] = None
+_shared_prefetcher_lock = threading.Lock()
+
+
+def get_quiz_prefetcher() -> Optional[QuizPrefetcher]:
+    """
+    Return the process-wide quiz prefetcher, or None if prefetching is disabled.
+
+    Environment variables:
+        QUIZ_PREFETCH_ENABLED: "true" to enable prefetching (default: "true")
+        QUIZ_PREFETCH_MAX_SLOTS: Maximum parked prefetches (default: 256)
+        QUIZ_PREFETCH_TTL_SECONDS: Seconds a prefetched quiz stays usable (default: 600)
+        QUIZ_PREFETCH_WORKERS: Background prefetch threads (default: 2)
+        QUIZ_PREFETCH_WAIT_TIMEOUT: Seconds to wait for a running prefetch (default: 0.2)
+    """
+    global _shared_prefetcher
+    if os.getenv("QUIZ_PREFETCH_ENABLED", "true").lower() != "true":
+        return None
+    if _shared_prefetcher is None:
+        with _shared_prefetcher_lock:
+            if _shared_prefetcher is None:
+                _shared_prefetcher = QuizPrefetcher(
+                    max_slots=int(os.getenv("QUIZ_PREFETCH_MAX_SLOTS", "256")),
+                    ttl_seconds=float(os.getenv("QUIZ_PREFETCH_TTL_SECONDS", "600")),
+                    max_workers=int(os.getenv("QUIZ_PREFETCH_WORKERS", "2")),
+                    wait_timeout=float(os.getenv("QUIZ_PREFETCH_WAIT_TIMEOUT", "0.2")),
+                )
+    return _shared_prefetcher
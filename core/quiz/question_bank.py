@@ -0,0 +1,298 @@
+"""
+Persistent quiz question bank backed by SQLite.
+
+Validated questions generated from the knowledge base are stored per normalized
+(topic, difficulty), deduplicated by content hash, and served back with an indexed
+query. The bank also records which questions each user has already seen so that
+repeated requests get fresh questions.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic_key TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    question TEXT NOT NULL,
+    choices TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    explanation TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (topic_key, difficulty, content_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_questions_topic ON questions (topic_key, difficulty, id);
+CREATE TABLE IF NOT EXISTS seen_questions (
+    user_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questions (id),
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(frozen=True)
+class Question:
+    """A single 3-choice question stored in the bank."""
+
+    id: int
+    question: str
+    choices: Dict[str, str]
+    answer: str
+    explanation: str
+
+
+def normalize_key(value: Any) -> str:
+    """
+    Normalize a topic or difficulty so that equivalent spellings share a key.
+
+    Args:
+        value: Raw topic or difficulty
+
+    Returns:
+        NFKC-normalized, case-folded string with collapsed whitespace
+    """
+    text = unicodedata.normalize("NFKC", str(value or ""))
+    return " ".join(text.split()).casefold()
+
+
+def validate_quiz(quiz: Any) -> bool:
+    """
+    Check that a quiz dict has the format produced by QuizGeneratorTool.
+
+    Args:
+        quiz: Parsed quiz JSON
+
+    Returns:
+        True if questions/selects/answers/explanations are consistent
+    """
+    if not isinstance(quiz, dict):
+        return False
+    questions = quiz.get("questions")
+    selects = quiz.get("selects")
+    answers = quiz.get("answers")
+    explanations = quiz.get("explanations")
+    if not all(isinstance(v, list) for v in (questions, selects, answers, explanations)):
+        return False
+    if not questions or not (len(questions) == len(selects) == len(answers) == len(explanations)):
+        return False
+    for question, choices, answer, explanation in zip(questions, selects, answers, explanations):
+        if not isinstance(question, str) or not question.strip():
+            return False
+        if not isinstance(choices, dict) or not choices:
+            return False
+        if not all(isinstance(k, str) and isinstance(v, str) for k, v in choices.items()):
+            return False
+        if answer not in choices:
+            return False
+        if not isinstance(explanation, str):
+            return False
+    return True
+
+
+def content_hash(question: str, choices: Dict[str, str]) -> str:
+    """Return a stable hash of a question and its choices."""
+    payload = json.dumps(
+        {"question": normalize_key(question), "choices": {k: normalize_key(v) for k, v in sorted(choices.items())}},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class QuestionBank:
+    """
+    Thread-safe SQLite question bank with lookup by (topic, difficulty).
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Args:
+            path: SQLite database file path (":memory:" for a process-local bank)
+        """
+        self.path = path
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def add_quiz(self, topic: str, difficulty: str, quiz: Dict[str, Any]) -> int:
+        """
+        Store every question of a validated quiz, skipping duplicates.
+
+        Args:
+            topic: Quiz topic
+            difficulty: Quiz difficulty
+            quiz: Quiz dict with questions/selects/answers/explanations
+
+        Returns:
+            Number of newly stored questions
+
+        Raises:
+            ValueError: If the quiz does not have the expected format
+        """
+        if not validate_quiz(quiz):
+            raise ValueError("Invalid quiz format")
+
+        topic_key = normalize_key(topic)
+        difficulty_key = normalize_key(difficulty)
+        now = time.time()
+        rows = [
+            (
+                topic_key,
+                difficulty_key,
+                content_hash(question, choices),
+                question,
+                json.dumps(choices, ensure_ascii=False),
+                answer,
+                explanation,
+                now,
+            )
+            for question, choices, answer, explanation in zip(
+                quiz["questions"], quiz["selects"], quiz["answers"], quiz["explanations"]
+            )
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO questions "
+                "(topic_key, difficulty, content_hash, question, choices, answer, explanation, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def draw(self, topic: str, difficulty: str, count: int, user_id: Optional[str] = None) -> List[Question]:
+        """
+        Return up to ``count`` questions the user has not seen yet (oldest first).
+        The questions are not marked as seen; call mark_seen() once they are served.
+
+        Args:
+            topic: Quiz topic
+            difficulty: Quiz difficulty
+            count: Maximum number of questions
+            user_id: User whose seen questions are excluded (None: no exclusion)
+
+        Returns:
+            List of Question objects
+        """
+        params = [normalize_key(topic), normalize_key(difficulty)]
+        query = "SELECT id, question, choices, answer, explanation FROM questions q WHERE topic_key = ? AND difficulty = ?"
+        if user_id is not None:
+            query += " AND NOT EXISTS (SELECT 1 FROM seen_questions s WHERE s.user_id = ? AND s.question_id = q.id)"
+            params.append(user_id)
+        query += " ORDER BY id LIMIT ?"
+        params.append(max(0, count))
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            Question(
+                id=row["id"],
+                question=row["question"],
+                choices=json.loads(row["choices"]),
+                answer=row["answer"],
+                explanation=row["explanation"],
+            )
+            for row in rows
+        ]
+
+    def available(self, topic: str, difficulty: str, user_id: Optional[str] = None) -> int:
+        """
+        Count questions available for a topic and difficulty.
+
+        Args:
+            topic: Quiz topic
+            difficulty: Quiz difficulty
+            user_id: If given, only questions this user has not seen are counted
+
+        Returns:
+            Number of available questions
+        """
+        params = [normalize_key(topic), normalize_key(difficulty)]
+        query = "SELECT COUNT(*) FROM questions q WHERE topic_key = ? AND difficulty = ?"
+        if user_id is not None:
+            query += " AND NOT EXISTS (SELECT 1 FROM seen_questions s WHERE s.user_id = ? AND s.question_id = q.id)"
+            params.append(user_id)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def mark_seen(self, user_id: str, question_ids: Iterable[int]) -> None:
+        """
+        Record that a user has been served the given questions.
+
+        Args:
+            user_id: User ID
+            question_ids: IDs of the served questions
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_questions (user_id, question_id, seen_at) VALUES (?, ?, ?)",
+                [(user_id, question_id, now) for question_id in question_ids],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def to_quiz(questions: List[Question]) -> Dict[str, Any]:
+        """
+        Convert questions to the JSON structure returned by QuizGeneratorTool.
+
+        Args:
+            questions: Questions to include
+
+        Returns:
+            Quiz dict with questions/selects/answers/explanations
+        """
+        return {
+            "questions": [q.question for q in questions],
+            "selects": [q.choices for q in questions],
+            "answers": [q.answer for q in questions],
+            "explanations": [q.explanation for q in questions],
+        }
+
+
+_shared_bank: Optional[QuestionBank] = None
+_shared_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    """
+    Return the process-wide question bank.
+
+    Environment variables:
+        QUIZ_BANK_PATH: SQLite file path (default: <tmpdir>/senpai_quiz_bank.sqlite3)
+    """
+    global _shared_bank
+    if _shared_bank is None:
+        with _shared_bank_lock:
+            if _shared_bank is None:
+                _shared_bank = QuestionBank(
+                    os.getenv("QUIZ_BANK_PATH", os.path.join(tempfile.gettempdir(), "senpai_quiz_bank.sqlite3"))
+                )
+    return _shared_bank
@@ -1,15 +1,201 @@
 from core.tools.tool_interface import Tool
 from core.tools.tool_factory import ToolFactory
+from core.tools.result_cache import CACHE_PURE
+import ast
 import math
 import operator
+from functools import lru_cache
+
+# 評価の上限（LLMが生成した数式で1つのコアを占有させないため）
+MAX_EXPRESSION_LENGTH = 1000
+MAX_OPERATIONS = 1000
+MAX_EXPONENT = 10000
+MAX_RESULT_DIGITS = 300
+MAX_RESULT_MAGNITUDE = 10.0 ** MAX_RESULT_DIGITS
+MAX_ROUND_DIGITS = 100
+
+
+class CalculationLimitError(Exception):
+    """数式が評価の上限（指数・結果の大きさ・演算回数）を超えた"""
+
+
+def _check(value):
+    """結果の大きさを検査する"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        if value.bit_length() > MAX_RESULT_DIGITS * 3.33:
+            raise CalculationLimitError(f"結果が大きすぎます (上限 10^{MAX_RESULT_DIGITS})")
+    elif isinstance(value, (float, complex)) and abs(value) > MAX_RESULT_MAGNITUDE:
+        raise CalculationLimitError(f"結果が大きすぎます (上限 10^{MAX_RESULT_DIGITS})")
+    return value
+
+
+def _numbers(op):
+    """
+    数値同士の演算だけを許可する
+    （リストの乗算・連結で巨大なシーケンスを作らせないため。[1]*10**9 など）
+    """
+    def numeric(left, right):
+        for value in (left, right):
+            if not isinstance(value, (int, float, complex)):
+                raise TypeError("数値以外は演算できません")
+        return op(left, right)
+    return numeric
+
+
+def _pow(base, exponent, modulo=None):
+    """指数と結果の桁数を事前に見積もってから計算するpow"""
+    if modulo is not None:
+        # 3引数のpowは剰余をとりながら計算するため、結果は剰余より大きくならない
+        return pow(base, exponent, modulo)
+    if isinstance(exponent, (int, float)) and abs(exponent) > MAX_EXPONENT:
+        raise CalculationLimitError(f"指数が大きすぎます (上限 {MAX_EXPONENT})")
+    magnitude = abs(base)
+    if isinstance(exponent, (int, float)) and magnitude not in (0, 1) and not math.isinf(magnitude):
+        if exponent * math.log10(magnitude) > MAX_RESULT_DIGITS:
+            raise CalculationLimitError(f"結果が大きすぎます (上限 10^{MAX_RESULT_DIGITS})")
+    return base ** exponent
+
+
+def _round(number, ndigits=None):
+    if ndigits is not None and abs(ndigits) > MAX_ROUND_DIGITS:
+        raise CalculationLimitError(f"桁数が大きすぎます (上限 {MAX_ROUND_DIGITS})")
+    return round(number) if ndigits is None else round(number, ndigits)
+
+
+# 呼び出せる関数と定数（モジュール読み込み時に一度だけ作成）
+FUNCTIONS = {
+    "abs": abs, "round": _round, "min": min, "max": max,
+    "sum": sum, "pow": _pow,
+    "sqrt": math.sqrt, "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "log": math.log, "log10": math.log10, "exp": math.exp,
+    "ceil": math.ceil, "floor": math.floor,
+    "degrees": math.degrees, "radians": math.radians,
+    "add": _numbers(operator.add), "sub": _numbers(operator.sub),
+    "mul": _numbers(operator.mul), "truediv": _numbers(operator.truediv),
+}
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+_BINARY_OPERATORS = {
+    ast.Add: _numbers(operator.add),
+    ast.Sub: _numbers(operator.sub),
+    ast.Mult: _numbers(operator.mul),
+    ast.Div: _numbers(operator.truediv),
+    ast.FloorDiv: _numbers(operator.floordiv),
+    ast.Mod: _numbers(operator.mod),
+    ast.Pow: _numbers(_pow),
+}
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+class _Budget:
+    """1回の評価で実行できる演算回数"""
+
+    __slots__ = ("remaining",)
+
+    def __init__(self, operations: int):
+        self.remaining = operations
+
+    def spend(self):
+        self.remaining -= 1
+        if self.remaining < 0:
+            raise CalculationLimitError(f"演算回数が多すぎます (上限 {MAX_OPERATIONS})")
+
+
+def _compile_node(node):
+    """
+    ホワイトリストにあるASTノードだけをクロージャに変換する
+    (Name, Attribute, Subscript, Lambda などは受け付けない)
+    """
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float, complex)):
+            raise SyntaxError(f"unsupported constant: {value!r}")
+        _check(value)
+        return lambda budget: value
+
+    if isinstance(node, ast.Name):
+        if node.id not in CONSTANTS:
+            raise SyntaxError(f"unknown name: {node.id}")
+        value = CONSTANTS[node.id]
+        return lambda budget: value
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        op = _BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left), _compile_node(node.right)
+
+        def binary(budget):
+            budget.spend()
+            return _check(op(left(budget), right(budget)))
+        return binary
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        op = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand)
+
+        def unary(budget):
+            budget.spend()
+            return op(operand(budget))
+        return unary
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        items = [_compile_node(item) for item in node.elts]
+
+        def sequence(budget):
+            budget.spend()
+            return [item(budget) for item in items]
+        return sequence
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        if node.func.id not in FUNCTIONS:
+            raise SyntaxError(f"unknown function: {node.func.id}")
+        func = FUNCTIONS[node.func.id]
+        args = [_compile_node(arg) for arg in node.args]
+
+        def call(budget):
+            budget.spend()
+            return _check(func(*[arg(budget) for arg in args]))
+        return call
+
+    raise SyntaxError(f"unsupported expression: {type(node).__name__}")
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str):
+    """
+    数式を解析して評価関数に変換する（同じ数式はLRUキャッシュから返す）
+
+    Args:
+        expression: 数式
+
+    Returns:
+        引数なしで呼び出すと計算結果を返す関数
+
+    Raises:
+        SyntaxError: 数式が無効、または許可されていない構文を含む
+        CalculationLimitError: 数式が長すぎる
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculationLimitError(f"数式が長すぎます (上限 {MAX_EXPRESSION_LENGTH}文字)")
+    evaluate = _compile_node(ast.parse(expression.strip(), mode="eval").body)
+    return lambda: evaluate(_Budget(MAX_OPERATIONS))
+
 
 @ToolFactory.register_tool
 class CalculatorTool(Tool):
-    
+
+    # 同じ数式の結果は引数だけで決まるため、ユーザー間で共有してよい
+    cache_policy = CACHE_PURE
+    cache_ttl = 3600.0
+
     def __init__(self):
         """Initialize the CalculatorTool."""
         super().__init__()
-    
+
     @property
     def name(self):
         return "calculator"
@@ -20,20 +206,10 @@ class CalculatorTool(Tool):
 
     def run(self, expression: str) -> str:
         try:
-            safe_dict = {
-                "__builtins__": {},
-                "abs": abs, "round": round, "min": min, "max": max,
-                "sum": sum, "pow": pow,
-                "sqrt": math.sqrt, "sin": math.sin, "cos": math.cos, "tan": math.tan,
-                "log": math.log, "log10": math.log10, "exp": math.exp,
-                "pi": math.pi, "e": math.e,
-                "ceil": math.ceil, "floor": math.floor,
-                "degrees": math.degrees, "radians": math.radians,
-                "add": operator.add, "sub": operator.sub,
-                "mul": operator.mul, "truediv": operator.truediv,
-            }
-            result = eval(expression, safe_dict)
+            result = compile_expression(expression)()
             return str(result)
+        except CalculationLimitError as e:
+            return f"エラー: 計算の上限を超えました - {str(e)}"
         except ZeroDivisionError:
             return "エラー: ゼロ除算"
         except ValueError as e:
@@ -42,3 +218,7 @@ class CalculatorTool(Tool):
             return "エラー: 無効な数式"
         except Exception as e:
             return f"エラー: {str(e)}"
+
+    def result_status(self, result):
+        """エラーは例外ではなく文字列で返すため、メトリクスには"error"として記録する"""
+        return "error" if result.startswith("エラー:") else "ok"
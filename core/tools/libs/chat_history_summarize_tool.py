@@ -1,28 +1,44 @@
-import boto3
 import json
 import os
 from typing import Dict, List, Any, Optional
 
-from bedrock_agentcore.memory import MemoryClient
+from core.aws import get_memory_client
 from core.tools.tool_interface import Tool
 from core.tools.tool_factory import ToolFactory
-from core.logger import setup_logger
+from core.tools.result_cache import CACHE_CONTEXT
+from core.logger import get_logger
+from core.memory import get_session_history_cache
+from core.metrics import MEMORY_LATENCY, track_stage
+from core.tracing import start_span
 
 @ToolFactory.register_tool
 class Chat_history_summarize_tool(Tool):
 
-    memory_client = MemoryClient(region_name=os.getenv("AWS_REGION", "us-west-2")) if not hasattr(Tool, 'memory_client') else Tool.memory_client
+    history_cache = get_session_history_cache()
+
+    # Memoize per user, session and request: repeated history requests within one turn
+    # are answered once, while the next turn (after the history changed) reads it again
+    cache_policy = CACHE_CONTEXT
+    cache_ttl = 300.0
+    cache_context_keys = ("memory_id", "actor_id", "user_id", "session_id", "request_id")
+
+    # Fail fast while AgentCore Memory is degraded instead of holding the tool node
+    timeout_seconds = 5.0
+    circuit_failure_threshold = 3
+    circuit_reset_seconds = 30.0
 
     """
     Chat history summarize tool for retrieving and summarizing short-term memory
     from AWS Bedrock AgentCore Memory. This tool can be used across multiple agents
-    to provide conversation context and history.
+    to provide conversation context and history. Main-branch history is served from
+    the in-process session history cache and only falls back to Memory on a miss.
     """
 
     def __init__(self):
         """Initialize the tool with context support."""
         super().__init__()
-        self.logger = setup_logger(name="ChatHistorySummarizeTool", level=os.getenv("LOG_LEVEL", "INFO"))
+        # Use the application's logging setup; tools are loaded lazily on the first request
+        self.logger = get_logger("senpai.chat_history_summarize")
         self.logger.info("ChatHistorySummarizeTool initialized")
 
     def run(self, *args, **kwargs) -> str:
@@ -61,35 +77,44 @@ class Chat_history_summarize_tool(Tool):
         if not session_id:
             return "Session ID not available in context. Cannot retrieve chat history."
 
-        try:
+        # Serve main-branch history from the local cache when possible
+        turns = None
+        if include_branch is None:
+            with track_stage(MEMORY_LATENCY, operation="read_cached") as stage:
+                turns = self.history_cache.get_turns(memory_id, actor_id, session_id, max_turns)
+                if turns is None:
+                    stage["status"] = "miss"
+
+        if turns is not None:
+            self.logger.info(f"Retrieved {len(turns)} turns from history cache for actor_id={actor_id}, session_id={session_id}")
+        else:
             # Retrieve the last K conversation turns from short-term memory
-            turns = self.memory_client.get_last_k_turns(
-                memory_id=memory_id,
-                actor_id=actor_id,
-                session_id=session_id,
-                k=max_turns,
-                branch_name=include_branch,
-                include_branches=False,
-                max_results=max_turns * 10  # Allow for multiple messages per turn
-            )
+            with start_span("memory.get_last_k_turns", **{"senpai.max_turns": max_turns}), \
+                    track_stage(MEMORY_LATENCY, operation="read"):
+                turns = self.memory_client.get_last_k_turns(
+                    memory_id=memory_id,
+                    actor_id=actor_id,
+                    session_id=session_id,
+                    k=max_turns,
+                    branch_name=include_branch,
+                    include_branches=False,
+                    max_results=max_turns * 10  # Allow for multiple messages per turn
+                )
+            if include_branch is None:
+                self.history_cache.put_turns(memory_id, actor_id, session_id, turns, max_turns)
             self.logger.info(f"Retrieved {len(turns)} turns from memory for actor_id={actor_id}, session_id={session_id}")
-            self.logger.debug(f"Turns data: {turns}")
+        self.logger.debug(f"Turns data: {turns}")
 
-            if not turns:
-                return "No chat history found for the current session."
-            
-            # Format the output based on requested format
-            if format_type == "json":
-                return json.dumps(turns, indent=2, default=str)
-            elif format_type == "full":
-                return self._format_full_history(turns)
-            else:  # summary format (default)
-                return self._format_summary(turns)
-                
-        except Exception as e:
-            error_msg = f"Failed to retrieve chat history: {str(e)}"
-            print(error_msg)  # Log for debugging
-            return error_msg  # Return user-friendly error instead of raising
+        if not turns:
+            return "No chat history found for the current session."
+        
+        # Format the output based on requested format
+        if format_type == "json":
+            return json.dumps(turns, indent=2, default=str)
+        elif format_type == "full":
+            return self._format_full_history(turns)
+        else:  # summary format (default)
+            return self._format_summary(turns)
     
     def _format_summary(self, turns: List[List[Dict[str, Any]]]) -> str:
         """
@@ -162,6 +187,27 @@ class Chat_history_summarize_tool(Tool):
         
         return "\n".join(formatted_parts)
 
+    def fallback(self, error: Exception, args, kwargs) -> str:
+        """Return a user-friendly error for failed, timed out or rejected retrievals."""
+        error_msg = f"Failed to retrieve chat history: {str(error)}"
+        print(error_msg)  # Log for debugging
+        return error_msg
+
+    def is_cacheable_result(self, result: Any) -> bool:
+        """Do not cache retrieval failures or missing context."""
+        return not (result.startswith("Failed to retrieve") or "not available in context" in result)
+
+    def result_status(self, result: Any) -> str:
+        """Record missing context as an error (retrieval failures go through fallback())."""
+        return "error" if "not available in context" in result else "ok"
+
+    @property
+    def memory_client(self):
+        """
+        Shared MemoryClient from the client registry (created on first use).
+        """
+        return get_memory_client(os.getenv("AWS_REGION", "us-west-2"))
+
     @property
     def name(self) -> str:
         """
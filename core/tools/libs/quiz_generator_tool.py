@@ -1,9 +1,18 @@
+from core.logger import get_logger
 from core.tools.tool_interface import Tool
 from core.tools.tool_factory import ToolFactory
-import boto3
+from core.aws import get_client
+from core.tools.resilience import CIRCUIT_CLOSED, CircuitOpenError, ToolTimeoutError, get_tool_guard
+from core.tools.singleflight import get_single_flight
+from core.quiz import get_question_bank, get_quiz_prefetcher, normalize_key, validate_quiz
+from core.tracing import start_span
 import json
 import os
 
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = get_logger("senpai.quiz")
+
 @ToolFactory.register_tool
 class QuizGeneratorTool(Tool):
     """
@@ -14,6 +23,16 @@ class QuizGeneratorTool(Tool):
     - bedrock-agent-runtime:Retrieve
     - bedrock-agent-runtime:RetrieveAndGenerate
     """
+
+    # Knowledge Baseが劣化しているときに待ち続けないよう、期限とサーキットブレーカーをかける
+    # （失敗・タイムアウト・遮断中はfallback()のプレースホルダー問題集を返す）
+    # run()全体ではなくKnowledge Baseの呼び出しだけを保護する。同時に同じ生成を待つ呼び出しは
+    # 1回の生成を共有するため、その失敗が待っていた呼び出しの数だけ回路に数えられないようにする
+    kb_timeout_seconds = 30.0
+    circuit_failure_threshold = 3
+    circuit_reset_seconds = 60.0
+    # 生成結果のJSONが不正な場合（ValueError）はKnowledge Baseの障害ではないので回路に数えない
+    circuit_failure_types = (ClientError, BotoCoreError)
     
     def __init__(self):
         """Initialize the QuizGeneratorTool."""
@@ -29,7 +48,12 @@ class QuizGeneratorTool(Tool):
 
     def run(self, *args, **kwargs):
         """
-        Bedrock Knowledgebaseから3択問題集をJSON形式で生成する
+        3択問題集をJSON形式で返す
+        先読み済みの問題があればそれを返し、なければローカルの問題バンクから未出題の問題を返す
+        バンクの問題が足りない場合のみBedrock Knowledgebaseで問題を生成して補充する
+        同じトピック・難易度の生成が同時に走る場合は1回の生成にまとめる
+        返却後、同じユーザー・トピック・難易度の次の問題集をバックグラウンドで先読みする
+        問題集を用意できない場合は例外を送出する（fallback()で代替の問題集を返す）
         kwargs:
         topic: 問題のトピック（デフォルト: "IT知識"）
         difficulty: 難易度（初級、中級、上級）（デフォルト
@@ -40,20 +64,99 @@ class QuizGeneratorTool(Tool):
         kwargs = kwargs.get("kwargs", {})
         topic = kwargs.get('topic', 'IT知識')
         difficulty = kwargs.get('difficulty', '初級')
-        num_questions = kwargs.get('num_questions', 3)
-        try:
-            kb = boto3.client("bedrock-agent-runtime", region_name=os.getenv("AWS_REGION", "us-west-2"))
-            
-            query = f"""Please create {num_questions} multiple-choice questions at {difficulty} level about {topic}, with different types of questions.
-            Please respond in the following JSON format:
-            {{
-                "questions": ["Question 1 text", "Question 2 text", ...],
-                "selects": [{{"A": "Choice A text", "B": "Choice B text", "C": "Choice C text"}}, ...],
-                "answers": ["A", "B", ...],
-                "explanations": ["Explanation 1 text", "Explanation 2 text", ...]
-            }}
-            Each question should be in 3-choice format (A, B, C) and suitable for learning purposes."""
-            
+        num_questions = int(kwargs.get('num_questions', 3))
+        user_id = self.get_context("actor_id") or self.get_context("user_id") or "anonymous"
+        bank = get_question_bank()
+        prefetcher = get_quiz_prefetcher()
+        prefetch_key = (user_id, normalize_key(topic), normalize_key(difficulty), num_questions)
+
+        prepared = prefetcher.take(prefetch_key) if prefetcher is not None else None
+        if prepared is None:
+            prepared = self._prepare_quiz(bank, topic, difficulty, num_questions, user_id)
+
+        quiz, question_ids = prepared
+        if question_ids:
+            bank.mark_seen(user_id, question_ids)
+
+        # 次の問題集を先読み（出題済みとして記録した後なので今回の問題は含まれない）
+        # Knowledge Baseへの回路が閉じていない間は先読みしない
+        if prefetcher is not None and self._kb_guard().breaker.state == CIRCUIT_CLOSED:
+            prefetcher.schedule(
+                prefetch_key,
+                lambda: self._prepare_quiz(bank, topic, difficulty, num_questions, user_id),
+            )
+        return json.dumps(quiz, ensure_ascii=False)
+
+    def _prepare_quiz(self, bank, topic, difficulty, num_questions, user_id):
+        """
+        問題集を用意して(quiz, question_ids)を返す（出題済みの記録は呼び出し側で行う）
+        問題バンクの在庫が足りない場合のみLLMで補充する
+        """
+        questions = bank.draw(topic, difficulty, num_questions, user_id=user_id)
+        if len(questions) >= num_questions:
+            return bank.to_quiz(questions), [q.id for q in questions]
+
+        # 在庫が少ないトピックのみLLMで補充する
+        generate_count = max(num_questions, int(os.getenv("QUIZ_BANK_TOPUP_QUESTIONS", "5")))
+        generated = self._top_up(bank, topic, difficulty, generate_count)
+
+        questions = bank.draw(topic, difficulty, num_questions, user_id=user_id)
+        if len(questions) >= num_questions:
+            return bank.to_quiz(questions), [q.id for q in questions]
+
+        # 生成された問題が既出のものと重複した場合は生成結果をそのまま返す
+        return {key: values[:num_questions] for key, values in generated.items()}, []
+
+    def _top_up(self, bank, topic, difficulty, generate_count):
+        """
+        Knowledge Baseで問題を生成して問題バンクに補充し、生成結果を返す
+        同じ(トピック, 難易度, 問題数)の生成が実行中なら新たに生成せず、その結果を共有する
+        （研修の開始直後に同じ問題集の依頼が集中してもBedrockへの呼び出しは1回になる）
+        期限とサーキットブレーカーは生成を実行する呼び出しだけにかかり、失敗は1回だけ数えられる
+        """
+        guard = self._kb_guard()
+
+        def generate():
+            generated = guard.call(self._generate_quiz, topic, difficulty, generate_count)
+            stored = bank.add_quiz(topic, difficulty, generated)
+            logger.debug("Stored generated questions in quiz bank", extra={
+                "stored": stored, "topic": topic, "difficulty": difficulty,
+            })
+            return generated
+
+        if os.getenv("QUIZ_SINGLEFLIGHT_ENABLED", "true").lower() != "true":
+            return generate()
+        flight = get_single_flight(
+            "quiz_generation",
+            wait_timeout=float(os.getenv("QUIZ_SINGLEFLIGHT_WAIT_TIMEOUT", "30")),
+        )
+        return flight.do((normalize_key(topic), normalize_key(difficulty), generate_count), generate)
+
+    def _kb_guard(self):
+        """Knowledge Base呼び出しの期限とサーキットブレーカー（ツール名で共有）"""
+        return get_tool_guard(
+            self.name,
+            self.kb_timeout_seconds,
+            failure_threshold=self.circuit_failure_threshold,
+            reset_seconds=self.circuit_reset_seconds,
+            failure_types=self.circuit_failure_types,
+        )
+
+    def _generate_quiz(self, topic, difficulty, num_questions):
+        """Bedrock Knowledgebaseから3択問題集を生成し、検証済みのdictを返す"""
+        kb = get_client("bedrock-agent-runtime", os.getenv("AWS_REGION", "us-west-2"))
+        
+        query = f"""Please create {num_questions} multiple-choice questions at {difficulty} level about {topic}, with different types of questions.
+        Please respond in the following JSON format:
+        {{
+            "questions": ["Question 1 text", "Question 2 text", ...],
+            "selects": [{{"A": "Choice A text", "B": "Choice B text", "C": "Choice C text"}}, ...],
+            "answers": ["A", "B", ...],
+            "explanations": ["Explanation 1 text", "Explanation 2 text", ...]
+        }}
+        Each question should be in 3-choice format (A, B, C) and suitable for learning purposes."""
+        
+        with start_span("kb.retrieve_and_generate", **{"senpai.quiz.topic": topic, "senpai.quiz.num_questions": num_questions}):
             response = kb.retrieve_and_generate(
                 input={"text": query},
                 retrieveAndGenerateConfiguration={
@@ -76,29 +179,42 @@ class QuizGeneratorTool(Tool):
                     },
                 },
             )
-            
-            quiz_content = response["output"]["text"]
-            
-            # JSONを抽出・パース
-            start = quiz_content.find('{')
-            end = quiz_content.rfind('}') + 1
-            if start != -1 and end != 0:
-                json_str = quiz_content[start:end]
-                quiz_data = json.loads(json_str)
-                # print(json.dumps(quiz_data, ensure_ascii=False, indent=2))
-                return json.dumps(quiz_data, ensure_ascii=False)
-            else:
-                raise ValueError("JSON形式が見つからない")
-            
-        except Exception as e:
-            print(f"Error generating quiz: {e}")
-            print(f"Error type: {type(e).__name__}")
-            if "AccessDenied" in str(e) or "UnauthorizedOperation" in str(e):
+        
+        quiz_content = response["output"]["text"]
+        
+        # JSONを抽出・パース
+        start = quiz_content.find('{')
+        end = quiz_content.rfind('}') + 1
+        if start != -1 and end != 0:
+            json_str = quiz_content[start:end]
+            quiz_data = json.loads(json_str)
+            if not validate_quiz(quiz_data):
+                raise ValueError("問題集のJSON形式が不正")
+            return quiz_data
+        else:
+            raise ValueError("JSON形式が見つからない")
+
+    def fallback(self, error, args, kwargs):
+        """問題集を用意できなかった場合（失敗・タイムアウト・遮断中）はプレースホルダーの問題集を返す"""
+        params = kwargs.get("kwargs", {})
+        topic = params.get('topic', 'IT知識')
+        num_questions = int(params.get('num_questions', 3))
+        if isinstance(error, CircuitOpenError):
+            print(f"Quiz generation skipped: {error}")
+        elif isinstance(error, ToolTimeoutError):
+            print(f"Quiz generation timed out: {error}")
+        else:
+            print(f"Error generating quiz: {error}")
+            print(f"Error type: {type(error).__name__}")
+            if "AccessDenied" in str(error) or "UnauthorizedOperation" in str(error):
                 print("権限エラー: bedrock-agent-runtime:RetrieveAndGenerate権限が必要です")
-            # フォールバック: 手動でJSON作成
-            return json.dumps({
-                "questions": [f"{topic}に関する問題{i+1}" for i in range(num_questions)],
-                "selects": [{"A": "選択肢A", "B": "選択肢B", "C": "選択肢C"} for _ in range(num_questions)],
-                "answers": ["A"] * num_questions,
-                "explanations": [f"問題{i+1}の解説" for i in range(num_questions)]
-            }, ensure_ascii=False)
+        return json.dumps(self._fallback_quiz(topic, num_questions), ensure_ascii=False)
+
+    def _fallback_quiz(self, topic, num_questions):
+        """フォールバック: 手動でJSON作成"""
+        return {
+            "questions": [f"{topic}に関する問題{i+1}" for i in range(num_questions)],
+            "selects": [{"A": "選択肢A", "B": "選択肢B", "C": "選択肢C"} for _ in range(num_questions)],
+            "answers": ["A"] * num_questions,
+            "explanations": [f"問題{i+1}の解説" for i in range(num_questions)]
+        }
@@ -0,0 +1,292 @@
+"""
+Deadlines and circuit breakers for tools that call remote services.
+
+A tool opts in with class attributes on Tool:
+
+    timeout_seconds = 20.0           # deadline per call (None: no guard)
+    circuit_failure_threshold = 3    # consecutive failures that open the circuit
+    circuit_reset_seconds = 30.0     # time the circuit stays open before a probe
+    circuit_failure_types = (ClientError, BotoCoreError)  # errors that count (default: any)
+
+Guarded calls run on a small bounded pool per tool, so a hung dependency holds at
+most that many threads while callers give up at the deadline. After
+circuit_failure_threshold consecutive failures or timeouts the circuit opens and
+calls are rejected immediately; after circuit_reset_seconds a single probe call is
+let through (half-open) and its outcome closes or re-opens the circuit. Failed,
+timed out and rejected calls are answered by the tool's fallback().
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from core.metrics import TOOL_CIRCUIT_STATE, register_stats
+from .tool_context import submit_with_context
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_HALF_OPEN = "half_open"
+CIRCUIT_OPEN = "open"
+
+_STATE_VALUES = {CIRCUIT_CLOSED: 0, CIRCUIT_HALF_OPEN: 1, CIRCUIT_OPEN: 2}
+
+DEFAULT_GUARD_WORKERS = 8
+
+
+class ToolTimeoutError(TimeoutError):
+    """A guarded tool call did not finish before its deadline."""
+
+
+class CircuitOpenError(RuntimeError):
+    """A guarded tool call was rejected because the tool's circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit for tool '{name}' is open; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure circuit breaker with half-open probing."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: Seconds the circuit stays open before a probe is allowed
+            clock: Monotonic time source (for tests)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+
+        self._state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        """Current state (open turns into half-open once reset_seconds have passed)."""
+        with self._lock:
+            return self._current_state()
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 if not open)."""
+        with self._lock:
+            if self._current_state() != CIRCUIT_OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_seconds - self._clock())
+
+    def allow(self) -> bool:
+        """
+        Reserve a call. Every allowed call must be followed by record_success(),
+        record_failure() or release().
+
+        Returns:
+            False if the call must be rejected
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CIRCUIT_CLOSED:
+                return True
+            if state == CIRCUIT_HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call; a successful probe closes the circuit."""
+        with self._lock:
+            self._stats["successes"] += 1
+            self._failures = 0
+            self._probing = False
+            self._state = CIRCUIT_CLOSED
+
+    def record_failure(self) -> None:
+        """Record a failed or timed out call; a failed probe re-opens the circuit."""
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            was_probing, self._probing = self._probing, False
+            if was_probing or self._failures >= self.failure_threshold:
+                if self._state != CIRCUIT_OPEN:
+                    self._stats["opened"] += 1
+                self._state = CIRCUIT_OPEN
+                self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """Give back a reservation whose call was abandoned (e.g. cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of breaker counters and state."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["state"] = _STATE_VALUES[self._current_state()]
+            snapshot["consecutive_failures"] = self._failures
+        return snapshot
+
+    def _current_state(self) -> str:
+        if self._state == CIRCUIT_OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+            self._state = CIRCUIT_HALF_OPEN
+        return self._state
+
+
+class ToolGuard:
+    """Deadline and circuit breaker for the calls of one tool."""
+
+    def __init__(
+        self,
+        name: str,
+        timeout_seconds: Optional[float],
+        breaker: CircuitBreaker,
+        max_workers: int = DEFAULT_GUARD_WORKERS,
+        failure_types: Tuple[Type[BaseException], ...] = (Exception,),
+    ):
+        """
+        Args:
+            name: Tool name
+            timeout_seconds: Deadline per call (None: no deadline)
+            breaker: Circuit breaker of the tool
+            max_workers: Threads available to blocking calls of the tool
+            failure_types: Exceptions that count as dependency failures (timeouts always count)
+        """
+        self.name = name
+        self.timeout_seconds = timeout_seconds
+        self.breaker = breaker
+        self.failure_types = tuple(failure_types)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"senpai-guard-{name}")
+        self._timeouts = 0
+
+    def call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking call under the deadline and circuit breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            ToolTimeoutError: If the call missed its deadline
+        """
+        self._reserve()
+        try:
+            if self.timeout_seconds is None:
+                result = func(*args, **kwargs)
+            else:
+                future = submit_with_context(self._executor, func, *args, **kwargs)
+                try:
+                    result = future.result(timeout=self.timeout_seconds)
+                except FutureTimeoutError:
+                    # The worker keeps running until the dependency returns; a queued call is dropped
+                    future.cancel()
+                    raise self._timeout_error() from None
+        except Exception as e:
+            self._record_error(e)
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def acall(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a call under the deadline and circuit breaker without blocking the event loop.
+        Coroutine functions are awaited directly; blocking functions run on the tool's pool.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            ToolTimeoutError: If the call missed its deadline
+        """
+        self._reserve()
+        try:
+            if asyncio.iscoroutinefunction(func):
+                awaitable = func(*args, **kwargs)
+            else:
+                awaitable = asyncio.wrap_future(submit_with_context(self._executor, func, *args, **kwargs))
+            try:
+                result = await asyncio.wait_for(awaitable, timeout=self.timeout_seconds)
+            except asyncio.TimeoutError:
+                raise self._timeout_error() from None
+        except Exception as e:
+            self._record_error(e)
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Return breaker counters plus the number of timed out calls."""
+        snapshot = self.breaker.stats()
+        snapshot["timeouts"] = self._timeouts
+        return snapshot
+
+    def _record_error(self, error: Exception) -> None:
+        """Count timeouts and failure_types against the circuit; other errors (e.g. invalid output) do not."""
+        if isinstance(error, (ToolTimeoutError,) + self.failure_types):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    def _reserve(self) -> None:
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.name, self.breaker.retry_after())
+
+    def _timeout_error(self) -> ToolTimeoutError:
+        self._timeouts += 1
+        return ToolTimeoutError(f"Tool '{self.name}' timed out after {self.timeout_seconds:.1f}s")
+
+
+_guards: Dict[str, ToolGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_tool_guard(
+    name: str,
+    timeout_seconds: Optional[float],
+    failure_threshold: int = 5,
+    reset_seconds: float = 30.0,
+    max_workers: Optional[int] = None,
+    failure_types: Tuple[Type[BaseException], ...] = (Exception,),
+) -> ToolGuard:
+    """
+    Return the process-wide guard of a tool, creating it on first use.
+    The breaker state is exported as senpai_tool_circuit_state and the guard's
+    counters as senpai_component_stat{component="tool_guard.<name>"}.
+
+    Args:
+        name: Tool name
+        timeout_seconds: Deadline per call (None: no deadline)
+        failure_threshold: Consecutive failures that open the circuit
+        reset_seconds: Seconds the circuit stays open before a probe
+        max_workers: Threads for blocking calls (default: 8)
+        failure_types: Exceptions that count as dependency failures (timeouts always count)
+
+    Returns:
+        Shared ToolGuard (the settings of the first call win)
+    """
+    guard = _guards.get(name)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.get(name)
+            if guard is None:
+                breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_seconds=reset_seconds)
+                guard = ToolGuard(
+                    name, timeout_seconds, breaker,
+                    max_workers=max_workers or DEFAULT_GUARD_WORKERS, failure_types=failure_types,
+                )
+                TOOL_CIRCUIT_STATE.set_function(lambda: _STATE_VALUES[breaker.state], tool=name)
+                register_stats(f"tool_guard.{name}", guard.stats)
+                _guards[name] = guard
+    return guard
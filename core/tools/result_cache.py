@@ -0,0 +1,178 @@
+"""
+Opt-in memoization of tool results.
+
+A tool declares its caching behaviour with class attributes on Tool:
+
+    cache_policy = CACHE_PURE      # result depends only on the arguments
+    cache_policy = CACHE_CONTEXT   # result also depends on request context values
+    cache_ttl = 60.0               # seconds a result stays valid
+    cache_context_keys = (...)     # context values that are part of the key
+
+Keys of context-keyed tools include the listed ToolContext values (and
+"request_id" for per-request memoization), so one user's results are never
+returned to another. All tools share one process-wide LRU cache bounded by entry
+count and total bytes.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Mapping, Optional, Sequence, Tuple
+
+from core.metrics import register_stats
+
+CACHE_PURE = "pure"
+CACHE_CONTEXT = "context"
+
+# Approximate per-entry overhead (key, entry object, OrderedDict node)
+_ENTRY_OVERHEAD_BYTES = 128
+
+
+@dataclass
+class _ResultEntry:
+    value: Any
+    expires_at: float
+    size: int
+
+
+def _value_size(value: Any) -> int:
+    text = value if isinstance(value, str) else repr(value)
+    return len(text.encode("utf-8")) + _ENTRY_OVERHEAD_BYTES
+
+
+def make_cache_key(
+    tool_name: str,
+    args: Sequence[Any],
+    kwargs: Mapping[str, Any],
+    context: Optional[Mapping[str, Any]] = None,
+) -> Tuple[Hashable, ...]:
+    """
+    Build a cache key from the tool name, its arguments and context values.
+
+    Args:
+        tool_name: Tool name
+        args: Positional arguments
+        kwargs: Keyword arguments
+        context: Context values that are part of the key (None for pure tools)
+
+    Returns:
+        Hashable key
+    """
+    arguments = json.dumps([list(args), kwargs], sort_keys=True, ensure_ascii=False, default=repr)
+    context_items = tuple(sorted(context.items())) if context else ()
+    return (tool_name, arguments, context_items)
+
+
+class ToolResultCache:
+    """Thread-safe LRU cache of tool results bounded by entry count, total bytes and TTL."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 8 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum approximate size of all cached results
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[Hashable, _ResultEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Look up the cached result for a key.
+
+        Args:
+            key: Cache key (see make_cache_key)
+
+        Returns:
+            Tuple of (True, value) on a hit, (False, None) on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            if entry.expires_at <= now:
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, entry.value
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: float) -> bool:
+        """
+        Store a result.
+
+        Args:
+            key: Cache key
+            value: Tool result
+            ttl_seconds: Seconds the result stays valid
+
+        Returns:
+            False if the value was not stored (larger than the whole cache, or no TTL)
+        """
+        size = _value_size(value)
+        if size > self.max_bytes or ttl_seconds <= 0:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _ResultEntry(value=value, expires_at=time.monotonic() + ttl_seconds, size=size)
+            self._total_bytes += size
+            self._stats["stores"] += 1
+            while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+        return True
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of cache counters and size."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["entries"] = len(self._entries)
+            snapshot["bytes"] = self._total_bytes
+        return snapshot
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry.size
+
+
+_shared_cache: Optional[ToolResultCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_tool_result_cache() -> ToolResultCache:
+    """
+    Return the process-wide tool result cache, creating it from environment variables.
+
+    Environment variables:
+        TOOL_CACHE_MAX_ENTRIES: Maximum cached results (default: 1024)
+        TOOL_CACHE_MAX_BYTES: Maximum cached bytes (default: 8388608)
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                cache = ToolResultCache(
+                    max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024")),
+                    max_bytes=int(os.getenv("TOOL_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+                )
+                register_stats("tool_result_cache", cache.stats)
+                _shared_cache = cache
+    return _shared_cache
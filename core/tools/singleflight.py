@@ -0,0 +1,147 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+When many requests need the same expensive result at the same moment (a training
+cohort starting a module asks for the same quiz), only the first caller for a key
+runs the call; callers arriving while it is in flight wait for it and receive the
+same result or exception. Nothing is kept after the call completes, so this only
+removes duplicate concurrent work and never serves stale results.
+
+Apply deadlines and circuit breakers (core.tools.resilience) inside the flight,
+around the call that actually runs: a guard around every caller would record one
+shared failure once per coalesced caller and open the circuit for everyone.
+
+    flight = get_single_flight("quiz_generation", wait_timeout=30.0)
+    quiz = flight.do(("it", "beginner", 5), lambda: generate(...))
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from core.metrics import SINGLEFLIGHT_CALLS, register_stats
+from .resilience import ToolTimeoutError
+
+
+class SingleFlightTimeoutError(ToolTimeoutError):
+    """A coalesced caller gave up waiting for the in-flight call."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Group of in-flight calls keyed by the caller.
+
+    Counters:
+        leaders: calls that ran the function
+        coalesced: calls that received the result of another caller's call
+        timeouts: coalesced calls that gave up after wait_timeout
+        errors: calls that ran the function and raised
+    """
+
+    def __init__(self, name: str, wait_timeout: Optional[float] = None):
+        """
+        Args:
+            name: Group name used in metrics
+            wait_timeout: Seconds a coalesced caller waits for the in-flight call (None: no limit)
+        """
+        self.name = name
+        self.wait_timeout = wait_timeout
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"leaders": 0, "coalesced": 0, "timeouts": 0, "errors": 0}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run func for a key, or wait for the call already in flight for that key.
+
+        Args:
+            key: Normalized identity of the call
+            func: Callable producing the result
+
+        Returns:
+            Result of the call (shared by every caller of the flight, so treat it as read-only)
+
+        Raises:
+            SingleFlightTimeoutError: If a coalesced caller waited longer than wait_timeout
+            Exception: Whatever func raised, re-raised in every caller of the flight
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+            else:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+
+        if leader:
+            SINGLEFLIGHT_CALLS.inc(group=self.name, outcome="leader")
+            try:
+                call.result = func()
+            except BaseException as e:
+                call.error = e
+                self._increment("errors")
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+            return call.result
+
+        if not call.done.wait(self.wait_timeout):
+            self._increment("timeouts")
+            SINGLEFLIGHT_CALLS.inc(group=self.name, outcome="timeout")
+            raise SingleFlightTimeoutError(
+                f"Gave up after {self.wait_timeout:.1f}s waiting for in-flight call '{self.name}'"
+            )
+        SINGLEFLIGHT_CALLS.inc(group=self.name, outcome="coalesced")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the counters and the number of calls in flight."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["in_flight"] = len(self._calls)
+        return snapshot
+
+    def _increment(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(name: str, wait_timeout: Optional[float] = None) -> SingleFlight:
+    """
+    Return the process-wide single-flight group of a name, creating it on first use.
+    Calls are counted in senpai_singleflight_calls_total{group,outcome} and the
+    group's counters are exported as senpai_component_stat{component="singleflight.<name>"}.
+
+    Args:
+        name: Group name
+        wait_timeout: Seconds a coalesced caller waits (None: no limit)
+
+    Returns:
+        Shared SingleFlight (the settings of the first call win)
+    """
+    flight = _flights.get(name)
+    if flight is None:
+        with _flights_lock:
+            flight = _flights.get(name)
+            if flight is None:
+                flight = SingleFlight(name, wait_timeout=wait_timeout)
+                register_stats(f"singleflight.{name}", flight.stats)
+                _flights[name] = flight
+    return flight
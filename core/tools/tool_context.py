@@ -0,0 +1,139 @@
+"""
+Request-scoped tool context carried with contextvars.
+
+Each request sets its own ToolContext (memory_id, actor_id, session_id, ...).
+The value follows the request into asyncio tasks, asyncio.to_thread() and
+langchain's executors automatically; for plain ThreadPoolExecutors use
+submit_with_context() so the worker thread sees the caller's context.
+"""
+
+import contextvars
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class ToolContext:
+    """Immutable context information available to tools during a request."""
+
+    memory_id: Optional[str] = None
+    actor_id: Optional[str] = None
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+    extra: Mapping[str, Any] = field(default_factory=dict)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a value from the context.
+
+        Args:
+            key: The context key to retrieve
+            default: Default value if key is not found or unset
+
+        Returns:
+            The context value or default
+        """
+        if key in _FIELD_NAMES:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default)
+
+    def merge(self, values: Mapping[str, Any]) -> "ToolContext":
+        """
+        Return a new context with the given values applied on top of this one.
+
+        Args:
+            values: Context values; unknown keys are stored in ``extra``
+
+        Returns:
+            New ToolContext instance
+        """
+        known = {key: getattr(self, key) for key in _FIELD_NAMES}
+        extra = dict(self.extra)
+        for key, value in values.items():
+            if key in _FIELD_NAMES:
+                known[key] = value
+            else:
+                extra[key] = value
+        return ToolContext(extra=extra, **known)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the context as a flat dictionary of set values."""
+        result = {key: getattr(self, key) for key in _FIELD_NAMES if getattr(self, key) is not None}
+        result.update(self.extra)
+        return result
+
+
+_FIELD_NAMES = tuple(f.name for f in fields(ToolContext) if f.name != "extra")
+
+_current_tool_context: contextvars.ContextVar[ToolContext] = contextvars.ContextVar(
+    "senpai_tool_context", default=ToolContext()
+)
+
+
+def get_tool_context() -> ToolContext:
+    """Return the tool context of the current request."""
+    return _current_tool_context.get()
+
+
+def set_tool_context(context: ToolContext) -> contextvars.Token:
+    """
+    Set the tool context for the current execution context.
+
+    Args:
+        context: ToolContext to activate
+
+    Returns:
+        Token that can be passed to reset_tool_context()
+    """
+    return _current_tool_context.set(context)
+
+
+def reset_tool_context(token: contextvars.Token) -> None:
+    """
+    Restore the tool context that was active before set_tool_context().
+
+    Args:
+        token: Token returned by set_tool_context()
+    """
+    _current_tool_context.reset(token)
+
+
+@contextmanager
+def use_tool_context(context: Optional[ToolContext] = None, **values: Any) -> Iterator[ToolContext]:
+    """
+    Activate a tool context for the duration of a with-block.
+
+    Args:
+        context: Base context (default: the currently active context)
+        **values: Context values applied on top of the base context
+
+    Yields:
+        The active ToolContext
+    """
+    base = context if context is not None else get_tool_context()
+    active = base.merge(values) if values else base
+    token = _current_tool_context.set(active)
+    try:
+        yield active
+    finally:
+        _current_tool_context.reset(token)
+
+
+def submit_with_context(executor: Executor, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """
+    Submit a callable to an executor so that it runs with the caller's contextvars.
+
+    Args:
+        executor: Executor to submit to (e.g. ThreadPoolExecutor)
+        fn: Callable to execute
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        Future of the submitted call
+    """
+    ctx = contextvars.copy_context()
+    return executor.submit(ctx.run, fn, *args, **kwargs)
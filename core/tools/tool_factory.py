@@ -1,24 +1,56 @@
-from typing import Type
+from typing import Dict, List, Optional, Type
 from .tool_interface import Tool
+from .tool_manifest import LazyTool, ToolSpec, load_tool_manifest
 
 
 class ToolFactory:
     """
     Factory for registering and creating tool instances.
+    Tools are registered eagerly with @ToolFactory.register_tool, or lazily from a
+    manifest so that their modules are imported only when first invoked.
     """
     _registry = {}
+    _lazy_registry: Dict[str, ToolSpec] = {}
 
     @classmethod
     def register_tool(cls, tool_cls: Type[Tool]):
         cls._registry[tool_cls.__name__] = tool_cls
         return tool_cls
 
+    @classmethod
+    def register_lazy(cls, spec: ToolSpec) -> None:
+        """
+        Register a tool by manifest entry without importing its module.
+
+        Args:
+            spec: Manifest entry of the tool
+        """
+        cls._lazy_registry[spec.class_name] = spec
+
     @classmethod
     def create_tool(cls, name: str, *args, **kwargs) -> Tool:
-        if name not in cls._registry:
-            raise ValueError(f"Tool '{name}' is not registered.")
-        return cls._registry[name](*args, **kwargs)
+        if name in cls._registry:
+            return cls._registry[name](*args, **kwargs)
+        if name in cls._lazy_registry:
+            return LazyTool(cls._lazy_registry[name])
+        raise ValueError(f"Tool '{name}' is not registered.")
+
+    @classmethod
+    def create_tools_from_manifest(cls, path: str) -> List[Tool]:
+        """
+        Register every tool in a manifest and return lazy tool instances for them.
+
+        Args:
+            path: Path to the JSON tool manifest
+
+        Returns:
+            List of LazyTool instances in manifest order
+        """
+        specs = load_tool_manifest(path)
+        for spec in specs:
+            cls.register_lazy(spec)
+        return [LazyTool(spec) for spec in specs]
 
     @classmethod
     def list_tools(cls):
-        return list(cls._registry.keys())
+        return list(dict.fromkeys(list(cls._registry.keys()) + list(cls._lazy_registry.keys())))
@@ -1,32 +1,67 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Hashable, Optional, Tuple, Type
+
+from core.metrics import TOOL_LATENCY, track_stage
+from core.tracing import start_span
+from .resilience import CircuitOpenError, ToolGuard, ToolTimeoutError, get_tool_guard
+from .result_cache import CACHE_CONTEXT, CACHE_PURE, get_tool_result_cache, make_cache_key
+from .tool_context import get_tool_context, set_tool_context
 
 
 class Tool(ABC):
     """
     Abstract base class for all tools. Contributors should inherit from this class
     and implement the required methods.
+
+    Context (memory_id, actor_id, session_id, ...) is request-scoped: it is stored in a
+    contextvar (see core.tools.tool_context), so concurrent requests never see each
+    other's values.
+
+    Results can be memoized by declaring a cache policy (see core.tools.result_cache):
+    CACHE_PURE tools are keyed by their arguments only; CACHE_CONTEXT tools also by
+    the context values in cache_context_keys ("request_id" memoizes within one request).
+
+    Tools that call remote services can set timeout_seconds to run under a deadline and
+    a circuit breaker (see core.tools.resilience). Exceptions raised by run(), timeouts
+    and calls rejected by an open circuit are passed to fallback().
     """
-    _context: Dict[str, Any]= {}
+
+    # Result caching: None (disabled), CACHE_PURE or CACHE_CONTEXT
+    cache_policy: Optional[str] = None
+    cache_ttl: float = 60.0
+    cache_context_keys: Tuple[str, ...] = ("memory_id", "actor_id", "user_id", "session_id")
+
+    # Maximum concurrent calls of this tool in the agent's tool node (None: unlimited)
+    max_concurrency: Optional[int] = None
+
+    # Resilience: deadline per call in seconds (None: unguarded) and circuit breaker
+    timeout_seconds: Optional[float] = None
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+    # Exceptions from run() that count against the circuit (timeouts always count)
+    circuit_failure_types: Tuple[Type[BaseException], ...] = (Exception,)
     
     def __init__(self):
-        """Initialize the tool with empty context."""
-        self._context: Dict[str, Any] = {}
+        """Initialize the tool."""
+        pass
     
     @classmethod
     def set_context(cls, context: Dict[str, Any]) -> None:
         """
-        Set context information for the tool.
+        Set context information for tools in the current request.
+        The values are merged into the active request-scoped ToolContext; prefer
+        core.tools.tool_context.use_tool_context() which also restores the previous value.
         
         Args:
             context: Dictionary containing context information like memory_id, actor_id, session_id, etc.
         """
-        cls._context.update(context)
+        set_tool_context(get_tool_context().merge(context))
     
     @classmethod
     def get_context(cls, key: str, default: Any = None) -> Any:
         """
-        Get a value from the tool context.
+        Get a value from the tool context of the current request.
         
         Args:
             key: The context key to retrieve
@@ -35,7 +70,7 @@ class Tool(ABC):
         Returns:
             The context value or default
         """
-        return cls._context.get(key, default)
+        return get_tool_context().get(key, default)
     
     @abstractmethod
     def run(self, *args, **kwargs):
@@ -44,6 +79,14 @@ class Tool(ABC):
         """
         raise NotImplementedError("Subclasses must implement this method.")
 
+    async def arun(self, *args, **kwargs):
+        """
+        Execute the tool's main logic asynchronously.
+        By default run() is executed in a worker thread so that blocking tools
+        do not stall the event loop. Tools with native async I/O can override this.
+        """
+        return await asyncio.to_thread(self.run, *args, **kwargs)
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -59,21 +102,168 @@ class Tool(ABC):
         """
         return ""
 
+    def fallback(self, error: Exception, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        """
+        Optional: Return a degraded result when a call failed, timed out (ToolTimeoutError)
+        or was rejected by an open circuit (CircuitOpenError). Re-raises the error by default.
+
+        Args:
+            error: The exception of the failed call
+            args: Positional arguments of the call
+            kwargs: Keyword arguments of the call
+
+        Returns:
+            Result returned to the LLM instead
+        """
+        raise error
+
+    def is_cacheable_result(self, result: Any) -> bool:
+        """
+        Optional: Return False for results that must not be cached (e.g. transient errors).
+        """
+        return True
+
+    def result_status(self, result: Any) -> str:
+        """
+        Optional: Return the status recorded in senpai_tool_latency_seconds for a result
+        of run(). Tools that report failures as text instead of raising should return
+        "error" for those results; they are then not cached either.
+
+        Args:
+            result: Result returned by run()
+
+        Returns:
+            "ok" (default) or "error"
+        """
+        return "ok"
+
+    def cache_key(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[Hashable]:
+        """
+        Return the result cache key for a call, or None if the tool is not cached.
+
+        Args:
+            args: Positional arguments of the call
+            kwargs: Keyword arguments of the call
+
+        Returns:
+            Cache key or None
+        """
+        if self.cache_policy not in (CACHE_PURE, CACHE_CONTEXT):
+            return None
+        context = None
+        if self.cache_policy == CACHE_CONTEXT:
+            context = {key: self._cache_context_value(key) for key in self.cache_context_keys}
+            # Outside a request there is nothing to scope per-request memoization to
+            if "request_id" in context and context["request_id"] is None:
+                return None
+        return make_cache_key(self.name, args, kwargs, context)
+
+    def _cache_context_value(self, key: str) -> Any:
+        if key == "request_id":
+            from core.logger import get_current_request_id
+
+            return get_current_request_id()
+        return self.get_context(key)
+
+    def _cached_result(self, args, kwargs, span, stage) -> Tuple[Optional[Hashable], bool, Any]:
+        key = self.cache_key(args, kwargs)
+        if key is None:
+            return None, False, None
+        hit, value = get_tool_result_cache().get(key)
+        span.set_attribute("senpai.tool.cache_hit", hit)
+        if hit:
+            stage["status"] = "cached"
+        return key, hit, value
+
+    def _store_result(self, key: Optional[Hashable], result: Any) -> None:
+        if key is not None and self.is_cacheable_result(result):
+            get_tool_result_cache().put(key, result, self.cache_ttl)
+
+    def _finish(self, key: Optional[Hashable], result: Any, span, stage) -> Any:
+        # Fallback results already carry their status; judge what run() returned
+        if stage["status"] == "ok":
+            stage["status"] = self.result_status(result)
+            if stage["status"] == "ok":
+                self._store_result(key, result)
+        span.set_attribute("senpai.tool.status", stage["status"])
+        return result
+
+    def tool_guard(self) -> Optional[ToolGuard]:
+        """Return the shared deadline/circuit breaker guard of this tool, or None if unguarded."""
+        if self.timeout_seconds is None:
+            return None
+        return get_tool_guard(
+            self.name,
+            self.timeout_seconds,
+            failure_threshold=self.circuit_failure_threshold,
+            reset_seconds=self.circuit_reset_seconds,
+            failure_types=self.circuit_failure_types,
+            max_workers=self.max_concurrency,
+        )
+
+    def _guarded_run(self, args, kwargs, span, stage) -> Any:
+        guard = self.tool_guard()
+        try:
+            return guard.call(self.run, *args, **kwargs) if guard is not None else self.run(*args, **kwargs)
+        except Exception as e:
+            return self._fallback_result(e, args, kwargs, span, stage)
+
+    async def _aguarded_run(self, args, kwargs, span, stage) -> Any:
+        guard = self.tool_guard()
+        try:
+            if guard is None:
+                return await self.arun(*args, **kwargs)
+            # Tools without a native arun() run their blocking run() on the guard's own pool
+            func = self.run if type(self).arun is Tool.arun else self.arun
+            return await guard.acall(func, *args, **kwargs)
+        except Exception as e:
+            return self._fallback_result(e, args, kwargs, span, stage)
+
+    def _fallback_result(self, error: Exception, args, kwargs, span, stage) -> Any:
+        if isinstance(error, ToolTimeoutError):
+            stage["status"] = "timeout"
+        elif isinstance(error, CircuitOpenError):
+            stage["status"] = "rejected"
+        else:
+            stage["status"] = "error"
+        result = self.fallback(error, args, kwargs)
+        span.set_attribute("senpai.tool.fallback", type(error).__name__)
+        return result
+
     def as_langchain_tool(self):
         """
-        Return a langchain_core.tools.tool-wrapped function for this tool instance.
-        Requires langchain_core.tools.tool to be installed/importable.
+        Return a langchain_core StructuredTool wrapping this tool instance.
+        The returned tool supports both invoke() and ainvoke(); the async path uses arun().
+        Every call is recorded in senpai_tool_latency_seconds and a "tool.run" span.
+        Tools with a cache policy return memoized results (status="cached") when possible.
+        Failed calls are answered by fallback() (status="error", "timeout" or "rejected");
+        results that result_status() reports as failures are recorded with their status.
+        Requires langchain_core.tools to be installed/importable.
         """
         try:
-            from langchain_core.tools import tool as lc_tool
+            from langchain_core.tools import StructuredTool
         except ImportError:
-            raise ImportError("langchain_core.tools.tool is required to use as_langchain_tool.")
+            raise ImportError("langchain_core.tools is required to use as_langchain_tool.")
         
-        # Create a wrapper function with proper name and description
+        # Create wrapper functions with proper name and description
         def tool_func(*args, **kwargs):
-            return self.run(*args, **kwargs)
+            with start_span("tool.run", **{"senpai.tool": self.name}) as span, \
+                    track_stage(TOOL_LATENCY, tool=self.name) as stage:
+                key, hit, value = self._cached_result(args, kwargs, span, stage)
+                if hit:
+                    return value
+                return self._finish(key, self._guarded_run(args, kwargs, span, stage), span, stage)
+
+        async def atool_func(*args, **kwargs):
+            with start_span("tool.run", **{"senpai.tool": self.name}) as span, \
+                    track_stage(TOOL_LATENCY, tool=self.name) as stage:
+                key, hit, value = self._cached_result(args, kwargs, span, stage)
+                if hit:
+                    return value
+                return self._finish(key, await self._aguarded_run(args, kwargs, span, stage), span, stage)
         
-        tool_func.__name__ = self.name
-        tool_func.__doc__ = getattr(self, 'description', '')
+        for func in (tool_func, atool_func):
+            func.__name__ = self.name
+            func.__doc__ = getattr(self, 'description', '')
         
-        return lc_tool(tool_func)
+        return StructuredTool.from_function(func=tool_func, coroutine=atool_func, name=self.name)
@@ -0,0 +1,225 @@
+"""
+Declarative tool manifests and lazily loaded tools.
+
+A manifest lists the tools an agent exposes. The agent can bind every tool up front
+while each tool module is only imported, and each tool only constructed, the first
+time the tool is invoked.
+
+Manifest format (JSON):
+
+    {
+        "tools": [
+            {
+                "class": "ZundamonJokeTool",
+                "module": "core.tools.libs.zundamon_joke_tool",
+                "max_concurrency": 2
+            }
+        ]
+    }
+
+The name and description the LLM sees come from the tool class itself: they are read
+from the module source (string literals returned by the class's name/description
+properties) without importing it, so the class stays the single source. An entry may
+still set "name" or "description" to override them, and must when the class computes
+them at runtime.
+"""
+
+import ast
+import asyncio
+import importlib
+import importlib.util
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .tool_interface import Tool
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Manifest entry describing a tool without importing it."""
+
+    class_name: str
+    module: str
+    name: str
+    description: str = ""
+    max_concurrency: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ToolSpec":
+        """
+        Create a ToolSpec from a manifest entry. A missing name or description is
+        read from the tool class (see read_tool_metadata()).
+
+        Raises:
+            ValueError: If a required key is missing, or the name is neither in the
+                entry nor a literal in the tool class
+        """
+        missing = [key for key in ("class", "module") if not data.get(key)]
+        if missing:
+            raise ValueError(f"Tool manifest entry is missing {', '.join(missing)}: {data}")
+        metadata: Dict[str, str] = {}
+        if not data.get("name") or "description" not in data:
+            metadata = read_tool_metadata(data["module"], data["class"])
+        name = data.get("name") or metadata.get("name")
+        if not name:
+            raise ValueError(
+                f"Tool '{data['class']}' does not return a literal name; set \"name\" in its manifest entry"
+            )
+        return cls(
+            class_name=data["class"],
+            module=data["module"],
+            name=name,
+            description=data["description"] if "description" in data else metadata.get("description", ""),
+            max_concurrency=data.get("max_concurrency"),
+        )
+
+
+def _literal_return(node: ast.AST) -> Optional[str]:
+    # Body of a property returning a string literal (a docstring may precede the return)
+    if isinstance(node, ast.FunctionDef):
+        for statement in node.body:
+            if isinstance(statement, ast.Return):
+                value = statement.value
+                if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                    return value.value
+                return None
+    return None
+
+
+def read_tool_metadata(module: str, class_name: str) -> Dict[str, str]:
+    """
+    Read a tool's name and description from its module source without importing it.
+
+    Only string literals are found: properties whose body returns a literal, or
+    class attributes assigned one.
+
+    Args:
+        module: Dotted module path of the tool
+        class_name: Tool class name
+
+    Returns:
+        Dict with the "name" and/or "description" found (empty if none)
+    """
+    spec = importlib.util.find_spec(module)
+    if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+        return {}
+    with open(spec.origin, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=spec.origin)
+
+    metadata: Dict[str, str] = {}
+    for node in tree.body:
+        if not (isinstance(node, ast.ClassDef) and node.name == class_name):
+            continue
+        for member in node.body:
+            if isinstance(member, ast.FunctionDef) and member.name in ("name", "description"):
+                value = _literal_return(member)
+                if value is not None:
+                    metadata[member.name] = value
+            elif isinstance(member, ast.Assign) and isinstance(member.value, ast.Constant) \
+                    and isinstance(member.value.value, str):
+                for target in member.targets:
+                    if isinstance(target, ast.Name) and target.id in ("name", "description"):
+                        metadata[target.id] = member.value.value
+    return metadata
+
+
+def load_tool_manifest(path: str) -> List[ToolSpec]:
+    """
+    Load tool specs from a JSON manifest file.
+
+    Args:
+        path: Path to the manifest file
+
+    Returns:
+        List of ToolSpec entries in manifest order
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    entries = data.get("tools", []) if isinstance(data, dict) else data
+    return [ToolSpec.from_dict(entry) for entry in entries]
+
+
+class LazyTool(Tool):
+    """
+    Proxy that exposes a tool's name and description from its manifest entry and
+    imports and constructs the real tool on first use.
+    """
+
+    def __init__(self, spec: ToolSpec):
+        """
+        Args:
+            spec: Manifest entry of the tool
+        """
+        super().__init__()
+        self.spec = spec
+        self._target: Optional[Tool] = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def description(self) -> str:
+        return self.spec.description
+
+    @property
+    def max_concurrency(self) -> Optional[int]:
+        return self.spec.max_concurrency
+
+    @property
+    def loaded(self) -> bool:
+        """True once the real tool has been constructed."""
+        return self._target is not None
+
+    def resolve(self) -> Tool:
+        """
+        Import and construct the real tool (once).
+
+        Returns:
+            The real tool instance
+
+        Raises:
+            ValueError: If the module does not define the tool class
+        """
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    from .tool_factory import ToolFactory
+
+                    module = importlib.import_module(self.spec.module)
+                    tool_cls = ToolFactory._registry.get(self.spec.class_name) or getattr(module, self.spec.class_name, None)
+                    if tool_cls is None:
+                        raise ValueError(f"Tool '{self.spec.class_name}' not found in module '{self.spec.module}'.")
+                    self._target = tool_cls()
+        return self._target
+
+    def run(self, *args, **kwargs) -> Any:
+        return self.resolve().run(*args, **kwargs)
+
+    async def arun(self, *args, **kwargs) -> Any:
+        # Importing the tool module may block, so resolve it off the event loop
+        target = self._target or await asyncio.to_thread(self.resolve)
+        return await target.arun(*args, **kwargs)
+
+    def _guarded_run(self, args, kwargs, span, stage) -> Any:
+        # The deadline, circuit breaker and fallback are declared on the real tool
+        return self.resolve()._guarded_run(args, kwargs, span, stage)
+
+    async def _aguarded_run(self, args, kwargs, span, stage) -> Any:
+        target = self._target or await asyncio.to_thread(self.resolve)
+        return await target._aguarded_run(args, kwargs, span, stage)
+
+    def cache_key(self, args, kwargs):
+        # The cache policy is declared on the real tool; the first call (which loads
+        # the tool) is never served from or stored in the cache
+        return self._target.cache_key(args, kwargs) if self._target is not None else None
+
+    def is_cacheable_result(self, result: Any) -> bool:
+        return self._target is not None and self._target.is_cacheable_result(result)
+
+    @property
+    def cache_ttl(self) -> float:
+        return self._target.cache_ttl if self._target is not None else 0.0
@@ -0,0 +1,19 @@
+"""
+Tracing module for SenpAI Agent application.
+"""
+
+from .tracer import (
+    setup_tracing,
+    shutdown_tracing,
+    start_span,
+    set_token_usage,
+    get_tracing_enabled
+)
+
+__all__ = [
+    'setup_tracing',
+    'shutdown_tracing',
+    'start_span',
+    'set_token_usage',
+    'get_tracing_enabled'
+]
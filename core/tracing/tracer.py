@@ -0,0 +1,219 @@
+"""
+OpenTelemetry tracing setup and span helpers for SenpAI agents.
+
+setup_tracing() installs a TracerProvider with an OTLP, file or console exporter.
+start_span() opens a span that carries the agent name and the current X-Request-ID
+(set by the logging middleware) so traces can be joined with request logs. Without
+the OpenTelemetry packages, or with tracing disabled, spans are no-ops and cost
+almost nothing.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from core.logger import get_current_request_id, get_logger
+from core.metrics import get_agent_name
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover - depends on the environment
+    trace = None
+
+INSTRUMENTATION_NAME = "senpai"
+
+_setup_lock = threading.Lock()
+_configured = False
+
+
+class _NoopSpan:
+    """Stand-in used when opentelemetry is not installed."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException, *args, **kwargs) -> None:
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def get_tracing_enabled() -> bool:
+    """Return True if TRACING_ENABLED is set to "true"."""
+    return os.getenv("TRACING_ENABLED", "false").lower() == "true"
+
+
+def _create_exporter(exporter: str, file_path: str):
+    """Create a span exporter by name ("otlp", "file" or "console")."""
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        # Endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables
+        return OTLPSpanExporter()
+    if exporter == "file":
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+        # One JSON object per line
+        return ConsoleSpanExporter(
+            out=open(file_path, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    if exporter == "console":
+        return ConsoleSpanExporter()
+    raise ValueError(f"Unknown tracing exporter: {exporter}")
+
+
+def setup_tracing(
+    service_name: str,
+    enabled: Optional[bool] = None,
+    exporter: Optional[str] = None,
+    file_path: Optional[str] = None,
+) -> bool:
+    """
+    Install a TracerProvider for this process (once).
+
+    If another component (e.g. ADOT auto-instrumentation) already installed an SDK
+    TracerProvider, it is reused and no exporter is added.
+
+    Environment variables:
+        TRACING_ENABLED: "true" to enable tracing (default: "false")
+        TRACING_EXPORTER: "otlp", "file" or "console" (default: "otlp")
+        TRACING_FILE_PATH: Output file of the file exporter (default: traces.jsonl)
+        OTEL_SERVICE_NAME: Overrides service_name
+        OTEL_EXPORTER_OTLP_ENDPOINT: Collector endpoint of the OTLP exporter
+
+    Args:
+        service_name: service.name resource attribute (e.g. "senpai-main-agent")
+        enabled: Override TRACING_ENABLED
+        exporter: Override TRACING_EXPORTER
+        file_path: Override TRACING_FILE_PATH
+
+    Returns:
+        True if spans are exported, False if tracing stays a no-op
+    """
+    global _configured
+    logger = get_logger("senpai.tracing")
+
+    if enabled is None:
+        enabled = get_tracing_enabled()
+    if not enabled:
+        return False
+    if trace is None:
+        logger.warning("TRACING_ENABLED is set but opentelemetry is not installed; tracing disabled")
+        return False
+
+    with _setup_lock:
+        if _configured:
+            return True
+
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        if isinstance(trace.get_tracer_provider(), TracerProvider):
+            logger.info("Reusing existing tracer provider")
+            _configured = True
+            return True
+
+        exporter = exporter or os.getenv("TRACING_EXPORTER", "otlp")
+        file_path = file_path or os.getenv("TRACING_FILE_PATH", "traces.jsonl")
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)})
+        )
+        provider.add_span_processor(BatchSpanProcessor(_create_exporter(exporter, file_path)))
+        trace.set_tracer_provider(provider)
+        _configured = True
+
+    logger.info("Tracing enabled", extra={"service_name": service_name, "exporter": exporter})
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and shut down the tracer provider (if one was installed)."""
+    if trace is None:
+        return
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+@contextmanager
+def start_span(name: str, current: bool = True, **attributes: Any) -> Iterator[Any]:
+    """
+    Open a span as a child of the current span.
+
+    The agent name and current request ID (X-Request-ID) are added as "senpai.agent"
+    and "senpai.request_id". Attributes whose value is None are skipped. Exceptions
+    are recorded on the span and re-raised.
+
+    Args:
+        name: Span name (e.g. "tool.run")
+        current: Make the span the current span for the enclosed block. Use False
+            around sync generators that are resumed in different threads/contexts.
+        **attributes: Span attributes
+
+    Yields:
+        The span (a no-op span if opentelemetry is not installed)
+    """
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+
+    attributes.setdefault("senpai.agent", get_agent_name())
+    request_id = get_current_request_id()
+    if request_id:
+        attributes["senpai.request_id"] = request_id
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+
+    tracer = trace.get_tracer(INSTRUMENTATION_NAME)
+    if current:
+        with tracer.start_as_current_span(name, attributes=attributes) as span:
+            yield span
+        return
+
+    span = tracer.start_span(name, attributes=attributes)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_exception(exc)
+        span.set_status(trace.Status(trace.StatusCode.ERROR, str(exc)))
+        raise
+    finally:
+        span.end()
+
+
+def set_token_usage(span: Any, message: Any) -> None:
+    """
+    Copy LLM token counts (including prompt-cache reads/writes) from a message's
+    usage_metadata onto a span.
+
+    Args:
+        span: Span returned by start_span()
+        message: AIMessage returned by the chat model
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if not usage or not span.is_recording():
+        return
+    span.set_attribute("gen_ai.usage.input_tokens", usage.get("input_tokens", 0))
+    span.set_attribute("gen_ai.usage.output_tokens", usage.get("output_tokens", 0))
+    span.set_attribute("gen_ai.usage.total_tokens", usage.get("total_tokens", 0))
+    details = usage.get("input_token_details") or {}
+    if details.get("cache_read") is not None:
+        span.set_attribute("gen_ai.usage.cache_read_input_tokens", details["cache_read"])
+    if details.get("cache_creation") is not None:
+        span.set_attribute("gen_ai.usage.cache_creation_input_tokens", details["cache_creation"])
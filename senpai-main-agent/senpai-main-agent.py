@@ -3,21 +3,27 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from langgraph.graph import StateGraph, MessagesState
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt import tools_condition
 
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from bedrock_agentcore.memory import MemoryClient
-from langchain_aws import ChatBedrock
 
 # Import logger
-from core.logger import setup_logger, get_contextual_logger
+from core.logger import setup_logger, get_contextual_logger, ASGILoggingMiddleware
 
-# Import ToolFactory and all registered tools
+# Import shared AWS clients, write-behind memory persistence and agent helpers
+from core.aws import get_memory_client
+from core.memory import create_memory_event_writer
+from core.agent import (
+    ContextWindow, GraphEventStream, ModelRouter, SemanticCache, bind_tools, create_chat_model, create_chatbot_node,
+    create_tool_node, get_prompt_caching_enabled, latency_budget_config, stream_requested, text_events,
+)
+from core.metrics import REQUEST_LATENCY, add_metrics_route, record_graph_iterations, register_stats, set_agent_name, track_stage
+from core.tracing import setup_tracing, start_span
+
+# Import ToolFactory (tools are loaded lazily from the tool manifest)
 from core.tools.tool_factory import ToolFactory
-from core.tools.libs.zundamon_joke_tool import ZundamonJokeTool
-from core.tools.libs.chat_history_summarize_tool import Chat_history_summarize_tool
-from core.tools.tool_interface import Tool
+from core.tools.tool_context import ToolContext, use_tool_context
 from prompt import get_prompt
 
 
@@ -34,57 +40,91 @@ logger.info("Starting SenpAI Main Agent application")
 # BedrockAgentCoreアプリケーションの初期化
 app = BedrockAgentCoreApp()
 
-# MemoryClientの初期化
-memory_client = MemoryClient(region_name=os.getenv("AWS_REGION", "us-west-2"))
+# ステージ別レイテンシのメトリクス（GET /metrics でPrometheus形式を返す）
+set_agent_name("main")
+add_metrics_route(app)
+
+# リクエストログ（X-Request-IDを発行）とトレーシング（TRACING_ENABLED=trueで有効）
+app.add_middleware(ASGILoggingMiddleware, logger_name="senpai.http")
+setup_tracing("senpai-main-agent")
+
+# MemoryClientの初期化（クライアントレジストリで共有）
+memory_client = get_memory_client(os.getenv("AWS_REGION", "us-west-2"))
 logger.info("MemoryClient initialized", extra={"region": os.getenv("AWS_REGION", "us-west-2")})
 
+# 会話履歴はバックグラウンドでまとめて保存する（レスポンスのクリティカルパスから外す）
+memory_writer = create_memory_event_writer(memory_client)
+
 # 言語設定
 locale = os.getenv("LOCALE", "en_EN")
 
+# プロンプトキャッシュ（システムプロンプトとツール定義をBedrock側でキャッシュ）
+PROMPT_CACHING = get_prompt_caching_enabled()
+
+# LLMに送る会話履歴のトークン上限（古いターンから削除。ツール呼び出しと結果は分割しない）
+CONTEXT_WINDOW = ContextWindow.from_env()
+
+# 意味的レスポンスキャッシュ（言い回しが違うだけの同じ質問にはグラフを実行せずに回答する）
+SEMANTIC_CACHE = SemanticCache.from_env()
+if SEMANTIC_CACHE is not None:
+    register_stats("semantic_cache", SEMANTIC_CACHE.stats)
+
+# ツールマニフェスト（環境変数で差し替え可能）
+TOOL_MANIFEST = os.getenv("TOOL_MANIFEST", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools.json"))
+
 # LangGraphを使用したエージェントの手動構築
 def create_agent():
     """LangGraphエージェントの作成と設定"""
     logger.info("Creating LangGraph agent")
     
     # LLMの初期化（必要に応じてモデルとパラメータを調整）
-    llm = ChatBedrock(
-        model_id="us.amazon.nova-micro-v1:0",
-        model_kwargs={"temperature": 0.1},
-        region_name=os.getenv("AWS_REGION", "us-west-2")
-    )
+    def build_model(model_id):
+        return create_chat_model(
+            model_id=model_id,
+            model_kwargs={"temperature": 0.1},
+            region_name=os.getenv("AWS_REGION", "us-west-2"),
+            prompt_caching=PROMPT_CACHING,
+        )
+
+    llm = build_model("us.amazon.nova-micro-v1:0")
     logger.info("LLM initialized", extra={"model_id": "us.amazon.nova-micro-v1:0"})
 
-    # ToolFactoryから全ツールインスタンスを取得し、as_langchain_toolでラップ
-    tool_instances = [tool_cls() for tool_cls in ToolFactory._registry.values()]
+    # ツールマニフェストからツールを登録し、as_langchain_toolでラップ
+    # （各ツールのモジュールは初回呼び出し時に読み込まれる）
+    tool_instances = ToolFactory.create_tools_from_manifest(TOOL_MANIFEST)
     
     # Store tool instances globally for context setting
     global global_tool_instances
     global_tool_instances = tool_instances
     
     tools = [t.as_langchain_tool() for t in tool_instances]
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools = bind_tools(llm, tools, prompt_caching=PROMPT_CACHING)
     
     logger.info("Tools loaded", extra={"tool_count": len(tools), "tools": [t.name for t in tool_instances]})
 
+    # リクエストの複雑さとレイテンシ予算でモデルのティアを選択（MODEL_ROUTING=trueで有効）
+    model_router = ModelRouter.from_env(
+        lambda model_id: bind_tools(build_model(model_id), tools, prompt_caching=PROMPT_CACHING),
+        has_tools=True,
+    )
+    if model_router is not None:
+        register_stats("model_router", model_router.stats)
+        logger.info("Model routing enabled", extra={"tiers": [t.model_id for t in model_router.tiers]})
+
     # システムメッセージ
     system_message = get_prompt(locale=locale)
 
-    # チャットボットノードの定義
-    def chatbot(state: MessagesState):
-        # システムメッセージがまだ存在しない場合は追加
-        messages = state["messages"]
-        if not messages or not isinstance(messages[0], SystemMessage):
-            messages = [SystemMessage(content=system_message)] + messages
-
-        response = llm_with_tools.invoke(messages)
-        return {"messages": [response]}
+    # チャットボットノードの定義（ainvoke時は非同期でBedrockを呼び出し、LLMレイテンシを記録する）
+    chatbot = create_chatbot_node(
+        llm_with_tools, system_message, prompt_caching=PROMPT_CACHING, context_window=CONTEXT_WINDOW, model_router=model_router,
+    )
 
     # グラフの作成
     graph_builder = StateGraph(MessagesState)
 
-    # ノードの追加
+    # ノードの追加（1ターンで複数のツール呼び出しがあれば並行実行する。ainvoke時は各ツールのarunを使う）
     graph_builder.add_node("chatbot", chatbot)
-    graph_builder.add_node("tools", ToolNode(tools))
+    graph_builder.add_node("tools", create_tool_node(tools, tool_limits={t.name: t.max_concurrency for t in tool_instances}))
 
     # エッジの追加
     graph_builder.add_conditional_edges(
@@ -108,28 +148,94 @@ logger.info("Agent created and ready for use")
 # Global variable to store tool instances for context setting
 global_tool_instances = []
 
-def set_tool_context(user_id: str, session_id: str):
-    """Set context for all tool instances."""
-    context = {
-        "memory_id": os.getenv("AWS_MEMORY_ID", "conversation_memory-y0ttEoDG5r"),
-        "actor_id": user_id,
-        "user_id": user_id,
+def create_tool_context(user_id: str, session_id: str) -> ToolContext:
+    """Create the request-scoped context for all tool instances."""
+    context = ToolContext(
+        memory_id=os.getenv("AWS_MEMORY_ID", "conversation_memory-y0ttEoDG5r"),
+        actor_id=user_id,
+        user_id=user_id,
         # to-do: use memory or other better way to implement
-        "session_id": "session_id_" + user_id
-    }
+        session_id="session_id_" + user_id,
+    )
 
-    Tool.set_context(context)  # Update class-level context for any static access
+    logger.info("Tool context created", extra=context.as_dict())
+    return context
 
-    logger.info("Tool context set", extra=context)
+# エラー時にユーザーへ返すメッセージ
+ERROR_MESSAGE = "申し訳ないのだ！ちょっと調子が悪いみたいなのだ...💧 もう一度試してみてほしいのだ！"
+
+def save_conversation(user_id: str, user_input: str, response_messages, request_logger):
+    """AWS AgentCore Memoryに会話履歴を保存（write-behind）"""
+    try:
+        messages_to_save = [(user_input, "USER")]
+        for msg in response_messages:
+            content = msg.content if isinstance(msg.content, str) else str(msg.content)
+            messages_to_save.append((content, "ASSISTANT"))
+        
+        # 書き込みはキューに積むだけで即座に戻る（実際の保存はバックグラウンドで行う）
+        queued = memory_writer.submit(
+            memory_id=os.getenv("AWS_MEMORY_ID", "conversation_memory-y0ttEoDG5r"),
+            actor_id=user_id,
+            # to-do: use memory or other better way to implement
+            session_id="session_id_" + user_id,
+            messages=messages_to_save,
+        )
+        
+        request_logger.info("Conversation queued for memory", extra={
+            "saved_messages": len(messages_to_save),
+            "queued": queued,
+        })
+        
+    except Exception as e:
+        request_logger.error("Memory save error", extra={"error": str(e)}, exc_info=True)
+
+async def stream_agent_response(user_id: str, user_input: str, messages, tool_context, latency_budget, request_logger,
+                                cache_vector=None):
+    """
+    LLMのトークンとツールの進捗をイベントとして逐次返す
+    BedrockAgentCoreAppが各イベントをtext/event-streamとして送信する
+    """
+    try:
+        event_stream = GraphEventStream(agent, {"messages": messages}, latency_budget_config(latency_budget))
+        with use_tool_context(tool_context), start_span("agent.invoke", **{"senpai.stream": True}), \
+                track_stage(REQUEST_LATENCY, mode="stream"):
+            async for event in event_stream:
+                yield event
+        record_graph_iterations(event_stream.messages)
+    except Exception as e:
+        request_logger.error("Agent streaming failed", extra={"error": str(e)}, exc_info=True)
+        yield {"type": "error", "content": ERROR_MESSAGE}
+        return
+    
+    request_logger.info("Agent response streamed", extra={
+        "response_length": len(event_stream.final_text),
+        "total_messages": len(event_stream.messages) + 1
+    })
+    
+    save_conversation(user_id, user_input, event_stream.messages, request_logger)
+    if SEMANTIC_CACHE is not None:
+        SEMANTIC_CACHE.store_in_background("main", user_input, event_stream.final_text, event_stream.messages, cache_vector)
+    request_logger.info("Request completed successfully")
+
+async def stream_cached_response(user_id: str, user_input: str, answer: str, request_logger):
+    """キャッシュ済みの回答をストリーミング形式で返す"""
+    for event in text_events(answer):
+        yield event
+    save_conversation(user_id, user_input, [AIMessage(content=answer)], request_logger)
 
 @app.entrypoint
-def langgraph_bedrock(payload):
+async def langgraph_bedrock(payload):
     """
     ペイロードでエージェントを呼び出す
+    非同期エントリーポイントのため、LLMやツールのI/O待ちの間にワーカースレッドを占有しない
+    payloadの"stream"がtrueの場合はトークン単位のストリーミングで返す
     """
     user_input = payload.get("prompt")
     session_id = payload.get("session_id", "default_session")
     user_id = payload.get("user_id", "default_user_konishi")
+    stream = stream_requested(payload)
+    # レイテンシ予算（ミリ秒）。モデルルーティングが有効な場合、予算内に収まるモデルを選ぶ
+    latency_budget = payload.get("latency_budget_ms")
     
     # Create contextual logger for this request
     request_logger = get_contextual_logger(
@@ -140,10 +246,11 @@ def langgraph_bedrock(payload):
     
     request_logger.info("Processing user request", extra={
         "prompt_length": len(user_input) if user_input else 0,
+        "stream": stream,
     })
     
-    # Set context for all tools
-    set_tool_context(user_id, session_id)
+    # Create request-scoped context for all tools (isolated per request via contextvars)
+    tool_context = create_tool_context(user_id, session_id)
     
     # 会話履歴を取得
     messages = []
@@ -151,10 +258,30 @@ def langgraph_bedrock(payload):
     # 現在のユーザー入力を追加
     messages.append(HumanMessage(content=user_input))
     
+    # 意味的キャッシュにヒットした場合はグラフを実行しない（ツールを使った回答はキャッシュされない）
+    # ミスした場合は検索時の埋め込みベクトルを保存に再利用する（埋め込みは1リクエスト1回）
+    cache_lookup = await SEMANTIC_CACHE.asearch("main", user_input) if SEMANTIC_CACHE is not None else None
+    cached = cache_lookup.hit if cache_lookup is not None else None
+    cache_vector = cache_lookup.vector if cache_lookup is not None else None
+    if cached is not None:
+        request_logger.info("Semantic cache hit", extra={"similarity": round(cached.similarity, 4)})
+        if stream:
+            return stream_cached_response(user_id, user_input, cached.answer, request_logger)
+        save_conversation(user_id, user_input, [AIMessage(content=cached.answer)], request_logger)
+        return cached.answer
+
+    # ストリーミングモード: 非同期ジェネレーターを返す
+    if stream:
+        request_logger.info("Streaming LangGraph agent")
+        return stream_agent_response(user_id, user_input, messages, tool_context, latency_budget, request_logger, cache_vector)
+    
     try:
         # LangGraphが期待する形式で入力を作成
         request_logger.info("Invoking LangGraph agent")
-        response = agent.invoke({"messages": messages})
+        with use_tool_context(tool_context), start_span("agent.invoke", **{"senpai.stream": False}), \
+                track_stage(REQUEST_LATENCY, mode="invoke"):
+            response = await agent.ainvoke({"messages": messages}, latency_budget_config(latency_budget))
+        record_graph_iterations(response["messages"])
         
         # 最終メッセージの内容を抽出
         assistant_response = response["messages"][-1].content
@@ -166,29 +293,12 @@ def langgraph_bedrock(payload):
         
     except Exception as e:
         request_logger.error("Agent invocation failed", extra={"error": str(e)}, exc_info=True)
-        return "申し訳ないのだ！ちょっと調子が悪いみたいなのだ...💧 もう一度試してみてほしいのだ！"
+        return ERROR_MESSAGE
     
-    # AWS AgentCore Memoryに会話履歴を保存
-    try:
-        messages_to_save = [(user_input, "USER")]
-        for msg in response["messages"][1:]:
-            content = msg.content if isinstance(msg.content, str) else str(msg.content)
-            messages_to_save.append((content, "ASSISTANT"))
-        
-        memory_client.create_event(
-            memory_id=os.getenv("AWS_MEMORY_ID", "conversation_memory-y0ttEoDG5r"),
-            actor_id=user_id,
-            # to-do: use memory or other better way to implement
-            session_id="session_id_" + user_id,
-            messages=messages_to_save,
-        )
-        
-        request_logger.info("Conversation saved to memory", extra={
-            "saved_messages": len(messages_to_save)
-        })
-        
-    except Exception as e:
-        request_logger.error("Memory save error", extra={"error": str(e)}, exc_info=True)
+    save_conversation(user_id, user_input, response["messages"][1:], request_logger)
+    # キャッシュへの保存は応答を返した後にバックグラウンドで行う
+    if SEMANTIC_CACHE is not None:
+        SEMANTIC_CACHE.store_in_background("main", user_input, assistant_response, response["messages"][1:], cache_vector)
     
     request_logger.info("Request completed successfully")
     return assistant_response
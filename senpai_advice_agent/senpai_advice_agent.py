@@ -3,40 +3,73 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from langgraph.graph import StateGraph, MessagesState
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from bedrock_agentcore.memory import MemoryClient
-from langchain_aws import ChatBedrock
+
+from core.aws import get_memory_client
+from core.memory import create_memory_event_writer
+from core.agent import (
+    ContextWindow, GraphEventStream, ModelRouter, SemanticCache, create_chat_model, create_chatbot_node,
+    get_prompt_caching_enabled, latency_budget_config, stream_requested, text_events,
+)
+from core.logger import ASGILoggingMiddleware
+from core.metrics import REQUEST_LATENCY, add_metrics_route, record_graph_iterations, register_stats, set_agent_name, track_stage
+from core.tracing import setup_tracing, start_span
 
 from prompt import get_prompt
 
 # BedrockAgentCoreアプリケーションの初期化
 app = BedrockAgentCoreApp()
 
-# MemoryClientの初期化
-memory_client = MemoryClient(region_name=os.getenv("AWS_REGION", "us-west-2"))
+# ステージ別レイテンシのメトリクス（GET /metrics）
+set_agent_name("advice")
+add_metrics_route(app)
+
+# リクエストログ（X-Request-IDを発行）とトレーシング（TRACING_ENABLED=trueで有効）
+app.add_middleware(ASGILoggingMiddleware, logger_name="senpai.http")
+setup_tracing("senpai-advice-agent")
+
+# MemoryClientの初期化（クライアントレジストリで共有）
+memory_client = get_memory_client(os.getenv("AWS_REGION", "us-west-2"))
+memory_writer = create_memory_event_writer(memory_client)
 
 # 言語設定
 locale = os.getenv("LOCALE", "en_EN")
 
+# プロンプトキャッシュ（システムプロンプトをBedrock側でキャッシュ）
+PROMPT_CACHING = get_prompt_caching_enabled()
+
+# LLMに送る会話履歴のトークン上限（古いターンから削除。ツール呼び出しと結果は分割しない）
+CONTEXT_WINDOW = ContextWindow.from_env()
+
+# 意味的レスポンスキャッシュ（言い回しが違うだけの同じ質問にはグラフを実行せずに回答する）
+SEMANTIC_CACHE = SemanticCache.from_env()
+if SEMANTIC_CACHE is not None:
+    register_stats("semantic_cache", SEMANTIC_CACHE.stats)
+
 def create_agent():
     """LangGraphエージェントの作成と設定"""
-    llm = ChatBedrock(
-        model_id="us.amazon.nova-micro-v1:0",
-        model_kwargs={"temperature": 0.7, "max_tokens": 2048},
-        region_name=os.getenv("AWS_REGION", "us-west-2")
-    )
+    def build_model(model_id):
+        return create_chat_model(
+            model_id=model_id,
+            model_kwargs={"temperature": 0.7, "max_tokens": 2048},
+            region_name=os.getenv("AWS_REGION", "us-west-2"),
+            prompt_caching=PROMPT_CACHING,
+        )
+
+    llm = build_model("us.amazon.nova-micro-v1:0")
+
+    # リクエストの複雑さとレイテンシ予算でモデルのティアを選択（MODEL_ROUTING=trueで有効）
+    model_router = ModelRouter.from_env(build_model)
+    if model_router is not None:
+        register_stats("model_router", model_router.stats)
 
     # システムメッセージ
     system_message = get_prompt(locale=locale)
 
-    def chatbot(state: MessagesState):
-        messages = state["messages"]
-        if not messages or not isinstance(messages[0], SystemMessage):
-            messages = [SystemMessage(content=system_message)] + messages
-
-        response = llm.invoke(messages)
-        return {"messages": [response]}
+    chatbot = create_chatbot_node(
+        llm, system_message, prompt_caching=PROMPT_CACHING, context_window=CONTEXT_WINDOW, model_router=model_router,
+    )
 
     # グラフの作成
     graph_builder = StateGraph(MessagesState)
@@ -48,21 +81,11 @@ def create_agent():
 # エージェントの初期化
 agent = create_agent()
 
-@app.entrypoint
-def langgraph_bedrock(payload):
-    """ペイロードでエージェントを呼び出す"""
-    user_input = payload.get("prompt")
-    session_id = payload.get("session_id", "default_session")
-    user_id = payload.get("user_id", "default_user")
-    
-    messages = [HumanMessage(content=user_input)]
-    response = agent.invoke({"messages": messages})
-    assistant_response = response["messages"][-1].content
-    
-    # メモリ保存
+def save_conversation(user_id, session_id, user_input, assistant_response):
+    """メモリ保存（バックグラウンドで書き込む）"""
     try:
         messages_to_save = [(user_input, "USER"), (assistant_response, "ASSISTANT")]
-        memory_client.create_event(
+        memory_writer.submit(
             memory_id=os.getenv("AWS_MEMORY_ID", "advice_memory-default"),
             actor_id=user_id,
             session_id=session_id,
@@ -70,6 +93,57 @@ def langgraph_bedrock(payload):
         )
     except Exception as e:
         print(f"Memory save error: {e}")
+
+def stream_response(user_id, session_id, user_input, messages, latency_budget=None, cache_vector=None):
+    """LLMのトークンを生成され次第イベントとして返す"""
+    event_stream = GraphEventStream(agent, {"messages": messages}, latency_budget_config(latency_budget))
+    # 同期ジェネレーターは呼び出しごとに別スレッドで再開されるため、スパンはカレントにしない
+    with start_span("agent.invoke", current=False, **{"senpai.stream": True}), \
+            track_stage(REQUEST_LATENCY, mode="stream"):
+        yield from event_stream
+    record_graph_iterations(event_stream.messages)
+    save_conversation(user_id, session_id, user_input, event_stream.final_text)
+    if SEMANTIC_CACHE is not None:
+        SEMANTIC_CACHE.store_in_background("advice", user_input, event_stream.final_text, event_stream.messages, cache_vector)
+
+def stream_cached_response(user_id, session_id, user_input, answer):
+    """キャッシュ済みの回答をストリーミング形式で返す"""
+    yield from text_events(answer)
+    save_conversation(user_id, session_id, user_input, answer)
+
+@app.entrypoint
+def langgraph_bedrock(payload):
+    """ペイロードでエージェントを呼び出す（"stream": trueでストリーミング応答）"""
+    user_input = payload.get("prompt")
+    session_id = payload.get("session_id", "default_session")
+    user_id = payload.get("user_id", "default_user")
+    # レイテンシ予算（ミリ秒、モデルルーティングが有効な場合に使用）
+    latency_budget = payload.get("latency_budget_ms")
+    
+    # 意味的キャッシュにヒットした場合はグラフを実行しない
+    # ミスした場合は検索時の埋め込みベクトルを保存に再利用する（埋め込みは1リクエスト1回）
+    cache_lookup = SEMANTIC_CACHE.search("advice", user_input) if SEMANTIC_CACHE is not None else None
+    cached = cache_lookup.hit if cache_lookup is not None else None
+    cache_vector = cache_lookup.vector if cache_lookup is not None else None
+    if cached is not None:
+        if stream_requested(payload):
+            return stream_cached_response(user_id, session_id, user_input, cached.answer)
+        save_conversation(user_id, session_id, user_input, cached.answer)
+        return cached.answer
+
+    messages = [HumanMessage(content=user_input)]
+    if stream_requested(payload):
+        return stream_response(user_id, session_id, user_input, messages, latency_budget, cache_vector)
+    
+    with start_span("agent.invoke", **{"senpai.stream": False}), track_stage(REQUEST_LATENCY, mode="invoke"):
+        response = agent.invoke({"messages": messages}, latency_budget_config(latency_budget))
+    record_graph_iterations(response["messages"])
+    assistant_response = response["messages"][-1].content
+    
+    save_conversation(user_id, session_id, user_input, assistant_response)
+    # キャッシュへの保存は応答を返した後にバックグラウンドで行う
+    if SEMANTIC_CACHE is not None:
+        SEMANTIC_CACHE.store_in_background("advice", user_input, assistant_response, response["messages"][1:], cache_vector)
     
     return assistant_response
 
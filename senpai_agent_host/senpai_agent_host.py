@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bedrock_agentcore.runtime import BedrockAgentCoreApp
+
+from core.agent import AgentHost
+from core.logger import ASGILoggingMiddleware
+from core.metrics import add_metrics_route, set_agent_name
+from core.tracing import setup_tracing
+
+# BedrockAgentCoreアプリケーションの初期化
+app = BedrockAgentCoreApp()
+
+# ステージ別レイテンシのメトリクス（GET /metrics、agentラベルはリクエストごとにルーティング先のエージェント名）
+set_agent_name("host")
+add_metrics_route(app)
+
+# リクエストログ（X-Request-IDを発行）とトレーシング（TRACING_ENABLED=trueで有効）
+app.add_middleware(ASGILoggingMiddleware, logger_name="senpai.http")
+setup_tracing("senpai-agent-host")
+
+# エージェントマニフェスト（環境変数で差し替え可能）
+AGENT_MANIFEST = os.getenv("AGENT_MANIFEST", os.path.join(os.path.dirname(os.path.abspath(__file__)), "agents.json"))
+
+# 全エージェントのグラフを起動時に一度だけコンパイルする
+# （AWSクライアント、メモリ書き込み、意味的キャッシュ、ツールのキャッシュはエージェント間で共有）
+host = AgentHost.from_manifest(AGENT_MANIFEST)
+
+@app.entrypoint
+async def langgraph_bedrock(payload):
+    """
+    payloadの"agent"（main, advice, communication, training）で指定されたエージェントを呼び出す
+    省略時はデフォルトのエージェント、"stream": trueでストリーミング応答（trainingを除く）
+    """
+    return await host.invoke(payload)
+
+if __name__ == "__main__":
+    app.run()
@@ -3,40 +3,68 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from langgraph.graph import StateGraph, MessagesState
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from bedrock_agentcore.memory import MemoryClient
-from langchain_aws import ChatBedrock
+
+from core.aws import get_memory_client
+from core.memory import create_memory_event_writer
+from core.agent import (
+    ContextWindow, GraphEventStream, ModelRouter, create_chat_model, create_chatbot_node, get_prompt_caching_enabled,
+    latency_budget_config, stream_requested,
+)
+from core.logger import ASGILoggingMiddleware
+from core.metrics import REQUEST_LATENCY, add_metrics_route, record_graph_iterations, register_stats, set_agent_name, track_stage
+from core.tracing import setup_tracing, start_span
 
 from prompt import get_prompt
 
 # BedrockAgentCoreアプリケーションの初期化
 app = BedrockAgentCoreApp()
 
-# MemoryClientの初期化
-memory_client = MemoryClient(region_name=os.getenv("AWS_REGION", "us-west-2"))
+# ステージ別レイテンシのメトリクス（GET /metrics）
+set_agent_name("communication")
+add_metrics_route(app)
+
+# リクエストログ（X-Request-IDを発行）とトレーシング（TRACING_ENABLED=trueで有効）
+app.add_middleware(ASGILoggingMiddleware, logger_name="senpai.http")
+setup_tracing("senpai-communication-agent")
+
+# MemoryClientの初期化（クライアントレジストリで共有）
+memory_client = get_memory_client(os.getenv("AWS_REGION", "us-west-2"))
+memory_writer = create_memory_event_writer(memory_client)
 
 # 言語設定
 locale = os.getenv("LOCALE", "en_EN")
 
+# プロンプトキャッシュ（システムプロンプトをBedrock側でキャッシュ）
+PROMPT_CACHING = get_prompt_caching_enabled()
+
+# LLMに送る会話履歴のトークン上限（古いターンから削除。ツール呼び出しと結果は分割しない）
+CONTEXT_WINDOW = ContextWindow.from_env()
+
 def create_agent():
     """LangGraphエージェントの作成と設定"""
-    llm = ChatBedrock(
-        model_id="us.amazon.nova-micro-v1:0",
-        model_kwargs={"temperature": 0.3, "max_tokens": 2048},
-        region_name=os.getenv("AWS_REGION", "us-west-2")
-    )
+    def build_model(model_id):
+        return create_chat_model(
+            model_id=model_id,
+            model_kwargs={"temperature": 0.3, "max_tokens": 2048},
+            region_name=os.getenv("AWS_REGION", "us-west-2"),
+            prompt_caching=PROMPT_CACHING,
+        )
+
+    llm = build_model("us.amazon.nova-micro-v1:0")
+
+    # リクエストの複雑さとレイテンシ予算でモデルのティアを選択（MODEL_ROUTING=trueで有効）
+    model_router = ModelRouter.from_env(build_model)
+    if model_router is not None:
+        register_stats("model_router", model_router.stats)
 
     # システムメッセージ
     system_message = get_prompt(locale=locale)
 
-    def chatbot(state: MessagesState):
-        messages = state["messages"]
-        if not messages or not isinstance(messages[0], SystemMessage):
-            messages = [SystemMessage(content=system_message)] + messages
-
-        response = llm.invoke(messages)
-        return {"messages": [response]}
+    chatbot = create_chatbot_node(
+        llm, system_message, prompt_caching=PROMPT_CACHING, context_window=CONTEXT_WINDOW, model_router=model_router,
+    )
 
     # グラフの作成
     graph_builder = StateGraph(MessagesState)
@@ -48,21 +76,11 @@ def create_agent():
 # エージェントの初期化
 agent = create_agent()
 
-@app.entrypoint
-def langgraph_bedrock(payload):
-    """ペイロードでエージェントを呼び出す"""
-    user_input = payload.get("prompt")
-    session_id = payload.get("session_id", "default_session")
-    user_id = payload.get("user_id", "default_user")
-    
-    messages = [HumanMessage(content=user_input)]
-    response = agent.invoke({"messages": messages})
-    assistant_response = response["messages"][-1].content
-    
-    # メモリ保存
+def save_conversation(user_id, session_id, user_input, assistant_response):
+    """メモリ保存（バックグラウンドで書き込む）"""
     try:
         messages_to_save = [(user_input, "USER"), (assistant_response, "ASSISTANT")]
-        memory_client.create_event(
+        memory_writer.submit(
             memory_id=os.getenv("AWS_MEMORY_ID", "conversation_memory-y0ttEoDG5r"),
             actor_id=user_id,
             session_id=session_id,
@@ -70,6 +88,36 @@ def langgraph_bedrock(payload):
         )
     except Exception as e:
         print(f"Memory save error: {e}")
+
+def stream_response(user_id, session_id, user_input, messages, latency_budget=None):
+    """LLMのトークンを生成され次第イベントとして返す"""
+    event_stream = GraphEventStream(agent, {"messages": messages}, latency_budget_config(latency_budget))
+    # 同期ジェネレーターは呼び出しごとに別スレッドで再開されるため、スパンはカレントにしない
+    with start_span("agent.invoke", current=False, **{"senpai.stream": True}), \
+            track_stage(REQUEST_LATENCY, mode="stream"):
+        yield from event_stream
+    record_graph_iterations(event_stream.messages)
+    save_conversation(user_id, session_id, user_input, event_stream.final_text)
+
+@app.entrypoint
+def langgraph_bedrock(payload):
+    """ペイロードでエージェントを呼び出す（"stream": trueでストリーミング応答）"""
+    user_input = payload.get("prompt")
+    session_id = payload.get("session_id", "default_session")
+    user_id = payload.get("user_id", "default_user")
+    # レイテンシ予算（ミリ秒、モデルルーティングが有効な場合に使用）
+    latency_budget = payload.get("latency_budget_ms")
+    
+    messages = [HumanMessage(content=user_input)]
+    if stream_requested(payload):
+        return stream_response(user_id, session_id, user_input, messages, latency_budget)
+    
+    with start_span("agent.invoke", **{"senpai.stream": False}), track_stage(REQUEST_LATENCY, mode="invoke"):
+        response = agent.invoke({"messages": messages}, latency_budget_config(latency_budget))
+    record_graph_iterations(response["messages"])
+    assistant_response = response["messages"][-1].content
+    
+    save_conversation(user_id, session_id, user_input, assistant_response)
     
     return assistant_response
 
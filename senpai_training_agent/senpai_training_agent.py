@@ -3,55 +3,90 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from langgraph.graph import StateGraph, MessagesState
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt import tools_condition
 
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from bedrock_agentcore.memory import MemoryClient
-from langchain_aws import ChatBedrock
 
-# Import ToolFactory and all registered tools
+from core.aws import get_memory_client
+from core.memory import create_memory_event_writer
+from core.agent import (
+    ContextWindow, ModelRouter, bind_tools, create_chat_model, create_chatbot_node, create_tool_node,
+    get_prompt_caching_enabled, latency_budget_config,
+)
+from core.logger import ASGILoggingMiddleware
+from core.metrics import REQUEST_LATENCY, add_metrics_route, record_graph_iterations, register_stats, set_agent_name, track_stage
+from core.tracing import setup_tracing, start_span
+
+# Import ToolFactory (tools are loaded lazily from the tool manifest)
 from core.tools.tool_factory import ToolFactory
-from core.tools.libs.quiz_generator_tool import QuizGeneratorTool
+from core.tools.tool_context import ToolContext, use_tool_context
 from prompt import get_prompt
 
 # BedrockAgentCoreアプリケーションの初期化
 app = BedrockAgentCoreApp()
 
-# MemoryClientの初期化
-memory_client = MemoryClient(region_name=os.getenv("AWS_REGION", "us-west-2"))
+# ステージ別レイテンシのメトリクス（GET /metrics）
+set_agent_name("training")
+add_metrics_route(app)
+
+# リクエストログ（X-Request-IDを発行）とトレーシング（TRACING_ENABLED=trueで有効）
+app.add_middleware(ASGILoggingMiddleware, logger_name="senpai.http")
+setup_tracing("senpai-training-agent")
+
+# MemoryClientの初期化（クライアントレジストリで共有）
+memory_client = get_memory_client(os.getenv("AWS_REGION", "us-west-2"))
+memory_writer = create_memory_event_writer(memory_client)
 
 # 言語設定
 locale = os.getenv("LOCALE", "en_EN")
 
+# プロンプトキャッシュ（システムプロンプトとツール定義をBedrock側でキャッシュ）
+PROMPT_CACHING = get_prompt_caching_enabled()
+
+# LLMに送る会話履歴のトークン上限（古いターンから削除。ツール呼び出しと結果は分割しない）
+CONTEXT_WINDOW = ContextWindow.from_env()
+
+# ツールマニフェスト（環境変数で差し替え可能）
+TOOL_MANIFEST = os.getenv("TOOL_MANIFEST", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools.json"))
+
 def create_agent():
     """LangGraphエージェントの作成と設定"""
-    llm = ChatBedrock(
-        model_id="us.amazon.nova-micro-v1:0",
-        model_kwargs={"temperature": 0.1, "max_tokens": 2048},
-        region_name=os.getenv("AWS_REGION", "us-west-2")
-    )
+    def build_model(model_id):
+        return create_chat_model(
+            model_id=model_id,
+            model_kwargs={"temperature": 0.1, "max_tokens": 2048},
+            region_name=os.getenv("AWS_REGION", "us-west-2"),
+            prompt_caching=PROMPT_CACHING,
+        )
+
+    llm = build_model("us.amazon.nova-micro-v1:0")
 
-    # ToolFactoryから全ツールインスタンスを取得
-    tool_instances = [tool_cls() for tool_cls in ToolFactory._registry.values()]
+    # ツールマニフェストからツールを取得（初回呼び出し時に読み込まれる）
+    tool_instances = ToolFactory.create_tools_from_manifest(TOOL_MANIFEST)
     tools = [t.as_langchain_tool() for t in tool_instances]
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools = bind_tools(llm, tools, prompt_caching=PROMPT_CACHING)
+
+    # リクエストの複雑さとレイテンシ予算でモデルのティアを選択（MODEL_ROUTING=trueで有効）
+    model_router = ModelRouter.from_env(
+        lambda model_id: bind_tools(build_model(model_id), tools, prompt_caching=PROMPT_CACHING),
+        has_tools=True,
+    )
+    if model_router is not None:
+        register_stats("model_router", model_router.stats)
 
     # システムメッセージ
     system_message = get_prompt(locale=locale)
 
-    def chatbot(state: MessagesState):
-        messages = state["messages"]
-        if not messages or not isinstance(messages[0], SystemMessage):
-            messages = [SystemMessage(content=system_message)] + messages
-
-        response = llm_with_tools.invoke(messages)
-        return {"messages": [response]}
+    chatbot = create_chatbot_node(
+        llm_with_tools, system_message, prompt_caching=PROMPT_CACHING, context_window=CONTEXT_WINDOW, model_router=model_router,
+    )
 
     # グラフの作成
     graph_builder = StateGraph(MessagesState)
     graph_builder.add_node("chatbot", chatbot)
-    graph_builder.add_node("tools", ToolNode(tools))
+    # 1ターンで複数のツール呼び出し（複数の問題集など）があれば並行実行する
+    graph_builder.add_node("tools", create_tool_node(tools, tool_limits={t.name: t.max_concurrency for t in tool_instances}))
     graph_builder.add_conditional_edges("chatbot", tools_condition)
     graph_builder.add_edge("tools", "chatbot")
     graph_builder.set_entry_point("chatbot")
@@ -69,9 +104,15 @@ def langgraph_bedrock(payload):
     user_input = payload.get("prompt")
     session_id = payload.get("session_id", "default_session")
     user_id = payload.get("user_id", "default_user")
+    # レイテンシ予算（ミリ秒、モデルルーティングが有効な場合に使用）
+    latency_budget = payload.get("latency_budget_ms")
     
     messages = [HumanMessage(content=user_input)]
-    response = agent.invoke({"messages": messages})
+    # ツールがユーザーごとの出題履歴を参照できるようにリクエスト単位のコンテキストを設定
+    with use_tool_context(ToolContext(actor_id=user_id, user_id=user_id, session_id=session_id)), \
+            start_span("agent.invoke", **{"senpai.stream": False}), track_stage(REQUEST_LATENCY, mode="invoke"):
+        response = agent.invoke({"messages": messages}, latency_budget_config(latency_budget))
+    record_graph_iterations(response["messages"])
     assistant_response = response["messages"][-1].content
     
     try:
@@ -87,10 +128,10 @@ def langgraph_bedrock(payload):
             "message": assistant_response
         }, ensure_ascii=False)
     
-    # メモリ保存
+    # メモリ保存（バックグラウンドで書き込む）
     try:
         messages_to_save = [(user_input, "USER"), (final_response, "ASSISTANT")]
-        memory_client.create_event(
+        memory_writer.submit(
             memory_id=os.getenv("AWS_MEMORY_ID", "genquiz_memory-U5BEjJ8NGy"),
             actor_id=user_id,
             session_id=session_id,
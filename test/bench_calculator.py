@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: CalculatorTool (AST-compiled, bounded) vs. the previous eval()-based
+implementation, plus the time to reject runaway expressions.
+
+    python test/bench_calculator.py [iterations]
+"""
+import math
+import operator
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.tools.libs.calculator_tool import CalculatorTool
+
+
+def legacy_run(expression: str) -> str:
+    """The previous CalculatorTool.run (globals rebuilt per call, unbounded eval)."""
+    try:
+        safe_dict = {
+            "__builtins__": {},
+            "abs": abs, "round": round, "min": min, "max": max,
+            "sum": sum, "pow": pow,
+            "sqrt": math.sqrt, "sin": math.sin, "cos": math.cos, "tan": math.tan,
+            "log": math.log, "log10": math.log10, "exp": math.exp,
+            "pi": math.pi, "e": math.e,
+            "ceil": math.ceil, "floor": math.floor,
+            "degrees": math.degrees, "radians": math.radians,
+            "add": operator.add, "sub": operator.sub,
+            "mul": operator.mul, "truediv": operator.truediv,
+        }
+        return str(eval(expression, safe_dict))
+    except Exception as e:
+        return f"エラー: {str(e)}"
+
+
+EXPRESSIONS = [
+    "2 + 3 * 4",
+    "15 * 7 + 3",
+    "sqrt(16)",
+    "sin(pi/2)",
+    "round(1234.5678 * 1.08, 2)",
+    "(120000 - 30000) / 12",
+    "max(3, 7, 2) + min(4, 9)",
+    "sum([1, 2, 3, 4, 5]) / 5",
+]
+
+# Runaway inputs: never run these through legacy_run, they would pin a core
+RUNAWAY_EXPRESSIONS = [
+    "9**9**9",
+    "pow(10, 10**9)",
+    "10**300 * 10**300",
+    "round(1, -10**9)",
+    "sum([1] * 10**9)",
+    "mul([1], 10**9)",
+]
+
+
+def bench(run, expressions, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for expression in expressions:
+            run(expression)
+    return iterations * len(expressions) / (time.perf_counter() - start)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tool = CalculatorTool()
+
+    for expression in EXPRESSIONS:
+        assert tool.run(expression) == legacy_run(expression), expression
+
+    print("Typical expressions (repeated, as the LLM tends to re-send them)")
+    baseline = bench(legacy_run, EXPRESSIONS, iterations)
+    print(f"  {'eval (previous)':28s} {baseline:12,.0f} calls/s  (1.00x)")
+    rate = bench(tool.run, EXPRESSIONS, iterations)
+    print(f"  {'AST compiled + LRU cache':28s} {rate:12,.0f} calls/s  ({rate / baseline:.2f}x)")
+
+    unique = [f"{i} * 1.08 + {i % 7}" for i in range(iterations)]
+    baseline = bench(legacy_run, unique, 1)
+    rate = bench(tool.run, unique, 1)
+    print("Unique expressions (every call parses and compiles)")
+    print(f"  {'eval (previous)':28s} {baseline:12,.0f} calls/s  (1.00x)")
+    print(f"  {'AST compiled + LRU cache':28s} {rate:12,.0f} calls/s  ({rate / baseline:.2f}x)")
+
+    print("Runaway expressions (rejected by the limits)")
+    for expression in RUNAWAY_EXPRESSIONS:
+        start = time.perf_counter()
+        result = tool.run(expression)
+        print(f"  {expression:20s} {(time.perf_counter() - start) * 1000:8.3f} ms  {result}")
+
+
+if __name__ == "__main__":
+    main()
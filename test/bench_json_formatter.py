@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: records per second of StructuredJSONFormatter vs. JSONFormatter.
+
+    python test/bench_json_formatter.py [iterations]
+"""
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.logger.logger_config import JSONFormatter, StructuredJSONFormatter
+
+
+LATENCY_FIELDS = {
+    "method": "POST",
+    "path": "/invocations",
+    "status_code": 200,
+    "duration_ms": 123.45,
+}
+
+
+def make_record(with_latency_fields: bool = True) -> logging.LogRecord:
+    record = logging.LogRecord(
+        name="senpai.http",
+        level=logging.INFO,
+        pathname=__file__,
+        lineno=42,
+        msg="Request completed: %s %s - %d",
+        args=("POST", "/invocations", 200),
+        exc_info=None,
+        func="dispatch",
+    )
+    record.__dict__.update({
+        "request_id": "3f1c2a9e-8d7b-4c55-9a0e-1b2c3d4e5f60",
+        "user_id": "user-001",
+        "session_id": "session-001",
+    })
+    if with_latency_fields:
+        record.__dict__.update(LATENCY_FIELDS)
+    return record
+
+
+def bench(formatter: logging.Formatter, iterations: int, with_latency_fields: bool) -> float:
+    record = make_record(with_latency_fields)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        formatter.format(record)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    candidates = [
+        ("JSONFormatter", JSONFormatter()),
+        ("StructuredJSONFormatter (json)", StructuredJSONFormatter(use_orjson=False)),
+    ]
+    structured = StructuredJSONFormatter()
+    if structured.use_orjson:
+        candidates.append(("StructuredJSONFormatter (orjson)", structured))
+
+    scenarios = [
+        ("request_id/user_id/session_id only (same output for both formatters)", False),
+        ("with method/path/status_code/duration_ms extras (dropped by JSONFormatter)", True),
+    ]
+    for title, with_latency_fields in scenarios:
+        print(title)
+        baseline = None
+        for label, formatter in candidates:
+            rate = bench(formatter, iterations, with_latency_fields)
+            baseline = baseline or rate
+            print(f"  {label:34s} {rate:12,.0f} records/s  ({rate / baseline:.2f}x)")
+
+    print()
+    print("JSONFormatter output:          ", JSONFormatter().format(make_record()))
+    print("StructuredJSONFormatter output:", structured.format(make_record()))
+
+
+if __name__ == "__main__":
+    main()
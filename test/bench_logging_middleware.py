@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: requests per second through LoggingMiddleware (BaseHTTPMiddleware) vs.
+ASGILoggingMiddleware, driving the ASGI app in-process (no network).
+
+    python test/bench_logging_middleware.py [requests] [concurrency] [body_kb]
+
+Also checks that an SSE response is forwarded chunk by chunk through each middleware.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from core.logger.starlette_logger import ASGILoggingMiddleware, LoggingMiddleware
+
+
+async def invocations(request: Request):
+    payload = await request.json()
+    return JSONResponse({"result": len(payload.get("prompt", ""))})
+
+
+async def stream(request: Request):
+    async def events():
+        for i in range(3):
+            yield f"data: {json.dumps({'chunk': i})}\n\n"
+            await asyncio.sleep(0.01)
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def build_app(middleware=None) -> Starlette:
+    app = Starlette(routes=[
+        Route("/invocations", invocations, methods=["POST"]),
+        Route("/stream", stream, methods=["POST"]),
+    ])
+    if middleware is not None:
+        app.add_middleware(middleware, logger_name="senpai.bench.http")
+    return app
+
+
+async def call(app, path: str, body: bytes):
+    """Send one request and return (status, list of (elapsed_s, body chunk))."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8080),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    start = time.perf_counter()
+    status = None
+    chunks = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            chunks.append((time.perf_counter() - start, message["body"]))
+
+    await app(scope, receive, send)
+    return status, chunks
+
+
+async def bench(app, total: int, concurrency: int, body: bytes) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            status, _ = await call(app, "/invocations", body)
+            assert status == 200, status
+
+    await call(app, "/invocations", body)  # warm-up
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    body_kb = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+
+    bench_logger = logging.getLogger("senpai.bench")
+    bench_logger.setLevel(logging.INFO)
+    bench_logger.addHandler(logging.NullHandler())
+    bench_logger.propagate = False
+
+    body = json.dumps({
+        "user_id": "user-001",
+        "session_id": "session-001",
+        "prompt": "x" * (body_kb * 1024),
+    }).encode()
+
+    candidates = [
+        ("no middleware", None),
+        ("LoggingMiddleware", LoggingMiddleware),
+        ("ASGILoggingMiddleware", ASGILoggingMiddleware),
+    ]
+
+    print(f"{total} requests, concurrency {concurrency}, body {len(body) / 1024:.0f} KB")
+    for label, middleware in candidates:
+        rate = await bench(build_app(middleware), total, concurrency, body)
+        print(f"  {label:24s} {rate:10,.0f} req/s")
+
+    print("SSE chunk arrival times (ms):")
+    for label, middleware in candidates:
+        _, chunks = await call(build_app(middleware), "/stream", b"{}")
+        print(f"  {label:24s} {[round(elapsed * 1000) for elapsed, _ in chunks]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for an agent's /invocations endpoint.
+
+Run against an agent started with the stubbed backends:
+
+    STUB_LLM_LATENCY_MS=300 python test/run_with_stubs.py senpai-main-agent/senpai-main-agent.py
+    python test/load_test.py --concurrency 20 --duration 60 --ramp-up 10
+
+or let the script start (and stop) the agent itself:
+
+    python test/load_test.py --agent senpai-main-agent/senpai-main-agent.py --concurrency 20
+
+Request mix file (JSON), weights are relative:
+
+    [{"name": "chat", "weight": 3, "payload": {"prompt": "こんにちは"}},
+     {"name": "joke", "weight": 1, "payload": {"prompt": "Tell me a joke!", "stream": true}}]
+
+Each virtual user sends its own user_id/session_id. The report shows throughput,
+p50/p95/p99 latency (and time to first byte for streaming requests) per request
+type and overall.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import requests
+
+DEFAULT_MIX = [
+    {"name": "intro", "weight": 2, "payload": {"prompt": "Hello! Can you introduce yourself?"}},
+    {"name": "calc", "weight": 1, "payload": {"prompt": "Calculate 15 * 7 + 3"}},
+    {"name": "joke", "weight": 1, "payload": {"prompt": "Tell me a joke!"}},
+    {"name": "advice", "weight": 2, "payload": {"prompt": "新人研修で気をつけることを教えてください"}},
+    {"name": "stream", "weight": 1, "payload": {"prompt": "疲れたので何か面白い話をしてください", "stream": True}},
+]
+
+
+@dataclass
+class Result:
+    name: str
+    started: float
+    latency: float
+    ttfb: float
+    status: int
+    ok: bool
+    error: Optional[str] = None
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile (values must be sorted)."""
+    if not values:
+        return float("nan")
+    rank = max(1, math.ceil(p / 100.0 * len(values)))
+    return values[rank - 1]
+
+
+def send(session: requests.Session, url: str, name: str, payload: Dict[str, Any], timeout: float) -> Result:
+    started = time.perf_counter()
+    ttfb = None
+    try:
+        with session.post(url, json=payload, timeout=timeout, stream=True) as response:
+            for chunk in response.iter_content(chunk_size=None):
+                if ttfb is None and chunk:
+                    ttfb = time.perf_counter() - started
+            latency = time.perf_counter() - started
+            ok = response.status_code == 200
+            return Result(name, started, latency, ttfb or latency, response.status_code, ok,
+                          None if ok else f"HTTP {response.status_code}")
+    except requests.RequestException as e:
+        latency = time.perf_counter() - started
+        return Result(name, started, latency, latency, 0, False, type(e).__name__)
+
+
+def worker(index: int, args, mix: List[Dict[str, Any]], start_at: float, stop_at: float,
+           budget: Optional[List[int]], lock: threading.Lock, results: List[Result]) -> None:
+    rng = random.Random(args.seed + index)
+    weights = [entry.get("weight", 1) for entry in mix]
+    session = requests.Session()
+    user_id = f"load-user-{index:04d}"
+
+    # Ramp-up: virtual users start evenly spread over the ramp-up period
+    time.sleep(max(0.0, start_at + args.ramp_up * index / max(1, args.concurrency) - time.perf_counter()))
+    while time.perf_counter() < stop_at:
+        if budget is not None:
+            with lock:
+                if budget[0] <= 0:
+                    return
+                budget[0] -= 1
+        entry = rng.choices(mix, weights=weights)[0]
+        payload = {"user_id": user_id, "session_id": f"load-session-{index:04d}", **entry["payload"]}
+        result = send(session, args.url, entry.get("name", "request"), payload, args.timeout)
+        with lock:
+            results.append(result)
+        if args.think_time:
+            time.sleep(args.think_time)
+
+
+def summarize(results: List[Result], elapsed: float) -> Dict[str, Any]:
+    def stats(items: List[Result]) -> Dict[str, Any]:
+        latencies = sorted(r.latency for r in items if r.ok)
+        ttfbs = sorted(r.ttfb for r in items if r.ok)
+        return {
+            "requests": len(items),
+            "errors": sum(1 for r in items if not r.ok),
+            "throughput_rps": round(len(items) / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else float("nan"),
+            "ttfb_p50_ms": round(percentile(ttfbs, 50) * 1000, 1),
+            "ttfb_p95_ms": round(percentile(ttfbs, 95) * 1000, 1),
+        }
+
+    by_name = defaultdict(list)
+    for r in results:
+        by_name[r.name].append(r)
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "overall": stats(results),
+        "by_request": {name: stats(items) for name, items in sorted(by_name.items())},
+        "status_codes": dict(Counter(r.status for r in results)),
+        "errors": dict(Counter(r.error for r in results if r.error)),
+    }
+
+
+def print_report(summary: Dict[str, Any], args) -> None:
+    print(f"\nURL: {args.url}  concurrency: {args.concurrency}  ramp-up: {args.ramp_up}s  elapsed: {summary['elapsed_s']}s")
+    header = f"{'request':12s} {'count':>7s} {'err':>5s} {'req/s':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s} {'ttfb50':>8s}"
+    print(header)
+    print("-" * len(header))
+    rows = list(summary["by_request"].items()) + [("TOTAL", summary["overall"])]
+    for name, s in rows:
+        print(f"{name:12s} {s['requests']:7d} {s['errors']:5d} {s['throughput_rps']:8.2f} "
+              f"{s['p50_ms']:8.1f} {s['p95_ms']:8.1f} {s['p99_ms']:8.1f} {s['max_ms']:8.1f} {s['ttfb_p50_ms']:8.1f}")
+    print("(latencies in ms)")
+    print(f"status codes: {summary['status_codes']}")
+    if summary["errors"]:
+        print(f"errors: {summary['errors']}")
+
+
+def start_agent(agent_path: str, url: str, timeout: float) -> subprocess.Popen:
+    """Start an agent with the stubbed backends and wait until /ping answers."""
+    env = dict(os.environ)
+    # There is no stub embedding model; keep the semantic cache offline with the hashing embedder
+    env.setdefault("SEMANTIC_CACHE_EMBEDDER", "hashing")
+    env.setdefault("SEMANTIC_CACHE_ALLOW_HASHING", "true")
+    agent_path = os.path.abspath(agent_path)
+    launcher = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_with_stubs.py")
+    process = subprocess.Popen([sys.executable, launcher, agent_path], cwd=os.path.dirname(agent_path), env=env)
+    ping_url = url.split("/invocations")[0] + "/ping"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Agent exited with code {process.returncode}")
+        try:
+            if requests.get(ping_url, timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"Agent did not become ready within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for /invocations")
+    parser.add_argument("--url", default="http://localhost:8080/invocations")
+    parser.add_argument("--concurrency", type=int, default=10, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Test duration in seconds (incl. ramp-up)")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds until all virtual users are active")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0: duration only)")
+    parser.add_argument("--mix", help="JSON file with the request mix")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause between requests per user (s)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the request mix")
+    parser.add_argument("--agent", help="Agent script to start with the stubbed backends for the test")
+    parser.add_argument("--json", dest="json_path", help="Write the summary as JSON to this file")
+    args = parser.parse_args()
+
+    mix = DEFAULT_MIX
+    if args.mix:
+        with open(args.mix, encoding="utf-8") as f:
+            mix = json.load(f)
+
+    agent_process = start_agent(args.agent, args.url, 120) if args.agent else None
+    try:
+        results: List[Result] = []
+        lock = threading.Lock()
+        budget = [args.requests] if args.requests > 0 else None
+        start_at = time.perf_counter()
+        stop_at = start_at + args.duration
+        threads = [
+            threading.Thread(target=worker, args=(i, args, mix, start_at, stop_at, budget, lock, results), daemon=True)
+            for i in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start_at
+    finally:
+        if agent_process is not None:
+            agent_process.terminate()
+            agent_process.wait(10)
+
+    summary = summarize(results, elapsed)
+    print_report(summary, args)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
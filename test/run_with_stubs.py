@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Run an agent script with the local stand-ins for Bedrock, AgentCore Memory and the
+knowledge base installed (see test/senpai_stubs), e.g. for load tests without AWS:
+
+    STUB_LLM_LATENCY_MS=300 python test/run_with_stubs.py senpai-main-agent/senpai-main-agent.py
+"""
+import os
+import runpy
+import sys
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(TEST_DIR))
+sys.path.insert(0, TEST_DIR)
+
+import senpai_stubs
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(f"usage: {sys.argv[0]} <agent script> [args...]")
+    agent_path = os.path.abspath(sys.argv[1])
+    # The agent sees the same sys.argv and sys.path[0] as when started directly
+    sys.argv = sys.argv[1:]
+    sys.path.insert(0, os.path.dirname(agent_path))
+    senpai_stubs.install()
+    runpy.run_path(agent_path, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Deterministic local stand-ins for Bedrock, AgentCore Memory and the knowledge base.
+
+These are test fixtures, not part of the deployed agents: install() injects them into
+the process through the hooks of the client registry and of create_chat_model(), so
+agents and tests run without AWS credentials. test/run_with_stubs.py starts an agent
+script with the stubs installed (used by test/load_test.py).
+"""
+
+from .aws import (
+    StubAgentRuntimeClient,
+    StubMemoryClient,
+    create_stub_client,
+    create_stub_memory_client,
+    simulated_latency,
+    stable_digest,
+)
+from .llm import StubChatModel
+
+
+def install() -> None:
+    """Replace the AWS clients and chat models of this process with the stubs."""
+    from core.agent import set_chat_model_factory
+    from core.aws import set_client_factories
+
+    set_client_factories(client_factory=create_stub_client, memory_client_factory=create_stub_memory_client)
+    set_chat_model_factory(StubChatModel.create)
+
+
+def uninstall() -> None:
+    """Restore the real AWS clients and chat models."""
+    from core.agent import set_chat_model_factory
+    from core.aws import set_client_factories
+
+    set_client_factories()
+    set_chat_model_factory(None)
+
+
+__all__ = [
+    'StubAgentRuntimeClient',
+    'StubMemoryClient',
+    'StubChatModel',
+    'create_stub_client',
+    'create_stub_memory_client',
+    'simulated_latency',
+    'stable_digest',
+    'install',
+    'uninstall',
+]
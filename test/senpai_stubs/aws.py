@@ -0,0 +1,175 @@
+"""
+Deterministic local stand-ins for the AWS backends used by SenpAI agents.
+
+Once installed (senpai_stubs.install()), the client registry hands out these stubs
+instead of real clients, so agents can be load-tested locally without AWS
+credentials. Each stub sleeps for a configurable simulated latency. The jitter is
+derived from a hash of the request, so the same input always takes the same time and
+returns the same output.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+def stable_digest(*parts: Any) -> int:
+    """Return a stable integer hash of the given values (independent of PYTHONHASHSEED)."""
+    data = "\x1f".join(str(part) for part in parts).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(data).digest()[:8], "big")
+
+
+def simulated_latency(base_ms: float, jitter: float, *key: Any) -> float:
+    """
+    Deterministic latency in seconds for a request.
+
+    Args:
+        base_ms: Mean latency in milliseconds
+        jitter: Relative jitter (0.2 = +/-20%)
+        *key: Values identifying the request
+
+    Returns:
+        Latency in seconds
+    """
+    if base_ms <= 0:
+        return 0.0
+    unit = (stable_digest(*key) % 10001) / 5000.0 - 1.0  # [-1, 1]
+    return max(0.0, base_ms * (1.0 + jitter * unit)) / 1000.0
+
+
+def _latency_ms(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+
+def _jitter() -> float:
+    return float(os.getenv("STUB_LATENCY_JITTER", "0.2"))
+
+
+class StubMemoryClient:
+    """
+    In-memory stand-in for bedrock_agentcore.memory.MemoryClient.
+
+    Implements create_event() and get_last_k_turns() with the same message and
+    turn shapes as AgentCore Memory.
+    """
+
+    def __init__(self, latency_ms: Optional[float] = None, jitter: Optional[float] = None, max_turns: int = 100):
+        """
+        Args:
+            latency_ms: Simulated latency per call (default: STUB_MEMORY_LATENCY_MS or 50)
+            jitter: Relative latency jitter (default: STUB_LATENCY_JITTER or 0.2)
+            max_turns: Turns kept per session
+        """
+        self.latency_ms = _latency_ms("STUB_MEMORY_LATENCY_MS", "50") if latency_ms is None else latency_ms
+        self.jitter = _jitter() if jitter is None else jitter
+        self.max_turns = max_turns
+        self._sessions: Dict[Tuple[str, str, str], List[List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def create_event(
+        self,
+        memory_id: str,
+        actor_id: str,
+        session_id: str,
+        messages: List[Tuple[str, str]],
+        event_timestamp: Any = None,
+        branch: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        time.sleep(simulated_latency(self.latency_ms, self.jitter, "create_event", actor_id, session_id, len(messages)))
+        key = (memory_id, actor_id, session_id)
+        with self._lock:
+            turns = self._sessions.setdefault(key, [])
+            for text, role in messages:
+                message = {"role": role.upper(), "content": {"text": text}}
+                # A USER message starts a new turn
+                if message["role"] == "USER" or not turns:
+                    turns.append([message])
+                else:
+                    turns[-1].append(message)
+            del turns[:-self.max_turns]
+            event_id = f"stub-{stable_digest(key, len(turns)):x}"
+        return {"eventId": event_id, "memoryId": memory_id, "actorId": actor_id, "sessionId": session_id}
+
+    def get_last_k_turns(
+        self,
+        memory_id: str,
+        actor_id: str,
+        session_id: str,
+        k: int = 5,
+        branch_name: Optional[str] = None,
+        include_branches: bool = False,
+        max_results: int = 100,
+    ) -> List[List[Dict[str, Any]]]:
+        time.sleep(simulated_latency(self.latency_ms, self.jitter, "get_last_k_turns", actor_id, session_id, k))
+        with self._lock:
+            turns = self._sessions.get((memory_id, actor_id, session_id), [])
+            # Most recent turn first, like AgentCore Memory
+            return [list(turn) for turn in reversed(turns[-k:])] if k > 0 else []
+
+
+_QUIZ_REQUEST = re.compile(r"create (\d+) multiple-choice questions at (.+?) level about (.+?), with")
+
+
+class StubAgentRuntimeClient:
+    """
+    Stand-in for the boto3 "bedrock-agent-runtime" client. retrieve_and_generate()
+    returns a quiz in the JSON format requested by QuizGeneratorTool.
+    """
+
+    def __init__(self, latency_ms: Optional[float] = None, jitter: Optional[float] = None):
+        """
+        Args:
+            latency_ms: Simulated latency per call (default: STUB_KB_LATENCY_MS or 800)
+            jitter: Relative latency jitter (default: STUB_LATENCY_JITTER or 0.2)
+        """
+        self.latency_ms = _latency_ms("STUB_KB_LATENCY_MS", "800") if latency_ms is None else latency_ms
+        self.jitter = _jitter() if jitter is None else jitter
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def retrieve_and_generate(self, input: Dict[str, Any], retrieveAndGenerateConfiguration: Dict[str, Any] = None, **kwargs) -> Dict[str, Any]:
+        query = input.get("text", "")
+        time.sleep(simulated_latency(self.latency_ms, self.jitter, "retrieve_and_generate", query))
+
+        match = _QUIZ_REQUEST.search(query)
+        count, difficulty, topic = (int(match.group(1)), match.group(2), match.group(3)) if match else (3, "初級", "IT知識")
+        with self._lock:
+            # Each generation yields new questions so the question bank keeps growing
+            self._generation += 1
+            generation = self._generation
+
+        quiz = {"questions": [], "selects": [], "answers": [], "explanations": []}
+        for i in range(count):
+            answer = "ABC"[stable_digest(topic, difficulty, generation, i) % 3]
+            quiz["questions"].append(f"[stub] {topic} ({difficulty}) question {generation}-{i + 1}")
+            quiz["selects"].append({choice: f"Choice {choice}" for choice in "ABC"})
+            quiz["answers"].append(answer)
+            quiz["explanations"].append(f"[stub] The answer is {answer}.")
+        return {"output": {"text": json.dumps(quiz, ensure_ascii=False)}, "citations": []}
+
+
+def create_stub_memory_client(region_name: Optional[str] = None) -> StubMemoryClient:
+    """Create the AgentCore Memory stub (the region is ignored)."""
+    return StubMemoryClient()
+
+
+def create_stub_client(service_name: str, region_name: Optional[str] = None) -> Any:
+    """
+    Create the stub for a boto3 service.
+
+    Args:
+        service_name: boto3 service name
+        region_name: AWS region (ignored)
+
+    Returns:
+        Stub client
+
+    Raises:
+        ValueError: If there is no stub for the service
+    """
+    if service_name == "bedrock-agent-runtime":
+        return StubAgentRuntimeClient()
+    raise ValueError(f"No stub client for service '{service_name}'")
@@ -0,0 +1,115 @@
+"""
+Deterministic stand-in for ChatBedrock, installed by senpai_stubs.install().
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from core.agent import message_text
+from .aws import simulated_latency, stable_digest
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that answers without calling Bedrock.
+
+    Responses, tool calls and simulated latency are derived from a hash of the
+    conversation, so a given prompt always produces the same result. When tools are
+    bound, a ``tool_call_rate`` share of user prompts triggers one tool call (with
+    empty arguments), which exercises the agent's tool loop.
+    """
+
+    model_id: str = "stub"
+    latency_ms: float = 300.0
+    jitter: float = 0.2
+    tool_call_rate: float = 0.0
+    response_chars: int = 200
+
+    @classmethod
+    def from_env(cls, model_id: str = "stub") -> "StubChatModel":
+        """
+        Create a stub model configured from environment variables.
+
+        Environment variables:
+            STUB_LLM_LATENCY_MS: Simulated latency per call (default: 300)
+            STUB_LATENCY_JITTER: Relative latency jitter (default: 0.2)
+            STUB_TOOL_CALL_RATE: Share of user prompts that trigger a tool call (default: 0.3)
+            STUB_RESPONSE_CHARS: Length of generated answers (default: 200)
+        """
+        return cls(
+            model_id=model_id,
+            latency_ms=float(os.getenv("STUB_LLM_LATENCY_MS", "300")),
+            jitter=float(os.getenv("STUB_LATENCY_JITTER", "0.2")),
+            tool_call_rate=float(os.getenv("STUB_TOOL_CALL_RATE", "0.3")),
+            response_chars=int(os.getenv("STUB_RESPONSE_CHARS", "200")),
+        )
+
+    @classmethod
+    def create(cls, model_id: str, model_kwargs: Optional[dict] = None, region_name: Optional[str] = None,
+               prompt_caching: bool = False) -> "StubChatModel":
+        """Chat model factory for core.agent.set_chat_model_factory() (the Bedrock options are ignored)."""
+        return cls.from_env(model_id)
+
+    @property
+    def _llm_type(self) -> str:
+        return "senpai-stub"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        # Prompt-cache checkpoints ({"cachePoint": ...}) are not tools
+        tool_names = [
+            convert_to_openai_tool(tool)["function"]["name"]
+            for tool in tools
+            if not (isinstance(tool, dict) and "cachePoint" in tool)
+        ]
+        return self.bind(tool_names=tool_names, **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], tool_names: Optional[List[str]]) -> ChatResult:
+        transcript = [message_text(m.content) for m in messages]
+        digest = stable_digest(self.model_id, *transcript)
+        last = messages[-1] if messages else None
+        input_tokens = sum(len(text) for text in transcript) // 4
+
+        if tool_names and isinstance(last, HumanMessage) and digest % 1000 < self.tool_call_rate * 1000:
+            tool_name = tool_names[digest % len(tool_names)]
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": tool_name, "args": {}, "id": f"call_{digest:x}"}],
+                usage_metadata={"input_tokens": input_tokens, "output_tokens": 10, "total_tokens": input_tokens + 10},
+            )
+        else:
+            if isinstance(last, ToolMessage):
+                seed = f"[stub] Tool {last.name} returned: {message_text(last.content)}"
+            else:
+                seed = f"[stub:{digest % 100000:05d}] {transcript[-1] if transcript else ''}"
+            text = (seed + " ") * (self.response_chars // max(1, len(seed) + 1) + 1)
+            text = text[: self.response_chars]
+            output_tokens = len(text) // 4
+            message = AIMessage(
+                content=text,
+                usage_metadata={
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "total_tokens": input_tokens + output_tokens,
+                },
+            )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _latency(self, messages: List[BaseMessage]) -> float:
+        return simulated_latency(self.latency_ms, self.jitter, self.model_id, *(message_text(m.content) for m in messages))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                  tool_names: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._latency(messages))
+        return self._respond(messages, tool_names)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                         tool_names: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._latency(messages))
+        return self._respond(messages, tool_names)
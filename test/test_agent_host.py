@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Offline tests for per-agent settings of the multi-agent host (stub backend).
+
+    python test/test_agent_host.py
+"""
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import senpai_stubs
+from core.agent.host import AgentHost, AgentSpec
+
+
+class FakeMemoryWriter:
+    """Stand-in for the shared MemoryEventWriter that records the submitted events."""
+
+    def __init__(self):
+        self.events = []
+
+    def submit(self, **event):
+        self.events.append(event)
+        return True
+
+
+def make_host(**kwargs):
+    specs = [
+        AgentSpec.from_dict({
+            "name": "advice",
+            "prompt": "senpai_advice_agent/prompt.py",
+            "temperature": 0.7,
+            "model_kwargs": {"top_p": 0.9},
+            "prompt_caching": False,
+            "context_max_tokens": 2000,
+            "context_strategy": "summarize",
+        }, base_dir=ROOT),
+        AgentSpec.from_dict({"name": "communication", "prompt": "senpai_communication_agent/prompt.py"}, base_dir=ROOT),
+    ]
+    senpai_stubs.install()
+    try:
+        return AgentHost(specs, memory_writer=FakeMemoryWriter(), prompt_caching=True, **kwargs)
+    finally:
+        senpai_stubs.uninstall()
+
+
+def test_agents_keep_their_own_settings():
+    host = make_host()
+    advice, communication = host.agents["advice"], host.agents["communication"]
+
+    assert advice.prompt_caching is False
+    assert (advice.context_window.max_tokens, advice.context_window.strategy) == (2000, "summarize")
+    # Agents without settings fall back to the host-wide defaults
+    assert communication.prompt_caching is True
+    assert communication.context_window is host.context_window
+    # Different model settings never share a chat model
+    assert len(host._models) == 2
+
+
+def test_environment_overrides_the_manifest():
+    os.environ["ADVICE_PROMPT_CACHING"] = "true"
+    os.environ["ADVICE_CONTEXT_MAX_TOKENS"] = "0"
+    try:
+        advice = make_host().agents["advice"]
+    finally:
+        del os.environ["ADVICE_PROMPT_CACHING"]
+        del os.environ["ADVICE_CONTEXT_MAX_TOKENS"]
+    assert advice.prompt_caching is True
+    assert advice.context_window is None
+
+
+def test_memory_id_falls_back_to_aws_memory_id():
+    original = os.environ.get("AWS_MEMORY_ID")
+    os.environ["AWS_MEMORY_ID"] = "deployment-memory"
+    os.environ["ADVICE_MEMORY_ID"] = "advice-memory"
+    try:
+        host = make_host()
+    finally:
+        del os.environ["ADVICE_MEMORY_ID"]
+        if original is None:
+            del os.environ["AWS_MEMORY_ID"]
+        else:
+            os.environ["AWS_MEMORY_ID"] = original
+    assert host.agents["advice"].memory_id == "advice-memory"
+    assert host.agents["communication"].memory_id == "deployment-memory"
+
+
+def test_saved_messages_follow_the_spec():
+    specs = [
+        AgentSpec.from_dict({"name": "main", "prompt": "senpai_advice_agent/prompt.py", "memory_id": "m",
+                             "save_run_messages": True}, base_dir=ROOT),
+        AgentSpec.from_dict({"name": "advice", "prompt": "senpai_advice_agent/prompt.py", "memory_id": "a"}, base_dir=ROOT),
+    ]
+    senpai_stubs.install()
+    try:
+        host = AgentHost(specs, memory_writer=FakeMemoryWriter(), semantic_cache=None)
+    finally:
+        senpai_stubs.uninstall()
+    for name in ("main", "advice"):
+        answer = asyncio.run(host.invoke({"agent": name, "prompt": "Hello", "user_id": "u1"}))
+        event = host.memory_writer.events[-1]
+        assert event["messages"] == [("Hello", "USER"), (answer, "ASSISTANT")]
+        assert event["memory_id"] == host.agents[name].memory_id
+
+
+if __name__ == "__main__":
+    for test in (
+        test_agents_keep_their_own_settings,
+        test_environment_overrides_the_manifest,
+        test_memory_id_falls_back_to_aws_memory_id,
+        test_saved_messages_follow_the_spec,
+    ):
+        test()
+        print(f"{test.__name__}: OK")
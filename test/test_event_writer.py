@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the write-behind memory event writer.
+
+    python test/test_event_writer.py
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.memory import MemoryEventWriter, SessionHistoryCache
+
+
+class FakeMemoryClient:
+    """create_event() stand-in: session "slow" hangs, session "flaky" fails twice."""
+
+    def __init__(self):
+        self.written = []
+        self.release = threading.Event()
+        self.failures = {"flaky": 2}
+        self._lock = threading.Lock()
+
+    def create_event(self, memory_id, actor_id, session_id, messages, event_timestamp=None):
+        if session_id == "slow":
+            self.release.wait(5)
+        with self._lock:
+            if self.failures.get(session_id, 0) > 0:
+                self.failures[session_id] -= 1
+                raise RuntimeError("ThrottlingException")
+            self.written.append(session_id)
+
+
+def test_slow_write_does_not_stall_the_queue():
+    client = FakeMemoryClient()
+    writer = MemoryEventWriter(client, workers=2, flush_interval=0.05)
+    writer.submit("m", "u", "slow", [("hi", "USER")])
+    for i in range(10):
+        writer.submit("m", "u", f"s{i}", [("hi", "USER")])
+
+    deadline = time.monotonic() + 2
+    while len(client.written) < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(client.written) == sorted(f"s{i}" for i in range(10))
+
+    client.release.set()
+    assert writer.flush(timeout=2)
+    writer.close(timeout=1)
+    assert writer.stats()["written"] == 11
+
+
+def test_retries_are_scheduled_without_blocking_the_worker():
+    client = FakeMemoryClient()
+    writer = MemoryEventWriter(client, workers=1, flush_interval=0.05, retry_backoff=0.2)
+    client.release.set()
+    writer.submit("m", "u", "flaky", [("hi", "USER")])
+    writer.submit("m", "u", "ok", [("hi", "USER")])
+
+    time.sleep(0.1)
+    # The single worker wrote "ok" while "flaky" waits for its retry
+    assert client.written == ["ok"]
+    assert writer.flush(timeout=3)
+    assert client.written == ["ok", "flaky"]
+    stats = writer.stats()
+    assert stats["retried"] == 2 and stats["failed"] == 0 and stats["retrying"] == 0
+    writer.close(timeout=1)
+
+
+def test_submit_never_blocks_the_event_loop():
+    client = FakeMemoryClient()
+    writer = MemoryEventWriter(client, max_queue_size=1, workers=1, enqueue_timeout=1.0)
+    writer.submit("m", "u", "slow", [("hi", "USER")])
+    time.sleep(0.05)
+
+    async def submit_from_loop():
+        start = time.perf_counter()
+        results = [writer.submit("m", "u", f"s{i}", [("hi", "USER")]) for i in range(3)]
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(submit_from_loop())
+    assert results == [True, False, False]
+    assert elapsed < 0.1
+    assert writer.stats()["dropped"] == 2
+    client.release.set()
+    writer.close(timeout=2)
+
+
+def test_failed_write_invalidates_the_history_cache():
+    client = FakeMemoryClient()
+    client.failures["lost"] = 10
+    cache = SessionHistoryCache()
+    turns = [[{"role": "USER", "content": {"text": "earlier"}}]]
+    for session_id in ("lost", "saved"):
+        cache.put_turns("m", "u", session_id, [list(turn) for turn in turns], k=5)
+    writer = MemoryEventWriter(client, workers=1, max_retries=1, retry_backoff=0.01, history_cache=cache)
+    writer.submit("m", "u", "lost", [("new", "USER")])
+    writer.submit("m", "u", "saved", [("new", "USER")])
+    assert writer.flush(timeout=2)
+
+    assert writer.stats()["failed"] == 1
+    assert cache.get_turns("m", "u", "lost", 5) is None
+    assert len(cache.get_turns("m", "u", "saved", 5)) == 2
+    writer.close(timeout=1)
+
+
+if __name__ == "__main__":
+    for test in (
+        test_slow_write_does_not_stall_the_queue,
+        test_retries_are_scheduled_without_blocking_the_worker,
+        test_submit_never_blocks_the_event_loop,
+        test_failed_write_invalidates_the_history_cache,
+    ):
+        test()
+        print(f"{test.__name__}: OK")
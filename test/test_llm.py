@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Offline tests for chat model construction with the AWS backend.
+
+A fake bedrock-runtime client stands in for boto3, so the real ChatBedrock path
+(not a stand-in chat model) is built without credentials or network access.
+
+    python test/test_llm.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.agent.llm as llm_module
+from core.agent.llm import create_chat_model
+
+
+class FakeBedrockClient:
+    """Stand-in for the pooled bedrock-runtime client (never called while building)."""
+
+
+def build(model_id, prompt_caching):
+    original_get_client = llm_module.get_client
+    llm_module.get_client = lambda service, region: FakeBedrockClient()
+    try:
+        return create_chat_model(
+            model_id=model_id,
+            model_kwargs={"temperature": 0.1, "max_tokens": 64},
+            region_name="us-west-2",
+            prompt_caching=prompt_caching,
+        )
+    finally:
+        llm_module.get_client = original_get_client
+
+
+def test_aws_backend_builds_chat_bedrock():
+    model = build("us.amazon.nova-micro-v1:0", prompt_caching=False)
+    assert type(model).__name__ == "ChatBedrock"
+    assert model.model_id == "us.amazon.nova-micro-v1:0"
+    assert isinstance(model.client, FakeBedrockClient)
+
+
+def test_prompt_caching_uses_converse_api_when_supported():
+    model = build("us.amazon.nova-micro-v1:0", prompt_caching=True)
+    assert model.beta_use_converse_api
+
+
+if __name__ == "__main__":
+    for test in (
+        test_aws_backend_builds_chat_bedrock,
+        test_prompt_caching_uses_converse_api_when_supported,
+    ):
+        test()
+        print(f"{test.__name__}: OK")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the logging setup.
+
+    python test/test_logger.py
+"""
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.logger import get_async_logging_stats, logger_config, setup_logger, shutdown_async_logging
+
+
+def test_setup_logger_keeps_the_running_configuration():
+    names = list(logger_config.create_logging_config()["loggers"]) + [""]
+    saved = {name: (logging.getLogger(name).handlers[:], logging.getLogger(name).level) for name in names}
+    configured = logger_config._logging_configured
+    try:
+        setup_logger("senpai", level="INFO", async_logging=True, force=True)
+        handler = logger_config._queue_handler
+        handler.dropped = 3
+
+        # A second call (e.g. from a lazily loaded tool) must not rebuild the pipeline
+        tool_logger = setup_logger(name="senpai.tool", level="DEBUG", async_logging=False)
+        assert tool_logger is logging.getLogger("senpai.tool")
+        assert logger_config._queue_handler is handler
+        assert get_async_logging_stats()["dropped"] == 3
+        assert logging.getLogger("senpai").handlers == [handler]
+        handler.dropped = 0
+    finally:
+        shutdown_async_logging()
+        for name, (handlers, level) in saved.items():
+            target = logging.getLogger(name)
+            target.handlers[:] = handlers
+            target.setLevel(level)
+        logger_config._logging_configured = configured
+
+
+if __name__ == "__main__":
+    for test in (
+        test_setup_logger_keeps_the_running_configuration,
+    ):
+        test()
+        print(f"{test.__name__}: OK")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Offline tests for model tiering by request complexity and latency budget.
+
+    python test/test_model_router.py
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+
+from core.agent.model_router import ModelRouter, ModelTier, get_latency_budget, latency_budget_config, parse_tiers
+
+TIERS = [
+    ModelTier("fast", "us.amazon.nova-micro-v1:0", expected_latency=0.5),
+    ModelTier("standard", "us.amazon.nova-lite-v1:0", expected_latency=1.0),
+    ModelTier("strong", "us.amazon.nova-pro-v1:0", expected_latency=3.0),
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_router(has_tools=False, clock=time.monotonic):
+    return ModelRouter(TIERS, build_model=lambda model_id: f"model:{model_id}", has_tools=has_tools, clock=clock)
+
+
+def tier_for(router, text, budget=None):
+    return router.route([HumanMessage(content=text)], budget=budget).tier.name
+
+
+def test_complexity_selects_the_tier():
+    router = make_router()
+    assert tier_for(router, "こんにちは！") == "fast"
+    assert tier_for(router, "Thanks!") == "fast"
+    assert tier_for(router, "How do I plan my career?") == "standard"
+    hard = "なぜ先輩と比較してしまうのか、どうすれば改善できるか、キャリア計画の観点で理由も説明してください？ 具体的には？"
+    assert tier_for(router, hard) == "strong"
+
+
+def test_likely_tool_calls_skip_the_fastest_tier():
+    assert tier_for(make_router(has_tools=True), "前回の会話は？") == "standard"
+    assert tier_for(make_router(has_tools=False), "前回の会話は？") == "fast"
+
+
+def test_latency_budget_and_observed_latency():
+    router = make_router()
+    hard = "Why do I compare myself to others, and how should I plan my career? What are the trade-offs?"
+    assert tier_for(router, hard) == "strong"
+    assert tier_for(router, hard, budget=1.5) == "standard"
+    decision = router.route([HumanMessage(content=hard)], budget=0.1)
+    assert decision.tier.name == "fast" and decision.reason == "latency_budget"
+    assert decision.llm == "model:us.amazon.nova-micro-v1:0"
+
+    # The standard tier turns slow: the same budget now only fits the fast tier
+    for _ in range(20):
+        router.observe(TIERS[1], 4.0)
+    assert router.estimated_latency(TIERS[1]) > 3.5
+    assert tier_for(router, hard, budget=1.5) == "fast"
+
+
+def test_slow_tier_recovers_while_idle():
+    clock = FakeClock()
+    router = make_router(clock=clock)
+    hard = "Why do I compare myself to others, and how should I plan my career? What are the trade-offs?"
+    for _ in range(20):
+        router.observe(TIERS[1], 4.0)
+    assert tier_for(router, hard, budget=1.5) == "fast"
+
+    # Not chosen any more, the standard tier gets no observations; its penalty decays instead
+    clock.now += 60.0
+    assert 2.0 < router.estimated_latency(TIERS[1]) < 2.6
+    clock.now += 300.0
+    assert router.estimated_latency(TIERS[1]) < 1.1
+    assert tier_for(router, hard, budget=1.5) == "standard"
+
+
+def test_budget_config_counts_elapsed_time():
+    assert latency_budget_config(None) is None
+    assert get_latency_budget(None) is None
+    # Malformed budgets from the payload fall back to no budget
+    for invalid in ("fast", -100, float("nan"), [2500]):
+        assert latency_budget_config(invalid) is None
+    assert latency_budget_config("2500")["configurable"]["latency_budget_ms"] == 2500.0
+    remaining = get_latency_budget(latency_budget_config(2500))
+    assert 2.4 < remaining <= 2.5
+
+    config = latency_budget_config(2500)
+    config["configurable"]["latency_deadline"] -= 2.0  # two seconds already spent
+    assert get_latency_budget(config) < 0.5
+    config["configurable"]["latency_deadline"] -= 5.0
+    assert get_latency_budget(config) == 0.0
+
+
+def test_malformed_tiers_are_skipped():
+    tiers = parse_tiers("fast=us.amazon.nova-micro-v1:0, broken ,=no-name,strong=us.amazon.nova-pro-v1:0,")
+    assert [(tier.name, tier.model_id) for tier in tiers] == [
+        ("fast", "us.amazon.nova-micro-v1:0"),
+        ("strong", "us.amazon.nova-pro-v1:0"),
+    ]
+    assert [tier.expected_latency for tier in tiers] == [1.0, 2.0]
+    assert parse_tiers("") == []
+
+
+if __name__ == "__main__":
+    for test in (
+        test_complexity_selects_the_tier,
+        test_likely_tool_calls_skip_the_fastest_tier,
+        test_latency_budget_and_observed_latency,
+        test_slow_tier_recovers_while_idle,
+        test_budget_config_counts_elapsed_time,
+        test_malformed_tiers_are_skipped,
+    ):
+        test()
+        print(f"{test.__name__}: OK")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Offline tests for tool deadlines, circuit breakers and fallbacks.
+
+    python test/test_resilience.py
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.metrics import TOOL_CIRCUIT_STATE, TOOL_LATENCY, use_agent_name
+from core.tools.resilience import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+from core.tools.tool_interface import Tool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SlowRemoteTool(Tool):
+    """Tool whose remote dependency hangs until released."""
+
+    timeout_seconds = 0.05
+    circuit_failure_threshold = 2
+    circuit_reset_seconds = 60.0
+
+    def __init__(self, name):
+        super().__init__()
+        self._name = name
+        self.release = threading.Event()
+        self.calls = 0
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def description(self):
+        return "Calls a slow remote service."
+
+    def run(self, *args, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        return "remote answer"
+
+    def fallback(self, error, args, kwargs):
+        return f"fallback: {type(error).__name__}"
+
+
+def test_breaker_opens_and_probes_half_open():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=clock)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.allow()          # the probe
+    assert not breaker.allow()      # everyone else waits for its outcome
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.stats()["opened"] == 2
+
+
+def test_timeouts_open_the_circuit_and_fallback_answers_fast():
+    tool = SlowRemoteTool("slow_remote")
+    lc_tool = tool.as_langchain_tool()
+    try:
+        assert lc_tool.func() == "fallback: ToolTimeoutError"
+        assert asyncio.run(lc_tool.coroutine()) == "fallback: ToolTimeoutError"
+        assert TOOL_CIRCUIT_STATE.value(tool="slow_remote") == 2
+
+        # While open, calls are rejected without reaching the dependency
+        start = time.perf_counter()
+        assert lc_tool.func() == "fallback: CircuitOpenError"
+        assert time.perf_counter() - start < 0.05
+        assert tool.calls == 2
+    finally:
+        tool.release.set()
+
+
+def test_unguarded_tool_without_fallback_still_raises():
+    class Failing(SlowRemoteTool):
+        timeout_seconds = None
+
+        def run(self, *args, **kwargs):
+            raise CircuitOpenError(self.name, 1.0)
+
+        def fallback(self, error, args, kwargs):
+            return Tool.fallback(self, error, args, kwargs)
+
+    tool = Failing("failing_remote")
+    try:
+        tool.as_langchain_tool().func()
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("expected the default fallback to re-raise")
+
+
+def test_only_failure_types_count_against_the_circuit():
+    class TransportError(Exception):
+        pass
+
+    class BadOutputTool(SlowRemoteTool):
+        circuit_failure_types = (TransportError,)
+
+        def run(self, *args, **kwargs):
+            self.calls += 1
+            raise ValueError("invalid JSON") if self.calls <= 3 else TransportError("connection reset")
+
+    tool = BadOutputTool("bad_output_remote")
+    lc_tool = tool.as_langchain_tool()
+    for _ in range(3):
+        assert lc_tool.func() == "fallback: ValueError"
+    assert tool.tool_guard().breaker.state == CIRCUIT_CLOSED
+
+    for _ in range(2):
+        assert lc_tool.func() == "fallback: TransportError"
+    assert tool.tool_guard().breaker.state == CIRCUIT_OPEN
+
+
+def test_tool_latency_status_follows_the_result():
+    from core.tools.libs.calculator_tool import CalculatorTool
+
+    def count(tool, status):
+        return TOOL_LATENCY.snapshot(agent="status_test", tool=tool, status=status)["count"]
+
+    calculator = CalculatorTool().as_langchain_tool()
+    with use_agent_name("status_test"):
+        assert calculator.func("1 + 1") == "2"
+        assert calculator.func("1 / 0") == "エラー: ゼロ除算"
+        assert calculator.func("1 / 0") == "エラー: ゼロ除算"
+    assert count("calculator", "ok") == 1
+    # Handled errors are recorded as errors and not served from the result cache
+    assert count("calculator", "error") == 2
+    assert count("calculator", "cached") == 0
+
+    class Failing(SlowRemoteTool):
+        timeout_seconds = None
+
+        def run(self, *args, **kwargs):
+            raise RuntimeError("boom")
+
+        def fallback(self, error, args, kwargs):
+            return Tool.fallback(self, error, args, kwargs)
+
+    with use_agent_name("status_test"):
+        try:
+            Failing("raising_remote").as_langchain_tool().func()
+        except RuntimeError:
+            pass
+    assert count("raising_remote", "error") == 1
+    assert count("raising_remote", "ok") == 0
+
+
+if __name__ == "__main__":
+    for test in (
+        test_breaker_opens_and_probes_half_open,
+        test_timeouts_open_the_circuit_and_fallback_answers_fast,
+        test_unguarded_tool_without_fallback_still_raises,
+        test_only_failure_types_count_against_the_circuit,
+        test_tool_latency_status_follows_the_result,
+    ):
+        test()
+        print(f"{test.__name__}: OK")
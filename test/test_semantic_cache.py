@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the semantic response cache (deterministic HashingEmbedder).
+
+    python test/test_semantic_cache.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from core.agent.semantic_cache import BedrockEmbedder, HashingEmbedder, SemanticCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hashing_embedder_is_deterministic():
+    embedder = HashingEmbedder()
+    first, second = embedder(["新人研修で気をつけることは？", "新人研修で気をつけることは？"])
+    assert first == second
+    assert abs(sum(v * v for v in first) - 1.0) < 1e-9
+
+
+def test_paraphrase_hits_and_unrelated_prompt_misses():
+    cache = SemanticCache(embedder=HashingEmbedder(), threshold=0.8)
+    cache.store("advice", "新人研修で気をつけることを教えてください", "報連相を大切にしましょう。")
+
+    hit = cache.lookup("advice", "新人研修で気をつけることを教えてください！")
+    assert hit is not None and hit.answer == "報連相を大切にしましょう。"
+    assert cache.lookup("advice", "経費精算の締め日はいつですか") is None
+    # Namespaces are separate per agent
+    assert cache.lookup("main", "新人研修で気をつけることを教えてください") is None
+
+
+def test_personalized_prompts_and_tool_runs_are_not_cached():
+    cache = SemanticCache(embedder=HashingEmbedder())
+    assert not cache.store("main", "前回の会話を要約して", "...")
+    assert cache.lookup("main", "What did I ask last time?") is None
+
+    tool_run = [
+        AIMessage(content="", tool_calls=[{"name": "get_zundamon_joke", "args": {}, "id": "call-1"}]),
+        ToolMessage(content="joke", tool_call_id="call-1"),
+        AIMessage(content="joke"),
+    ]
+    assert not cache.store("main", "Tell me a joke!", "joke", tool_run)
+    assert cache.lookup("main", "Tell me a joke!") is None
+    stats = cache.stats()
+    assert stats["bypassed"] == 1 and stats["skipped_tool_runs"] == 1 and stats["entries"] == 0
+
+
+def test_ttl_and_size_eviction():
+    clock = FakeClock()
+    cache = SemanticCache(embedder=HashingEmbedder(), ttl_seconds=10, max_entries=3, clock=clock)
+    questions = ["What time does the office open?", "Where is the cafeteria?",
+                 "How do I reset a password?", "Who approves vacation requests?"]
+    for i, question in enumerate(questions):
+        clock.now = i
+        cache.store("advice", question, f"answer {i}")
+    # The least recently used entry (the first question) was evicted to make room
+    assert cache.stats()["entries"] == 3
+    assert cache.lookup("advice", questions[0]) is None
+    assert cache.lookup("advice", questions[3]).answer == "answer 3"
+
+    clock.now = 100
+    assert cache.lookup("advice", questions[3]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_from_env_refuses_the_hashing_embedder_unless_allowed():
+    keys = ("SEMANTIC_CACHE_ENABLED", "SEMANTIC_CACHE_EMBEDDER", "SEMANTIC_CACHE_ALLOW_HASHING")
+    original = {key: os.environ.get(key) for key in keys}
+    try:
+        # Opt-in
+        os.environ.pop("SEMANTIC_CACHE_ENABLED", None)
+        assert SemanticCache.from_env() is None
+        os.environ["SEMANTIC_CACHE_ENABLED"] = "true"
+        os.environ["SEMANTIC_CACHE_EMBEDDER"] = "hashing"
+        os.environ.pop("SEMANTIC_CACHE_ALLOW_HASHING", None)
+        assert SemanticCache.from_env() is None
+        os.environ["SEMANTIC_CACHE_ALLOW_HASHING"] = "true"
+        assert isinstance(SemanticCache.from_env().embedder, HashingEmbedder)
+        os.environ.pop("SEMANTIC_CACHE_EMBEDDER")
+        assert isinstance(SemanticCache.from_env().embedder, BedrockEmbedder)
+    finally:
+        for key, value in original.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def test_embedding_errors_are_misses():
+    def failing_embedder(texts):
+        raise RuntimeError("ThrottlingException")
+
+    cache = SemanticCache(embedder=failing_embedder)
+    assert not cache.store("advice", "Where is the cafeteria?", "2F")
+    assert cache.lookup("advice", "Where is the cafeteria?") is None
+    assert cache.stats()["errors"] == 2
+
+
+def test_a_miss_embeds_once_and_stores_in_the_background():
+    calls = []
+    embedder = HashingEmbedder()
+
+    def counting_embedder(texts):
+        calls.append(list(texts))
+        return embedder(texts)
+
+    cache = SemanticCache(embedder=counting_embedder)
+    result = cache.search("advice", "Where is the cafeteria?")
+    assert result.hit is None and result.vector is not None
+    future = cache.store_in_background("advice", "Where is the cafeteria?", "2F", vector=result.vector)
+    assert future.result(timeout=5)
+    assert len(calls) == 1
+
+    assert cache.search("advice", "Where is the cafeteria?").hit.answer == "2F"
+    # Personalized prompts are rejected before anything is queued
+    assert cache.store_in_background("advice", "What did I ask last time?", "...") is None
+
+
+if __name__ == "__main__":
+    for test in (
+        test_hashing_embedder_is_deterministic,
+        test_paraphrase_hits_and_unrelated_prompt_misses,
+        test_personalized_prompts_and_tool_runs_are_not_cached,
+        test_ttl_and_size_eviction,
+        test_from_env_refuses_the_hashing_embedder_unless_allowed,
+        test_embedding_errors_are_misses,
+        test_a_miss_embeds_once_and_stores_in_the_background,
+    ):
+        test()
+        print(f"{test.__name__}: OK")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Offline tests for single-flight coalescing of identical concurrent calls.
+
+    python test/test_singleflight.py
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from botocore.exceptions import ClientError
+
+from core.tools.resilience import CIRCUIT_CLOSED
+from core.tools.singleflight import SingleFlight, SingleFlightTimeoutError
+from core.tools.tool_context import ToolContext, use_tool_context
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+    release = threading.Event()
+
+    def generate():
+        calls.append(1)
+        release.wait(5)
+        return {"questions": ["q1"]}
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        futures = [executor.submit(flight.do, ("it", "beginner", 5), generate) for _ in range(10)]
+        while flight.stats()["coalesced"] < 9:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"leaders": 1, "coalesced": 9, "timeouts": 0, "errors": 0, "in_flight": 0}
+    # Completed flights are not cached
+    assert flight.do(("it", "beginner", 5), lambda: "fresh") == "fresh"
+
+
+def test_errors_are_shared_and_waiters_time_out():
+    flight = SingleFlight("test", wait_timeout=0.1)
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.3)
+        raise ValueError("KB unavailable")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "key", fail)
+        started.wait(5)
+        try:
+            flight.do("key", lambda: "unused")
+            raise AssertionError("waiter should time out")
+        except SingleFlightTimeoutError:
+            pass
+        try:
+            leader.result()
+            raise AssertionError("leader should raise")
+        except ValueError:
+            pass
+
+    stats = flight.stats()
+    assert stats["timeouts"] == 1 and stats["errors"] == 1 and stats["in_flight"] == 0
+
+
+def test_shared_quiz_generation_failure_counts_once():
+    os.environ["QUIZ_BANK_PATH"] = os.path.join(tempfile.mkdtemp(), "bank.sqlite3")
+    os.environ["QUIZ_PREFETCH_ENABLED"] = "false"
+    from core.tools.libs.quiz_generator_tool import QuizGeneratorTool
+
+    calls = []
+
+    class FailingKbQuizTool(QuizGeneratorTool):
+        def _generate_quiz(self, topic, difficulty, num_questions):
+            calls.append(topic)
+            time.sleep(0.2)
+            raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "RetrieveAndGenerate")
+
+    tool = FailingKbQuizTool()
+    lc_tool = tool.as_langchain_tool()
+
+    def ask(i):
+        with use_tool_context(ToolContext(actor_id=f"u{i}", user_id=f"u{i}", session_id="s")):
+            return lc_tool.invoke({"kwargs": {"topic": "Cohort", "difficulty": "初級", "num_questions": 3}})
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(ask, range(5)))
+
+    assert len(calls) == 1
+    assert all(json.loads(result)["answers"] == ["A", "A", "A"] for result in results)
+    breaker = tool._kb_guard().breaker
+    assert breaker.stats()["failures"] == 1
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+if __name__ == "__main__":
+    for test in (
+        test_concurrent_calls_share_one_execution,
+        test_errors_are_shared_and_waiters_time_out,
+        test_shared_quiz_generation_failure_counts_once,
+    ):
+        test()
+        print(f"{test.__name__}: OK")
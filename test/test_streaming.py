@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the streaming payload flag.
+
+    python test/test_streaming.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.agent.streaming import stream_requested
+
+
+def test_only_explicit_true_values_stream():
+    for value in (True, 1, "true", "True", " TRUE ", "1"):
+        assert stream_requested({"stream": value}), value
+    for value in (False, 0, 2, "false", "False", "0", "no", "", "yes", None, [], {"on": True}):
+        assert not stream_requested({"stream": value}), value
+    assert not stream_requested({})
+
+
+if __name__ == "__main__":
+    for test in (test_only_explicit_true_values_stream,):
+        test()
+        print(f"{test.__name__}: OK")
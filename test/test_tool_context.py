@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for request-scoped tool context.
+
+Runs many simultaneous sessions (threads and asyncio tasks) against a stubbed
+MemoryClient and checks that every session only ever sees its own
+actor_id/session_id.
+
+    python test/test_tool_context.py
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.tools.tool_context import ToolContext, get_tool_context, submit_with_context, use_tool_context
+
+SESSIONS = 200
+
+
+class StubMemoryClient:
+    """MemoryClient stand-in that echoes the requested actor/session after a random delay."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_last_k_turns(self, memory_id, actor_id, session_id, k=5, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(random.uniform(0, 0.01))
+        return [[
+            {"role": "USER", "content": {"text": f"{actor_id}/{session_id}"}},
+            {"role": "ASSISTANT", "content": {"text": "ok"}},
+        ]]
+
+
+def _context_for(i: int) -> ToolContext:
+    return ToolContext(memory_id="memory-test", actor_id=f"user-{i}", user_id=f"user-{i}", session_id=f"session-{i}")
+
+
+def test_context_propagates_into_thread_pool():
+    def read_actor():
+        time.sleep(random.uniform(0, 0.005))
+        return get_tool_context().get("actor_id")
+
+    def session(i, executor):
+        with use_tool_context(_context_for(i)):
+            return submit_with_context(executor, read_actor).result()
+
+    with ThreadPoolExecutor(max_workers=16) as inner, ThreadPoolExecutor(max_workers=64) as outer:
+        futures = [submit_with_context(outer, session, i, inner) for i in range(SESSIONS)]
+        results = [f.result() for f in futures]
+
+    assert results == [f"user-{i}" for i in range(SESSIONS)]
+    assert get_tool_context().get("actor_id") is None
+
+
+def test_context_propagates_into_async_tasks():
+    async def read_actor():
+        await asyncio.sleep(random.uniform(0, 0.005))
+        return await asyncio.to_thread(lambda: get_tool_context().get("actor_id"))
+
+    async def session(i):
+        with use_tool_context(_context_for(i)):
+            return await read_actor()
+
+    async def main():
+        return await asyncio.gather(*(session(i) for i in range(SESSIONS)))
+
+    results = asyncio.run(main())
+    assert results == [f"user-{i}" for i in range(SESSIONS)]
+
+
+def test_chat_history_tool_isolated_under_concurrency():
+    pytest.importorskip("starlette")  # required by core.logger
+    from core.tools.libs.chat_history_summarize_tool import Chat_history_summarize_tool
+
+    stub = StubMemoryClient()
+    original = Chat_history_summarize_tool.memory_client
+    Chat_history_summarize_tool.memory_client = stub
+    Chat_history_summarize_tool.history_cache.clear()
+    try:
+        tool = Chat_history_summarize_tool()
+
+        def sync_session(i):
+            with use_tool_context(_context_for(i)):
+                return json.loads(tool.run(format_type="json"))[0][0]["content"]["text"]
+
+        async def async_session(i):
+            with use_tool_context(_context_for(i)):
+                return json.loads(await tool.arun(format_type="json"))[0][0]["content"]["text"]
+
+        async def run_async():
+            return await asyncio.gather(*(async_session(i) for i in range(SESSIONS)))
+
+        with ThreadPoolExecutor(max_workers=64) as executor:
+            sync_results = list(executor.map(sync_session, range(SESSIONS)))
+        async_results = asyncio.run(run_async())
+    finally:
+        Chat_history_summarize_tool.memory_client = original
+
+    expected = [f"user-{i}/session-{i}" for i in range(SESSIONS)]
+    assert sync_results == expected
+    assert async_results == expected
+    # The async round is served from the session history cache filled by the sync round
+    assert stub.calls == SESSIONS
+
+
+def test_single_tool_calls_share_the_node_limit():
+    pytest.importorskip("langchain_core")
+    from langchain_core.messages import AIMessage
+    from langchain_core.tools import tool
+    from core.agent.tool_node import create_tool_node
+
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    @tool
+    def slow_lookup(query: str) -> str:
+        """Stand-in for a slow tool."""
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        return query
+
+    node = create_tool_node([slow_lookup], max_concurrency=2)
+
+    def one_call(i):
+        message = AIMessage(content="", tool_calls=[{"name": "slow_lookup", "args": {"query": str(i)}, "id": f"call-{i}"}])
+        return node.invoke({"messages": [message]})["messages"][0].content
+
+    # Every request runs its single call inline, yet the node-wide bound applies
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(one_call, range(8)))
+    assert results == [str(i) for i in range(8)]
+    assert running["peak"] == 2
+
+
+if __name__ == "__main__":
+    for test in (
+        test_context_propagates_into_thread_pool,
+        test_context_propagates_into_async_tasks,
+        test_chat_history_tool_isolated_under_concurrency,
+        test_single_tool_calls_share_the_node_limit,
+    ):
+        test()
+        print(f"{test.__name__}: OK")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Offline tests for tool manifests: the tool classes are the single source of the
+names and descriptions the LLM sees.
+
+    python test/test_tool_manifest.py
+"""
+import importlib
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.tools.tool_manifest import ToolSpec, load_tool_manifest, read_tool_metadata
+
+MANIFESTS = ("senpai-main-agent/tools.json", "senpai_training_agent/tools.json")
+
+TOOL_SOURCE = '''
+from core.tools.tool_interface import Tool
+
+raise RuntimeError("the module must not be imported to read its metadata")
+
+class StaticTool(Tool):
+    @property
+    def name(self):
+        return "static_tool"
+
+    @property
+    def description(self):
+        """Docstrings before the return are fine."""
+        return "Looks things up."
+
+class DynamicTool(Tool):
+    @property
+    def name(self):
+        return "dynamic_" + "tool"
+'''
+
+
+def test_manifest_entries_match_the_tool_classes():
+    for manifest in MANIFESTS:
+        for spec in load_tool_manifest(os.path.join(ROOT, manifest)):
+            tool = getattr(importlib.import_module(spec.module), spec.class_name)()
+            assert (spec.name, spec.description) == (tool.name, tool.description), spec
+
+
+def test_metadata_is_read_without_importing_the_module():
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "manifest_probe_tool.py"), "w", encoding="utf-8") as f:
+            f.write(TOOL_SOURCE)
+        sys.path.insert(0, directory)
+        try:
+            assert read_tool_metadata("manifest_probe_tool", "StaticTool") == {
+                "name": "static_tool", "description": "Looks things up.",
+            }
+            spec = ToolSpec.from_dict({"class": "DynamicTool", "module": "manifest_probe_tool", "name": "dynamic_tool"})
+            assert (spec.name, spec.description) == ("dynamic_tool", "")
+            try:
+                ToolSpec.from_dict({"class": "DynamicTool", "module": "manifest_probe_tool"})
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("expected a ValueError for a name that is not a literal")
+            assert "manifest_probe_tool" not in sys.modules
+        finally:
+            sys.path.remove(directory)
+
+
+if __name__ == "__main__":
+    for test in (
+        test_manifest_entries_match_the_tool_classes,
+        test_metadata_is_read_without_importing_the_module,
+    ):
+        test()
+        print(f"{test.__name__}: OK")